@@ -1,21 +1,38 @@
 # FastAPI Application
 import uvicorn
-from fastapi import FastAPI, HTTPException, Body, Query, Depends, Response, Cookie
+from fastapi import FastAPI, HTTPException, Body, Query, Depends, Request, Response, Cookie
 from fastapi.middleware.cors import CORSMiddleware
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import jwt
 from jwt import PyJWTError
 import os
 from dotenv import load_dotenv
 import json
+import base64
+import csv
+import io
+import secrets
+import asyncio
+import re
 
 # Import our custom services
-from google_forms_service import GoogleFormsService
-from email_service import EmailService
+from google_forms_service import FormBuildError, GoogleFormsService
+from email_service import EmailDeliveryError, EmailService, load_distribution_lists
+from repository import Repository, create_repository
+from form_executor import FormCreationExecutor
+from job_queue import JobWorkerPool, LeaseLostError, PersistentJobQueue, job_summary
+from quota_scheduler import QuotaScheduler
+from lazy_service import LazyService
+from google_token_verifier import GoogleCertCache, GoogleIdTokenVerifier
+from event_loop_thread import EventLoopThread
+from session_cache import SessionCache, token_key
+from revocation_store import RevocationStore
+from survey_import import ImportParser, MultipartFileReader, detect_format
+from ttl_cache import TTLCache
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +42,40 @@ GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "331931690873-9sarog6q4rjjiedp1
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
+# Verified session cookies kept in memory so requests skip re-verifying the JWT
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+# Logged-in user profiles kept in memory (memory backend), oldest dropped first
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "100000"))
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")  # "memory" or "sqlite"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./surveys.db")
+# Forms created in parallel; each concurrent build checks out its own
+# Forms/Drive client pair, so this also sizes the client pool
+FORM_CREATION_CONCURRENCY = int(os.getenv("FORM_CREATION_CONCURRENCY", "4"))
+# Background form provisioning (POST /surveys?async_provisioning=true)
+PROVISIONING_QUEUE_URL = os.getenv("PROVISIONING_QUEUE_URL", "sqlite:///./jobs.db")
+PROVISIONING_WORKERS = int(os.getenv("PROVISIONING_WORKERS", "2"))
+PROVISIONING_MAX_ATTEMPTS = int(os.getenv("PROVISIONING_MAX_ATTEMPTS", "5"))
+# Seconds a provisioning worker waits for the Forms service to finish initializing
+FORMS_INIT_TIMEOUT = float(os.getenv("FORMS_INIT_TIMEOUT", "60"))
+# Most surveys accepted by one POST /surveys/bulk request
+BULK_MAX_SURVEYS = int(os.getenv("BULK_MAX_SURVEYS", "1000"))
+# Most surveys changed by one PATCH /surveys/bulk or POST /surveys/bulk-delete
+BULK_MAX_UPDATES = int(os.getenv("BULK_MAX_UPDATES", "10000"))
+# Surveys read from the repository per page while streaming an export
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+# Rows validated and saved per batch while streaming POST /surveys/import
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# Row errors kept per import (the rest are only counted)
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+# Longest accepted import row, in characters
+IMPORT_MAX_ROW_LENGTH = int(os.getenv("IMPORT_MAX_ROW_LENGTH", "1000000"))
+# Approval emails outbox (persisted like provisioning jobs, sent in the background)
+EMAIL_OUTBOX_URL = os.getenv("EMAIL_OUTBOX_URL", PROVISIONING_QUEUE_URL)
+EMAIL_SENDERS = int(os.getenv("EMAIL_SENDERS", "2"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_RETRY_DELAY = float(os.getenv("EMAIL_RETRY_DELAY", "5"))
+# Named recipient lists for approvals: JSON object {"list name": ["email", ...]}
+DISTRIBUTION_LISTS_FILE = os.getenv("DISTRIBUTION_LISTS_FILE", "distribution_lists.json")
 
 # --- DATA MODELS ---
 # This model defines the expected data from your React frontend
@@ -43,61 +94,367 @@ class Survey(BaseModel):
     approver: Optional[str] = None
     form_url: Optional[str] = None
     form_id: Optional[str] = None
+    form_status: Optional[str] = None  # pending, ready or failed
     creator: Optional[str] = None
 
+class SurveyFilter(BaseModel):
+    status: Optional[str] = None
+    creator: Optional[str] = None
+
+class BulkSelection(BaseModel):
+    ids: Optional[List[str]] = None
+    filter: Optional[SurveyFilter] = None  # Used when ids is not given
+
+class BulkUpdateRequest(BulkSelection):
+    changes: dict
+    skip_invalid: bool = False  # Apply the valid updates even if some fail validation
+
 class ApprovalRequest(BaseModel):
-    recipient_email: str
+    recipient_email: Optional[str] = None
+    recipients: List[str] = []
+    distribution_lists: List[str] = []  # Names from DISTRIBUTION_LISTS_FILE
     custom_message: Optional[str] = None
 
-# --- IN-MEMORY DATABASE (for demo) ---
-surveys_db: List[dict] = []
-users_db: dict = {}  # Store user sessions
+# Allowed survey status changes (current status -> new statuses)
+VALID_STATUS_TRANSITIONS = {
+    "draft": ["pending-approval", "approved", "archived"],
+    "pending-approval": ["draft", "approved", "archived"],
+    "approved": ["archived"],
+    "archived": []
+}
+
+# --- DATABASE ---
+# Surveys and user sessions live behind a repository (in-memory or SQLite)
+repository: Repository = create_repository(
+    STORAGE_BACKEND, DATABASE_URL, max_users=USER_CACHE_SIZE, user_ttl=JWT_EXPIRATION_HOURS * 3600
+)
+print(f"✅ Storage backend: {STORAGE_BACKEND}")
 
 # --- INITIALIZE SERVICES ---
+# Verified session tokens (LRU, each entry dropped at its token's exp)
+session_cache = SessionCache(max_entries=SESSION_CACHE_SIZE)
+# Logged-out session IDs, each forgotten once its token has expired
+revoked_sessions = RevocationStore()
+
+# Every Forms/Drive API call waits for quota here (limits from FORMS_*_QPM / DRIVE_*_QPM)
+quota_scheduler = QuotaScheduler()
+
 # Configuration: Set USE_OAUTH=True for 100% success rate, False for service account (10-30%)
 USE_OAUTH = os.getenv("USE_OAUTH", "true").lower() == "true"  # Default to OAuth
 
-try:
-    if USE_OAUTH:
-        print("🔐 Initializing Google Forms with OAuth 2.0 (100% success rate)...")
-        forms_service = GoogleFormsService(
-            credentials_file="credentials.json",
-            use_oauth=True,
-            oauth_credentials_file="credentials-oauth.json"
-        )
-    else:
-        print("🔐 Initializing Google Forms with Service Account (10-30% success rate)...")
-        print("⚠️  Consider setting USE_OAUTH=true in .env for better reliability")
-        forms_service = GoogleFormsService(credentials_file="credentials.json", use_oauth=False)
-    
-    print("✅ Google Forms service initialized")
-except FileNotFoundError as e:
-    print(f"⚠️ Google Forms service not available: {e}")
-    if USE_OAUTH:
-        print("⚠️ Please create OAuth 2.0 credentials:")
-        print("   1. Go to: https://console.cloud.google.com/apis/credentials")
-        print("   2. Create OAuth 2.0 Client ID (Application type: Desktop app)")
-        print("   3. Download JSON and save as 'credentials-oauth.json'")
-    print("⚠️ Surveys will be created without Google Forms integration")
-    forms_service = None
-except Exception as e:
-    print(f"⚠️ Google Forms service initialization failed: {e}")
-    print("⚠️ Common issues:")
-    print("   - Google Forms API not enabled in Cloud Console")
-    if USE_OAUTH:
-        print("   - OAuth credentials file missing or invalid")
-        print("   - Need to complete OAuth consent flow (browser will open on first run)")
-    else:
-        print("   - Service account permissions insufficient")
-        print("   - Service accounts have only 10-30% success rate with Forms API")
-        print("   💡 Set USE_OAUTH=true in .env for 100% success rate")
-    print("   - API quota exceeded")
-    print("⚠️ Surveys will be created without Google Forms integration")
-    forms_service = None
+def create_forms_service() -> GoogleFormsService:
+    """
+    Build the Google Forms service (may refresh tokens or open a browser)
+    
+    Runs on a background thread through forms_service_loader, never at import.
+    """
+    try:
+        if USE_OAUTH:
+            print("🔐 Initializing Google Forms with OAuth 2.0 (100% success rate)...")
+            service = GoogleFormsService(
+                credentials_file="credentials.json",
+                use_oauth=True,
+                oauth_credentials_file="credentials-oauth.json",
+                quota_scheduler=quota_scheduler,
+                client_pool_size=FORM_CREATION_CONCURRENCY
+            )
+        else:
+            print("🔐 Initializing Google Forms with Service Account (10-30% success rate)...")
+            print("⚠️  Consider setting USE_OAUTH=true in .env for better reliability")
+            service = GoogleFormsService(
+                credentials_file="credentials.json",
+                use_oauth=False,
+                quota_scheduler=quota_scheduler,
+                client_pool_size=FORM_CREATION_CONCURRENCY
+            )
+        
+        print("✅ Google Forms service initialized")
+        return service
+    except FileNotFoundError as e:
+        print(f"⚠️ Google Forms service not available: {e}")
+        if USE_OAUTH:
+            print("⚠️ Please create OAuth 2.0 credentials:")
+            print("   1. Go to: https://console.cloud.google.com/apis/credentials")
+            print("   2. Create OAuth 2.0 Client ID (Application type: Desktop app)")
+            print("   3. Download JSON and save as 'credentials-oauth.json'")
+        print("⚠️ Surveys will be created without Google Forms integration")
+        raise
+    except Exception as e:
+        print(f"⚠️ Google Forms service initialization failed: {e}")
+        print("⚠️ Common issues:")
+        print("   - Google Forms API not enabled in Cloud Console")
+        if USE_OAUTH:
+            print("   - OAuth credentials file missing or invalid")
+            print("   - Need to complete OAuth consent flow (browser will open on first run)")
+        else:
+            print("   - Service account permissions insufficient")
+            print("   - Service accounts have only 10-30% success rate with Forms API")
+            print("   💡 Set USE_OAUTH=true in .env for 100% success rate")
+        print("   - API quota exceeded")
+        print("⚠️ Surveys will be created without Google Forms integration")
+        raise
+
+# Created in the background on first use (or at startup), so cold starts
+# and test imports never wait on OAuth
+forms_service_loader = LazyService(create_forms_service, name="google-forms")
+
+def get_forms_service() -> Optional[GoogleFormsService]:
+    """The Google Forms service if it is ready, else None (never blocks)"""
+    return forms_service_loader.get()
+
+# Blocking form creation runs here instead of on the event loop
+form_executor = FormCreationExecutor(max_concurrency=FORM_CREATION_CONCURRENCY)
+
+
+def provision_form_job(job: dict) -> dict:
+    """
+    Job handler: create the Google Form for a survey saved with form_status=pending
+    
+    Runs on a provisioning worker thread; the form itself is built on the
+    bounded form executor. Raising marks the attempt failed and retries it,
+    resuming from the last completed build step.
+    """
+    payload = job["payload"]
+    survey_id = payload["survey_id"]
+    
+    if repository.get(survey_id) is None:
+        print(f"ℹ️  Survey {survey_id} was deleted, skipping form provisioning")
+        return {"skipped": "survey deleted"}
+    
+    forms_service = forms_service_loader.wait(FORMS_INIT_TIMEOUT)
+    if not forms_service:
+        raise RuntimeError(f"Google Forms service not initialized ({forms_service_loader.state})")
+    
+    questions = payload.get("questions")
+    if not questions and payload.get("questions_text"):
+        questions = GoogleFormsService.parse_questions_from_text(payload["questions_text"])
+    
+    try:
+        form_data = form_executor.submit(
+            forms_service.create_form,
+            title=payload["title"],
+            description=payload["description"],
+            questions=questions if questions else None,
+            owner_email=payload.get("owner_email"),
+            resume_state=payload.get("form_build")
+        ).result()
+    except FormBuildError as e:
+        # Checkpoint the finished steps so the next attempt resumes instead
+        # of creating another form
+        provisioning.queue.update_payload(job["id"], {**payload, "form_build": e.state}, worker=job["worker"])
+        raise
+    
+    repository.update(survey_id, form_fields(form_data))
+    print(f"✅ Provisioned Google Form {form_data['form_id']} for survey {survey_id}")
+    return {"form_id": form_data["form_id"], "form_url": form_data["form_url"]}
+
+def mark_provisioning_failed(job: dict, error: str):
+    """Record on the survey that its form could not be provisioned"""
+    changes = {"form_status": "failed", "form_error": error}
+    build = job["payload"].get("form_build") or {}
+    if build.get("form_id"):
+        # Keep the partly built form reachable instead of orphaning it
+        changes.update(form_id=build["form_id"], form_url=build.get("form_url"))
+    repository.update(job["payload"]["survey_id"], changes)
+
+def form_fields(form_data: dict) -> dict:
+    """Survey fields for a built form; permissions that failed are kept as its form_error"""
+    permission_errors = form_data.get("permission_errors") or {}
+    return {
+        "form_url": form_data["form_url"],
+        "form_id": form_data["form_id"],
+        "edit_url": form_data.get("edit_url"),
+        "form_status": "ready",
+        "form_error": "; ".join(
+            f"{step} permission failed: {error}" for step, error in permission_errors.items()
+        ) or None
+    }
+
+def resume_form_build(
+    survey_id: str,
+    title: str,
+    description: str,
+    questions: Optional[list],
+    questions_text: Optional[str],
+    owner_email: Optional[str],
+    error: FormBuildError
+) -> Tuple[dict, dict]:
+    """
+    Hand a form that was created but not finished to the provisioners
+    
+    The form already exists in Drive, so the survey keeps its ID and URL
+    and a provisioning job resumes the build from the failed step (like a
+    retried job does) rather than leaving the form orphaned.
+    
+    Returns:
+        (survey changes, the queued job)
+    """
+    form_id = error.state["form_id"]
+    job = provisioning.enqueue(survey_id, {
+        "survey_id": survey_id,
+        "title": title,
+        "description": description,
+        "questions": questions if questions else None,
+        "questions_text": questions_text,
+        "owner_email": owner_email,
+        "form_build": error.state
+    }, max_attempts=PROVISIONING_MAX_ATTEMPTS)
+    changes = {
+        "form_id": form_id,
+        "form_url": error.state.get("form_url"),
+        "edit_url": f"https://docs.google.com/forms/d/{form_id}/edit",
+        "form_status": "pending",
+        "form_error": str(error)
+    }
+    return changes, job
+
+# Persisted queue: jobs left running by a crashed worker are picked up again
+provisioning = JobWorkerPool(
+    PersistentJobQueue(PROVISIONING_QUEUE_URL, table_name="provisioning_jobs"),
+    handler=provision_form_job,
+    on_give_up=mark_provisioning_failed,
+    workers=PROVISIONING_WORKERS,
+    name="form-provisioner"
+)
+
+# Progress of recent imports (GET /surveys/imports/{import_id}), kept for a day
+import_progress = TTLCache(max_entries=1000, ttl=24 * 3600)
+
+# Google's ID-token signing certificates, cached per their Cache-Control
+# max-age and refreshed in the background, so logins only do local RSA checks
+google_cert_cache = GoogleCertCache()
+google_token_verifier = GoogleIdTokenVerifier(GOOGLE_CLIENT_ID, google_cert_cache)
 
 email_service = EmailService()
 print("✅ Email service initialized" if email_service.is_configured else "⚠️ Email service available but not configured")
 
+# Outbox senders run the async email code on one long-lived loop, so the
+# pooled SMTP connections are reused across jobs
+email_loop = EventLoopThread(name="email-sender-loop")
+
+
+# Loaded once at startup
+distribution_lists: Dict[str, List[str]] = load_distribution_lists(DISTRIBUTION_LISTS_FILE)
+if distribution_lists:
+    print(f"✅ Loaded {len(distribution_lists)} distribution lists")
+
+
+def send_email_job(job: dict) -> dict:
+    """
+    Job handler: send a queued approval email to its recipients
+    
+    Runs on an email sender thread. Raising marks the attempt failed and
+    retries it with exponential backoff; recipients already handled are
+    checkpointed in the job so a retry only sends to the rest. The
+    survey's email_status and email_summary show the outcome.
+    """
+    payload = job["payload"]
+    survey_id = payload["survey_id"]
+    
+    if repository.get(survey_id) is None:
+        print(f"ℹ️  Survey {survey_id} was deleted, skipping approval email")
+        return {"skipped": "survey deleted"}
+    
+    recipients = payload.get("recipients") or [payload["recipient_email"]]
+    statuses = dict(payload.get("recipient_status") or {})
+    pending = [recipient for recipient in recipients if recipient not in statuses]
+    
+    def checkpoint(progress: Dict[str, str]):
+        # After each SMTP message: keep the lease for a long fan-out, and save
+        # who has been mailed so a reclaimed job doesn't mail them again
+        queue = email_outbox.queue
+        if not (queue.renew(job["id"], job["worker"], email_outbox.lease_seconds)
+                and queue.update_payload(job["id"], {**payload, "recipient_status": {**statuses, **progress}},
+                                         worker=job["worker"])):
+            raise LeaseLostError(f"Email job {job['id']} was taken over by another sender")
+    
+    try:
+        result = email_loop.run(email_service.deliver_approval_emails(
+            pending,
+            survey_title=payload["survey_title"],
+            form_url=payload["form_url"],
+            approver_name=payload["approver_name"],
+            custom_message=payload.get("custom_message"),
+            on_progress=checkpoint
+        )) if pending else {}
+    except Exception as e:
+        if isinstance(getattr(e, "cause", e), LeaseLostError):
+            # The job's new sender owns its progress and the survey's status
+            raise
+        if isinstance(e, EmailDeliveryError):
+            statuses.update(e.statuses)
+            email_outbox.queue.update_payload(job["id"], {**payload, "recipient_status": statuses}, worker=job["worker"])
+        repository.update(survey_id, {
+            "email_status": "retrying",
+            "email_error": str(e) or e.__class__.__name__,
+            "email_summary": email_summary(recipients, statuses)
+        })
+        raise
+    
+    if result is None:
+        repository.update(survey_id, {"email_status": "not_configured", "email_error": "SMTP not configured"})
+        return {"sent": False}
+    
+    statuses.update(result)
+    summary = email_summary(recipients, statuses)
+    repository.update(survey_id, {
+        "email_status": "sent" if not summary["refused"] else "partially_sent" if summary["sent"] else "failed",
+        "email_error": None if summary["sent"] else "Every recipient was refused",
+        "email_sent_at": datetime.utcnow().isoformat() if summary["sent"] else None,
+        "email_summary": summary
+    })
+    return {"recipients": statuses}
+
+def email_summary(recipients: List[str], statuses: Dict[str, str]) -> dict:
+    """Recipient counts by delivery state"""
+    sent = sum(1 for status in statuses.values() if status == "sent")
+    refused = len(statuses) - sent
+    return {"recipients": len(recipients), "sent": sent, "refused": refused, "pending": len(recipients) - sent - refused}
+
+def approval_email_lost(survey: dict) -> bool:
+    """
+    Whether an approved survey's email never reached the outbox
+    
+    Approving writes the survey, then the outbox job; a crash in between
+    leaves the survey queued with no job to send it. Such surveys may be
+    approved again to queue the email.
+    """
+    if survey.get("email_status") not in ("queued", "retrying"):
+        return False
+    job = email_outbox.queue.latest_for_key(survey["id"])
+    return job is None or job["status"] in ("done", "failed")
+
+def mark_email_failed(job: dict, error: str):
+    """Record on the survey that its approval email could not be sent"""
+    repository.update(job["payload"]["survey_id"], {"email_status": "failed", "email_error": error})
+
+# Transactional outbox: approvals only write a job, senders drain it with retries
+email_outbox = JobWorkerPool(
+    PersistentJobQueue(EMAIL_OUTBOX_URL, table_name="email_outbox"),
+    handler=send_email_job,
+    on_give_up=mark_email_failed,
+    workers=EMAIL_SENDERS,
+    name="email-sender",
+    lease_seconds=120.0,
+    retry_delay=EMAIL_RETRY_DELAY
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers (resuming any queued jobs) and stop them on shutdown"""
+    forms_service_loader.start()
+    google_cert_cache.start()
+    provisioning.start()
+    email_outbox.start()
+    yield
+    provisioning.stop()
+    email_outbox.stop()
+    google_cert_cache.stop()
+    if email_loop.running:
+        email_loop.run(email_service.close(), timeout=5)
+    email_loop.stop()
+
 
 # --- FASTAPI APP ---
 app = FastAPI(
@@ -126,6 +483,7 @@ All endpoints require Google OAuth authentication via cookies.
 Use `POST /auth/google` to authenticate with a Google token.
     """,
     version="1.0.0",
+    lifespan=lifespan,
     terms_of_service="https://example.com/terms",
     contact={
         "name": "API Support",
@@ -143,6 +501,10 @@ Use `POST /auth/google` to authenticate with a Google token.
         {
             "name": "surveys",
             "description": "Survey CRUD operations and approval workflow"
+        },
+        {
+            "name": "system",
+            "description": "Service health and Google API quota status"
         }
     ]
 )
@@ -167,20 +529,247 @@ app.add_middleware(
 
 # --- HELPER FUNCTIONS ---
 def create_access_token(data: dict) -> str:
-    """Create JWT access token"""
+    """Create JWT access token with a unique session ID (jti)"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(16)})
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[dict]:
-    """Verify JWT token"""
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
-    except PyJWTError:
+    """Verify JWT token (served from the session cache once verified)"""
+    payload = session_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        except PyJWTError:
+            return None
+        session_cache.put(token, payload)
+    if revoked_sessions.is_revoked(session_id(token, payload), payload.get("exp", 0)):
         return None
+    return payload
+
+def session_id(token: str, payload: dict) -> str:
+    """A token's session ID: its jti (or a hash of the token, for tokens issued without one)"""
+    return payload.get("jti") or token_key(token).hex()
+
+def encode_cursor(survey: dict) -> str:
+    """Encode a survey's (createdAt, id) position as an opaque pagination cursor"""
+    key = json.dumps([survey.get("createdAt") or "", survey["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Optional[tuple]:
+    """Decode a pagination cursor (empty cursor means the first page)"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, survey_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(created_at, str) or not isinstance(survey_id, str):
+            raise ValueError("cursor must contain two strings")
+        return created_at, survey_id
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+# Columns of GET /surveys/export?format=csv when no fields are selected
+EXPORT_FIELDS = [
+    "id", "title", "description", "questions", "status", "createdAt", "approvedAt", "responseCount",
+    "approver", "form_url", "form_id", "edit_url", "form_status", "creator"
+]
+
+def iter_surveys(repository: Repository, status: Optional[str] = None, page_size: int = 500) -> Iterator[dict]:
+    """Every survey in (createdAt, id) order, read one keyset page at a time"""
+    after = None
+    while True:
+        page = repository.list_after(after=after, limit=page_size, status=status)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = (page[-1].get("createdAt") or "", page[-1]["id"])
+
+def export_chunks(surveys: Iterable[dict], format: str, fields: Optional[List[str]], page_size: int = 500) -> Iterator[str]:
+    """
+    Serialize surveys as NDJSON or CSV, one chunk of up to page_size rows at a time
+    
+    NDJSON rows hold the selected fields (or the whole survey); CSV rows
+    the selected fields (or EXPORT_FIELDS), with lists and objects as JSON.
+    """
+    buffer = io.StringIO()
+    if format == "csv":
+        fields = fields or EXPORT_FIELDS
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(fields)
+        
+        def write(survey: dict):
+            writer.writerow([
+                "" if value is None else json.dumps(value) if isinstance(value, (dict, list)) else value
+                for value in (survey.get(field) for field in fields)
+            ])
+    else:
+        encode = json.JSONEncoder(separators=(",", ":")).encode  # One encoder for every row
+        
+        def write(survey: dict):
+            buffer.write(encode({field: survey.get(field) for field in fields} if fields else survey))
+            buffer.write("\n")
+    
+    rows = 0
+    for survey in surveys:
+        write(survey)
+        rows += 1
+        if rows % page_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+EMAIL_ADDRESS_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def resolve_recipients(approval: ApprovalRequest) -> List[str]:
+    """
+    Expand an approval's recipients and distribution lists into unique addresses
+    
+    Raises:
+        HTTPException: 400 for an unknown list, an invalid address or no recipients
+    """
+    addresses = ([approval.recipient_email] if approval.recipient_email else []) + list(approval.recipients)
+    for name in approval.distribution_lists:
+        if name not in distribution_lists:
+            raise HTTPException(status_code=400, detail=f"Unknown distribution list: {name}")
+        addresses.extend(distribution_lists[name])
+    
+    recipients = []
+    seen = set()
+    for address in addresses:
+        address = address.strip()
+        if not EMAIL_ADDRESS_PATTERN.match(address):
+            raise HTTPException(status_code=400, detail=f"Invalid recipient email: {address!r}")
+        if address.lower() not in seen:
+            seen.add(address.lower())
+            recipients.append(address)
+    if not recipients:
+        raise HTTPException(status_code=400, detail="At least one recipient or distribution list is required")
+    return recipients
+
+def parse_survey_questions(raw: Optional[str]) -> Tuple[list, Optional[str]]:
+    """
+    Parse a survey's questions field (JSON array or plain text)
+    
+    Returns:
+        (questions, questions_text) - questions_text is the original text
+        when it was not JSON, so background jobs can re-parse it
+    
+    Raises:
+        HTTPException: 400 if the field holds binary file content
+    """
+    if not raw:
+        return [], None
+    # Check if questions contains binary data (e.g., Excel file content)
+    if raw.startswith('PK\x03\x04') or '\x00' in raw[:100]:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid questions format. Binary files (Excel, Word, etc.) are not supported. Please use plain text, JSON, or CSV format."
+        )
+    try:
+        # Try to parse as JSON first
+        return json.loads(raw), None
+    except json.JSONDecodeError:
+        # If not JSON, parse as text
+        return GoogleFormsService.parse_questions_from_text(raw), raw
+
+def new_survey_record(survey_id: str, survey: Survey, creator: Optional[str], **form_fields) -> dict:
+    """The stored representation of a newly created draft survey"""
+    return {
+        "id": survey_id,
+        "title": survey.title,
+        "description": survey.description,
+        "questions": survey.questions,
+        "status": "draft",
+        "createdAt": datetime.utcnow().isoformat(),
+        "approvedAt": None,
+        "responseCount": 0,
+        "approver": None,
+        "form_url": None,
+        "form_id": None,
+        "edit_url": None,
+        "form_status": "pending",
+        "creator": creator,
+        **form_fields
+    }
+
+def parse_bulk_items(body: bytes, content_type: str) -> List[bytes]:
+    """
+    Split a bulk request body into one raw JSON document per survey
+    
+    NDJSON bodies (application/x-ndjson) are split on newlines, skipping
+    blank lines; anything else must be a JSON array.
+    
+    Raises:
+        HTTPException: 400 if a JSON body is not an array
+    """
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [line for line in body.splitlines() if line.strip()]
+    try:
+        items = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of surveys (or an NDJSON body)")
+    return items
+
+def validation_message(error: ValidationError) -> str:
+    """One-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'body'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+def transition_error(current_status: str, new_status: str) -> Optional[str]:
+    """Why a status change is not allowed, or None if it is"""
+    if current_status not in VALID_STATUS_TRANSITIONS:
+        return f"Invalid current status: {current_status}"
+    if new_status not in VALID_STATUS_TRANSITIONS[current_status]:
+        return (
+            f"Invalid status transition from '{current_status}' to '{new_status}'. "
+            f"Allowed: {VALID_STATUS_TRANSITIONS[current_status]}"
+        )
+    return None
+
+def key_field_error(changes: dict) -> Optional[str]:
+    """Why an update's indexed fields (status, creator, createdAt) are invalid, or None"""
+    for field in ("status", "creator", "createdAt"):
+        if changes.get(field) is not None and not isinstance(changes[field], str):
+            return f"{field} must be a string or null"
+    return None
+
+def select_surveys(selection: BulkSelection, repository: Repository) -> Tuple[List[str], Dict[str, dict]]:
+    """
+    Resolve a bulk request's ids or filter
+    
+    Returns:
+        (survey IDs in request order without duplicates, {id: survey} for those that exist)
+    
+    Raises:
+        HTTPException: 400 without ids or a filter, 413 above BULK_MAX_UPDATES surveys
+    """
+    if selection.ids is not None:
+        survey_ids = list(dict.fromkeys(selection.ids))
+        if len(survey_ids) > BULK_MAX_UPDATES:
+            raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_UPDATES} surveys per request")
+        return survey_ids, repository.get_many(survey_ids)
+    
+    if selection.filter is None or (selection.filter.status is None and selection.filter.creator is None):
+        raise HTTPException(status_code=400, detail="Provide ids or a filter with status and/or creator")
+    surveys = repository.list(
+        limit=BULK_MAX_UPDATES + 1, status=selection.filter.status, creator=selection.filter.creator
+    )
+    if len(surveys) > BULK_MAX_UPDATES:
+        raise HTTPException(status_code=413, detail=f"Filter matches more than {BULK_MAX_UPDATES} surveys")
+    return [survey["id"] for survey in surveys], {survey["id"]: survey for survey in surveys}
+
+def get_repository() -> Repository:
+    """Dependency returning the configured survey repository"""
+    return repository
 
 async def get_current_user(auth_token: Optional[str] = Cookie(None)):
     """Dependency to get current authenticated user"""
@@ -213,18 +802,19 @@ async def get_current_user_info(current_user: Optional[dict] = Depends(get_curre
     }
 
 @app.post("/auth/google", tags=["authentication"])
-async def verify_google_token(body: GoogleToken, response: Response):
+async def verify_google_token(
+    body: GoogleToken,
+    response: Response,
+    repository: Repository = Depends(get_repository)
+):
     """
     Receives the Google ID Token from the frontend,
     verifies it, and returns the user's information with JWT token.
     """
     try:
-        # Verify the ID token using Google's library
-        id_info = id_token.verify_oauth2_token(
-            body.token, 
-            google_requests.Request(), 
-            GOOGLE_CLIENT_ID
-        )
+        # Verify the ID token locally against Google's cached signing keys,
+        # on a worker thread so the RSA check doesn't block the event loop
+        id_info = await google_token_verifier.verify_async(body.token)
 
         # Token is valid. `id_info` contains the user's profile data.
         user_email = id_info.get("email")
@@ -251,8 +841,8 @@ async def verify_google_token(body: GoogleToken, response: Response):
             secure=False  # Set to True in production with HTTPS
         )
 
-        # Store user in memory (in production, use database)
-        users_db[user_email] = token_data
+        # Store user profile
+        repository.save_user(user_email, token_data)
 
         return {
             "message": "Login successful",
@@ -278,44 +868,143 @@ async def verify_google_token(body: GoogleToken, response: Response):
         )
 
 @app.post("/auth/logout", tags=["authentication"])
-async def logout(response: Response):
-    """Logout user by clearing the auth cookie"""
+async def logout(response: Response, auth_token: Optional[str] = Cookie(None)):
+    """Logout user by revoking the session and clearing the auth cookie"""
+    if auth_token:
+        payload = verify_token(auth_token)
+        if payload:
+            revoked_sessions.revoke(session_id(auth_token, payload), payload.get("exp", 0))
+            session_cache.discard(auth_token)
     response.delete_cookie(key="auth_token")
     return {"message": "Logged out successfully"}
 
+@app.get("/ready", tags=["system"])
+async def readiness():
+    """
+    Readiness of the app's background-initialized services
+    
+    Returns 503 while the Google Forms service is still initializing.
+    Once it has finished the app is ready; if it failed, surveys are
+    created without Google Forms (`degraded: true`).
+    """
+    forms = forms_service_loader.status()
+    ready = not forms_service_loader.pending
+    return JSONResponse(status_code=200 if ready else 503, content={
+        "ready": ready,
+        "degraded": forms["state"] == LazyService.UNAVAILABLE,
+        "services": {"google_forms": forms}
+    })
+
+@app.get("/credentials/metrics", tags=["system"])
+async def get_credential_metrics():
+    """
+    Google credential refresh metrics
+    
+    Tokens are refreshed in the background before they expire;
+    `request_path_refreshes` counts refreshes that a request had to wait for.
+    """
+    forms_service = get_forms_service()
+    manager = forms_service.credential_manager if forms_service else None
+    if manager is None:
+        raise HTTPException(status_code=503, detail=f"Google Forms service is {forms_service_loader.state}")
+    return manager.metrics()
+
+@app.get("/quota", tags=["system"])
+async def get_quota_budget():
+    """
+    Current Google API quota budget
+    
+    One token bucket per API and request kind (forms/drive, read/write),
+    with its adaptive rate, available tokens and throttling counters.
+    """
+    return {"buckets": quota_scheduler.budget()}
+
 # --- SURVEY ENDPOINTS ---
 @app.get("/surveys", tags=["surveys"])
 async def get_surveys(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=1000),
     status: Optional[str] = None,
-    current_user: Optional[dict] = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="Opaque cursor for keyset pagination (empty for the first page)"),
+    include_total: bool = Query(False, description="Include the total count in cursor mode"),
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
 ):
     """
     Get all surveys with pagination and optional status filter
+    
+    Two pagination modes are supported:
+    - skip/limit (default): returns `surveys`, `total`, `skip` and `limit`
+    - cursor: pass `cursor` (empty for the first page) to page in
+      (createdAt, id) order; the response contains `next_cursor`, which is
+      null on the last page. `total` is only computed when `include_total=true`.
     """
     # Filter surveys by status if provided
-    filtered_surveys = surveys_db
-    if status and status != "all":
-        filtered_surveys = [s for s in surveys_db if s.get("status") == status]
+    status_filter = status if status and status != "all" else None
     
-    # Apply pagination
-    paginated_surveys = filtered_surveys[skip:skip + limit]
+    if cursor is not None:
+        # Keyset mode: seek past the cursor, fetch one extra row to detect the last page
+        page = repository.list_after(after=decode_cursor(cursor), limit=limit + 1, status=status_filter)
+        has_more = len(page) > limit
+        page = page[:limit]
+        result = {
+            "surveys": page,
+            "next_cursor": encode_cursor(page[-1]) if has_more else None,
+            "limit": limit
+        }
+        if include_total:
+            result["total"] = repository.count(status=status_filter)
+        return result
+    
+    # Apply pagination using the status index
+    paginated_surveys = repository.list(skip=skip, limit=limit, status=status_filter)
     
     return {
         "surveys": paginated_surveys,
-        "total": len(filtered_surveys),
+        "total": repository.count(status=status_filter),
         "skip": skip,
         "limit": limit
     }
 
+# Registered before /surveys/{survey_id} so "export" is not taken for a survey ID
+@app.get("/surveys/export", tags=["surveys"])
+def export_surveys(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    status: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to include (default: all)"),
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
+):
+    """
+    Stream every survey as NDJSON or CSV
+    
+    Rows are read in keyset pages of `EXPORT_PAGE_SIZE` and written to the
+    response as they are serialized, so memory use doesn't grow with the
+    number of surveys. `status` filters like `GET /surveys`. Surveys come in
+    (createdAt, id) order.
+    """
+    status_filter = status if status and status != "all" else None
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    
+    # A plain generator: Starlette iterates it on a worker thread, off the event loop
+    chunks = export_chunks(
+        iter_surveys(repository, status=status_filter, page_size=EXPORT_PAGE_SIZE),
+        format, selected, page_size=EXPORT_PAGE_SIZE
+    )
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="surveys.{format}"'}
+    )
+
 @app.get("/surveys/{survey_id}", tags=["surveys"])
 async def get_survey(
     survey_id: str,
-    current_user: Optional[dict] = Depends(get_current_user)
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
 ):
     """Get a specific survey by ID"""
-    survey = next((s for s in surveys_db if s["id"] == survey_id), None)
+    survey = repository.get(survey_id)
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
     return survey
@@ -323,11 +1012,21 @@ async def get_survey(
 @app.post("/surveys", tags=["surveys"], status_code=201)
 async def create_survey(
     survey: Survey,
-    current_user: Optional[dict] = Depends(get_current_user)
+    async_provisioning: bool = Query(False, description="Save the survey now and create the Google Form in the background (202 Accepted)"),
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
 ):
     """
     Create a new survey and Google Form
     
+    With `async_provisioning=true` the survey is saved immediately with
+    `form_status: pending` and the endpoint returns 202 Accepted. The form
+    is created by a background worker; poll `GET /surveys/{id}/provisioning`
+    (optionally with `wait`) to follow it. While the Google Forms service is
+    still initializing (see `GET /ready`), every create is handled this way.
+    A synchronous build that fails after the form was created is handed to
+    a provisioning worker the same way (`form_status: pending`).
+    
     Request Body:
     - title: Survey title
     - description: Survey description
@@ -356,33 +1055,47 @@ async def create_survey(
     
     try:
         # Generate survey ID
-        survey_id = f"survey_{len(surveys_db) + 1}_{int(datetime.utcnow().timestamp())}"
+        survey_id = f"survey_{repository.next_sequence()}_{int(datetime.utcnow().timestamp())}"
         
         # Parse questions
-        questions = []
-        if survey.questions:
-            # Check if questions contains binary data (e.g., Excel file content)
-            if survey.questions.startswith('PK\x03\x04') or '\x00' in survey.questions[:100]:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Invalid questions format. Binary files (Excel, Word, etc.) are not supported. Please use plain text, JSON, or CSV format."
-                )
+        questions, questions_text = parse_survey_questions(survey.questions)
+        
+        forms_service = get_forms_service()
+        if not async_provisioning and forms_service_loader.pending:
+            # Don't make the caller wait for OAuth: provision in the background
+            print("ℹ️  Google Forms service is still starting, provisioning the form in the background")
+            async_provisioning = True
+        
+        if async_provisioning:
+            survey_data = new_survey_record(survey_id, survey, current_user.get("email"))
+            repository.add(survey_data)
             
-            try:
-                # Try to parse as JSON first
-                questions = json.loads(survey.questions)
-            except json.JSONDecodeError:
-                # If not JSON, parse as text
-                if forms_service:
-                    questions = forms_service.parse_questions_from_text(survey.questions)
+            job = provisioning.enqueue(survey_id, {
+                "survey_id": survey_id,
+                "title": survey.title,
+                "description": survey.description,
+                "questions": questions if questions else None,
+                "questions_text": questions_text,
+                "owner_email": current_user.get("email")
+            }, max_attempts=PROVISIONING_MAX_ATTEMPTS)
+            
+            return JSONResponse(status_code=202, content={
+                **survey_data,
+                "message": "Survey created, Google Form is being provisioned",
+                "form_created": False,
+                "provisioning": job_summary(job),
+                "provisioning_url": f"/surveys/{survey_id}/provisioning"
+            })
         
         # Create Google Form if service is available
         form_data = None
         form_error = None
+        partial_build = None
         
         if forms_service:
             try:
-                form_data = forms_service.create_form(
+                form_data = await form_executor.run(
+                    forms_service.create_form,
                     title=survey.title,
                     description=survey.description,
                     questions=questions if questions else None,
@@ -392,6 +1105,8 @@ async def create_survey(
             except Exception as e:
                 form_error = str(e)
                 print(f"❌ Error creating Google Form: {e}")
+                if isinstance(e, FormBuildError) and e.state.get("form_id"):
+                    partial_build = e
                 # Continue without form - survey will be created without form_url
         else:
             form_error = "Google Forms service not initialized. To enable: Create credentials-oauth.json in backend directory."
@@ -399,37 +1114,41 @@ async def create_survey(
             print("ℹ️  Survey will be created without Google Form integration.")
         
         # Create survey data
-        survey_data = {
-            "id": survey_id,
-            "title": survey.title,
-            "description": survey.description,
-            "questions": survey.questions,
-            "status": "draft",
-            "createdAt": datetime.utcnow().isoformat(),
-            "approvedAt": None,
-            "responseCount": 0,
-            "approver": None,
-            "form_url": form_data['form_url'] if form_data else None,
-            "form_id": form_data['form_id'] if form_data else None,
-            "edit_url": form_data.get('edit_url') if form_data else None,
-            "creator": current_user.get("email")
-        }
+        if form_data:
+            survey_data = new_survey_record(survey_id, survey, current_user.get("email"), **form_fields(form_data))
+        else:
+            survey_data = new_survey_record(survey_id, survey, current_user.get("email"), form_status="failed")
+        
+        repository.add(survey_data)
         
-        surveys_db.append(survey_data)
+        job = None
+        if partial_build:
+            # The form exists but isn't finished: let a provisioner finish it
+            changes, job = resume_form_build(
+                survey_id, survey.title, survey.description, questions, questions_text,
+                current_user.get("email"), partial_build
+            )
+            repository.update(survey_id, changes)
+            survey_data.update(changes)
         
         response_message = "Survey created successfully"
         if form_data:
             response_message += " with Google Form"
+        elif job:
+            response_message += f" (Google Form creation failed: {form_error}; finishing it in the background)"
         elif form_error:
             response_message += f" (Google Form creation failed: {form_error})"
         else:
             response_message += " (Google Forms integration not available)"
         
-        return {
+        response = {
             **survey_data,
             "message": response_message,
             "form_created": bool(form_data)
         }
+        if job:
+            response.update(provisioning=job_summary(job), provisioning_url=f"/surveys/{survey_id}/provisioning")
+        return response
         
     except HTTPException:
         # Re-raise HTTPException (e.g., 400 errors) without modification
@@ -438,11 +1157,529 @@ async def create_survey(
         print(f"❌ Error creating survey: {e}")
         raise HTTPException(status_code=500, detail=f"Error creating survey: {str(e)}")
 
+@app.post("/surveys/bulk", tags=["surveys"], status_code=201)
+async def create_surveys_bulk(
+    request: Request,
+    async_provisioning: bool = Query(False, description="Save the surveys now and create their Google Forms in the background (202 Accepted)"),
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
+):
+    """
+    Create many surveys (and their Google Forms) in one request
+    
+    The body is a JSON array of surveys (same fields as `POST /surveys`) or,
+    with `Content-Type: application/x-ndjson`, one survey per line. At most
+    `BULK_MAX_SURVEYS` surveys per request.
+    
+    Every item is validated and its questions parsed before anything is
+    created; valid surveys are then saved in one batch with
+    `form_status: pending`. Their forms are built through the bounded form
+    executor, `FORM_CREATION_CONCURRENCY` at a time, with every Google API
+    call waiting for quota. With `async_provisioning=true` (or while the
+    Forms service is initializing) the forms are queued for the background
+    provisioners instead and the endpoint returns 202 Accepted.
+    
+    `results` has one entry per item, in request order: `ok`, and either
+    the survey's `id`, `form_status`, `form_url` and `form_error`, or the
+    validation `error`. Forms created but not finished are resumed in the
+    background (`form_status: pending`, with their `provisioning` job). The response is 207 Multi-Status if any item was
+    rejected.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    items = parse_bulk_items(await request.body(), request.headers.get("content-type", ""))
+    if not items:
+        raise HTTPException(status_code=400, detail="No surveys in request")
+    if len(items) > BULK_MAX_SURVEYS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_SURVEYS} surveys per request")
+    
+    # Stage 1: validate and parse every item before creating anything
+    creator = current_user.get("email")
+    results: List[dict] = []
+    accepted = []  # (result, record, questions, questions_text)
+    for index, item in enumerate(items):
+        try:
+            survey = Survey.model_validate_json(item) if isinstance(item, bytes) else Survey.model_validate(item)
+            questions, questions_text = parse_survey_questions(survey.questions)
+        except ValidationError as e:
+            results.append({"index": index, "ok": False, "error": validation_message(e)})
+            continue
+        except HTTPException as e:
+            results.append({"index": index, "ok": False, "error": e.detail})
+            continue
+        survey_id = f"survey_{repository.next_sequence()}_{int(datetime.utcnow().timestamp())}"
+        record = new_survey_record(survey_id, survey, creator)
+        result = {"index": index, "ok": True, "id": survey_id, "title": survey.title}
+        results.append(result)
+        accepted.append((result, record, questions, questions_text))
+    
+    # Stage 2: save the valid surveys in one batch
+    repository.add_many(record for _, record, _, _ in accepted)
+    
+    forms_service = get_forms_service()
+    if not async_provisioning and forms_service_loader.pending:
+        print("ℹ️  Google Forms service is still starting, provisioning the forms in the background")
+        async_provisioning = True
+    
+    # Stage 3: provision the forms
+    if async_provisioning:
+        for result, record, questions, questions_text in accepted:
+            job = provisioning.enqueue(record["id"], {
+                "survey_id": record["id"],
+                "title": record["title"],
+                "description": record["description"],
+                "questions": questions if questions else None,
+                "questions_text": questions_text,
+                "owner_email": creator
+            }, max_attempts=PROVISIONING_MAX_ATTEMPTS)
+            result.update({"form_status": "pending", "provisioning": job_summary(job)})
+    else:
+        # Never hand the shared executor more than it can run, so single
+        # creates and provisioning jobs are not stuck behind the whole batch
+        slots = asyncio.Semaphore(FORM_CREATION_CONCURRENCY)
+        
+        # Forms built so far, made public and shared together once all are built
+        built = []
+        
+        async def provision(result: dict, record: dict, questions: list, questions_text: Optional[str]):
+            if not forms_service:
+                changes = {"form_status": "failed", "form_error": "Google Forms service not initialized"}
+            else:
+                async with slots:
+                    try:
+                        form_data = await form_executor.run(
+                            forms_service.create_form,
+                            title=record["title"],
+                            description=record["description"],
+                            questions=questions if questions else None,
+                            owner_email=creator,
+                            grant_permissions=False
+                        )
+                        built.append((result, record, form_data))
+                        return
+                    except FormBuildError as e:
+                        print(f"❌ Error creating Google Form for {record['id']}: {e}")
+                        if e.state.get("form_id"):
+                            # Created but not finished: a provisioner resumes it
+                            changes, job = resume_form_build(
+                                record["id"], record["title"], record["description"],
+                                questions, questions_text, creator, e
+                            )
+                            result["provisioning"] = job_summary(job)
+                        else:
+                            changes = {"form_status": "failed", "form_error": str(e)}
+                    except Exception as e:
+                        print(f"❌ Error creating Google Form for {record['id']}: {e}")
+                        changes = {"form_status": "failed", "form_error": str(e) or e.__class__.__name__}
+            save_form(result, record, changes)
+        
+        def save_form(result: dict, record: dict, changes: dict):
+            repository.update(record["id"], changes)
+            result.update({
+                "form_status": changes["form_status"],
+                "form_url": changes.get("form_url"),
+                "form_error": changes.get("form_error")
+            })
+        
+        await asyncio.gather(*(
+            provision(result, record, questions, questions_text)
+            for result, record, questions, questions_text in accepted
+        ))
+        
+        # Grant every built form's permissions in shared Drive batches (up
+        # to 100 calls each) instead of one batch per form; failures are
+        # still reported per form
+        if built:
+            grants = [(form_data["form_id"], creator) for _, _, form_data in built]
+            try:
+                permissions = await form_executor.run(forms_service.grant_form_permissions, grants)
+            except Exception as e:
+                print(f"❌ Error granting form permissions: {e}")
+                error = str(e) or e.__class__.__name__
+                permissions = {
+                    form_id: dict.fromkeys(("public", "owner") if owner_email else ("public",), error)
+                    for form_id, owner_email in grants
+                }
+            for result, record, form_data in built:
+                errors = permissions.get(form_data["form_id"], {})
+                form_data["permission_errors"] = {
+                    "share" if kind == "owner" else kind: error
+                    for kind, error in errors.items() if error
+                }
+                save_form(result, record, form_fields(form_data))
+    
+    failed = len(results) - len(accepted)
+    print(f"✅ Bulk create: {len(accepted)} surveys created, {failed} rejected")
+    return JSONResponse(
+        status_code=207 if failed else 202 if async_provisioning else 201,
+        content={
+            "total": len(results),
+            "created": len(accepted),
+            "failed": failed,
+            "forms_ready": sum(1 for result in results if result.get("form_status") == "ready"),
+            "results": results
+        }
+    )
+
+@app.post("/surveys/import", tags=["surveys"])
+async def import_surveys(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="ndjson or csv (default: from the Content-Type or file name)"),
+    provision: bool = Query(False, description="Queue Google Form creation for imported surveys that have no form_id"),
+    import_id: Optional[str] = Query(None, max_length=100, description="ID to follow the import at GET /surveys/imports/{import_id}"),
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
+):
+    """
+    Import surveys from a streamed NDJSON or CSV upload
+    
+    The body is the file itself (`Content-Type: application/x-ndjson` or
+    `text/csv`) or a `multipart/form-data` upload with the file in the
+    `file` field. NDJSON has one survey object per line; CSV has a header
+    row naming survey fields (the `GET /surveys/export` columns work), and
+    quoted cells may span lines.
+    
+    Rows are parsed as the body arrives and validated and saved
+    `IMPORT_BATCH_SIZE` at a time, so the upload is never held in memory.
+    Rows keep their `id`, `status`, `createdAt` and `creator` if given.
+    A row that fails validation, or whose `id` already exists, is skipped
+    and reported by line number; the rest are imported. With
+    `provision=true`, surveys without a `form_id` get `form_status: pending`
+    and a background provisioning job; an imported `pending` status with no
+    job behind it is cleared.
+    
+    Progress (`bytes_read`, `rows`, `imported`, `failed`) can be followed
+    at `GET /surveys/imports/{import_id}` while the upload runs. The
+    response is the final summary, 207 Multi-Status if any row failed.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    content_type = request.headers.get("content-type", "")
+    files = None
+    if content_type.lower().startswith("multipart/form-data"):
+        try:
+            files = MultipartFileReader(content_type)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        format = format or detect_format(content_type)
+        if not format:
+            raise HTTPException(status_code=400, detail="Unknown import format: use format=ndjson or format=csv")
+    
+    import_id = import_id or secrets.token_hex(8)
+    previous = import_progress.get(import_id)
+    if previous and previous["state"] == "running":
+        raise HTTPException(status_code=409, detail=f"Import {import_id} is already running")
+    progress = {
+        "import_id": import_id,
+        "state": "running",
+        "format": format,
+        "bytes_read": 0,
+        "rows": 0,
+        "imported": 0,
+        "failed": 0,
+        "forms_queued": 0,
+        "errors": [],
+        "started_at": datetime.utcnow().isoformat(),
+        "finished_at": None
+    }
+    import_progress.set(import_id, progress)
+    
+    creator = current_user.get("email")
+    batch = []  # (line, record, questions, questions_text, queue_form)
+    
+    def reject(line: int, error: str):
+        progress["failed"] += 1
+        if len(progress["errors"]) < IMPORT_MAX_ERRORS:
+            progress["errors"].append({"line": line, "error": error})
+    
+    def save_batch():
+        # IDs already stored, or repeated in this batch, are row errors
+        existing = set(repository.get_many(record["id"] for _, record, _, _, _ in batch))
+        accepted = []
+        for line, record, questions, questions_text, queue_form in batch:
+            if record["id"] in existing:
+                reject(line, f"Survey already exists: {record['id']}")
+                continue
+            existing.add(record["id"])
+            accepted.append((record, questions, questions_text, queue_form))
+        batch.clear()
+        repository.add_many(record for record, _, _, _ in accepted)
+        progress["imported"] += len(accepted)
+        # The batch's form builds go into the queue in one transaction
+        jobs = provisioning.enqueue_many([
+            (record["id"], {
+                "survey_id": record["id"],
+                "title": record["title"],
+                "description": record["description"],
+                "questions": questions if questions else None,
+                "questions_text": questions_text,
+                "owner_email": record["creator"]
+            })
+            for record, questions, questions_text, queue_form in accepted if queue_form
+        ], max_attempts=PROVISIONING_MAX_ATTEMPTS)
+        progress["forms_queued"] += len(jobs)
+    
+    async def save_full_batch():
+        # The database writes block, so they run on a worker thread rather
+        # than holding up the event loop (and every other request)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await asyncio.to_thread(save_batch)
+    
+    def add_row(line: int, row):
+        progress["rows"] += 1
+        if isinstance(row, str):
+            reject(line, row)
+            return
+        try:
+            survey = Survey.model_validate(row)
+            questions, questions_text = parse_survey_questions(survey.questions)
+        except ValidationError as e:
+            reject(line, validation_message(e))
+            return
+        except HTTPException as e:
+            reject(line, e.detail)
+            return
+        if survey.status not in VALID_STATUS_TRANSITIONS:
+            reject(line, f"Invalid status: {survey.status}")
+            return
+        record = {
+            **survey.model_dump(),
+            "id": survey.id or f"survey_{repository.next_sequence()}_{int(datetime.utcnow().timestamp())}",
+            "createdAt": survey.createdAt or datetime.utcnow().isoformat(),
+            "creator": survey.creator or creator,
+            "edit_url": None
+        }
+        # Decided here, not from the row: an imported "pending" has no job behind it
+        queue_form = provision and not survey.form_id
+        if queue_form:
+            record["form_status"] = "pending"
+        elif record["form_status"] == "pending":
+            record["form_status"] = None
+        batch.append((line, record, questions, questions_text, queue_form))
+    
+    parser = ImportParser(format, max_row_length=IMPORT_MAX_ROW_LENGTH) if format else None
+    try:
+        async for chunk in request.stream():
+            progress["bytes_read"] += len(chunk)
+            if files:
+                chunk = files.feed(chunk)
+                if not chunk:
+                    continue
+                if parser is None:
+                    # Multipart: the file part's name or type decides the format
+                    format = detect_format(files.content_type, files.filename)
+                    if not format:
+                        raise HTTPException(status_code=400, detail="Unknown import format: use format=ndjson or format=csv")
+                    progress["format"] = format
+                    parser = ImportParser(format, max_row_length=IMPORT_MAX_ROW_LENGTH)
+            for line, row in parser.feed(chunk):
+                add_row(line, row)
+                await save_full_batch()
+        if files:
+            files.close()
+            if not files.found:
+                raise HTTPException(status_code=400, detail="No file field in multipart upload")
+        if parser:
+            for line, row in parser.close():
+                add_row(line, row)
+                await save_full_batch()
+        await asyncio.to_thread(save_batch)
+    except Exception as e:
+        progress.update({
+            "state": "failed",
+            "error": e.detail if isinstance(e, HTTPException) else str(e) or e.__class__.__name__,
+            "finished_at": datetime.utcnow().isoformat()
+        })
+        if isinstance(e, HTTPException):
+            raise
+        print(f"❌ Import {import_id} failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Import failed after {progress['imported']} surveys: {e}")
+    
+    progress.update({"state": "done", "finished_at": datetime.utcnow().isoformat()})
+    print(f"✅ Import {import_id}: {progress['imported']} surveys imported, {progress['failed']} rows rejected")
+    return JSONResponse(
+        status_code=207 if progress["failed"] else 200,
+        content={**progress, "errors_truncated": progress["failed"] > len(progress["errors"])}
+    )
+
+@app.get("/surveys/imports/{import_id}", tags=["surveys"])
+async def get_import_progress(
+    import_id: str,
+    current_user: Optional[dict] = Depends(get_current_user)
+):
+    """
+    Progress of a recent `POST /surveys/import` (kept for a day)
+    
+    `state` is running, done or failed; `rows`, `imported` and `failed`
+    count rows so far and `errors` lists the rejected rows' line numbers.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    progress = import_progress.get(import_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return {**progress, "errors_truncated": progress["failed"] > len(progress["errors"])}
+
+@app.get("/surveys/{survey_id}/provisioning", tags=["surveys"])
+async def get_provisioning_status(
+    survey_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait for a pending form to finish"),
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
+):
+    """
+    Get the Google Form provisioning status of a survey
+    
+    With `wait > 0` the request long-polls until the form is no longer
+    pending or the wait expires.
+    """
+    survey = repository.get(survey_id)
+    if not survey:
+        raise HTTPException(status_code=404, detail="Survey not found")
+    
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while survey.get("form_status") == "pending" and loop.time() < deadline:
+        await asyncio.sleep(min(0.1, max(deadline - loop.time(), 0)))
+        survey = repository.get(survey_id)
+        if not survey:
+            raise HTTPException(status_code=404, detail="Survey not found")
+    
+    return {
+        "survey_id": survey_id,
+        "form_status": survey.get("form_status"),
+        "form_url": survey.get("form_url"),
+        "form_id": survey.get("form_id"),
+        "edit_url": survey.get("edit_url"),
+        "form_error": survey.get("form_error"),
+        "job": job_summary(provisioning.queue.latest_for_key(survey_id))
+    }
+
+@app.get("/surveys/{survey_id}/email", tags=["surveys"])
+async def get_email_status(
+    survey_id: str,
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
+):
+    """
+    Get the delivery status of a survey's approval email
+    
+    `recipients` maps every address to `sent`, `refused: <SMTP reply>` or
+    `pending`.
+    """
+    survey = repository.get(survey_id)
+    if not survey:
+        raise HTTPException(status_code=404, detail="Survey not found")
+    
+    job = email_outbox.queue.latest_for_key(survey_id)
+    recipients = {}
+    if job:
+        payload = job["payload"]
+        statuses = (job["result"] or {}).get("recipients") or payload.get("recipient_status") or {}
+        for recipient in payload.get("recipients") or [payload.get("recipient_email")]:
+            recipients[recipient] = statuses.get(recipient, "pending")
+    
+    return {
+        "survey_id": survey_id,
+        "email_status": survey.get("email_status"),
+        "email_error": survey.get("email_error"),
+        "email_sent_at": survey.get("email_sent_at"),
+        "email_summary": survey.get("email_summary"),
+        "recipients": recipients,
+        "job": job_summary(job)
+    }
+
+# Registered before /surveys/{survey_id} so "bulk" is not taken for a survey ID
+@app.patch("/surveys/bulk", tags=["surveys"])
+async def update_surveys_bulk(
+    bulk: BulkUpdateRequest,
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
+):
+    """
+    Apply the same partial update to many surveys
+    
+    Select surveys with `ids`, or with `filter` (`status` and/or `creator`),
+    up to `BULK_MAX_UPDATES`. If `changes` sets `status`, every transition
+    is checked against the same rules as `PATCH /surveys/{id}`. Then all
+    updates are applied in one operation. If any survey is missing or can't
+    make the transition, nothing is changed and the response is 409.
+    With `skip_invalid: true`, the valid updates are applied and the others
+    are reported.
+    
+    `results` has one entry per ID: `ok` with the new `status`, or `error`.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    error = key_field_error(bulk.changes)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    survey_ids, surveys = select_surveys(bulk, repository)
+    new_status = bulk.changes.get("status")
+    
+    # One validation pass over the whole selection
+    results = []
+    changes = {}
+    for survey_id in survey_ids:
+        survey = surveys.get(survey_id)
+        error = "Survey not found" if survey is None else (
+            transition_error(survey.get("status", "draft"), new_status) if "status" in bulk.changes else None
+        )
+        if error:
+            results.append({"id": survey_id, "ok": False, "error": error})
+        else:
+            results.append({"id": survey_id, "ok": True, "status": new_status or survey.get("status")})
+            changes[survey_id] = bulk.changes
+    
+    failed = len(results) - len(changes)
+    if failed and not bulk.skip_invalid:
+        for result in results:
+            result.pop("status", None)
+        return JSONResponse(status_code=409, content={
+            "matched": len(survey_ids), "updated": 0, "failed": failed, "applied": False, "results": results
+        })
+    
+    try:
+        repository.update_many(changes)
+    except KeyError as e:
+        # Deleted between validation and the update; nothing was applied
+        raise HTTPException(status_code=409, detail=f"{e.args[0]}, nothing was updated")
+    return {"matched": len(survey_ids), "updated": len(changes), "failed": failed, "applied": True, "results": results}
+
+@app.post("/surveys/bulk-delete", tags=["surveys"])
+async def delete_surveys_bulk(
+    selection: BulkSelection,
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
+):
+    """
+    Delete many surveys in one operation
+    
+    Select surveys with `ids`, or with `filter` (`status` and/or `creator`),
+    up to `BULK_MAX_UPDATES`. `results` has one entry per ID: `ok`, or
+    `error` for IDs that don't exist.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    survey_ids, surveys = select_surveys(selection, repository)
+    deleted = set(repository.delete_many([survey_id for survey_id in survey_ids if survey_id in surveys]))
+    results = [
+        {"id": survey_id, "ok": True} if survey_id in deleted else {"id": survey_id, "ok": False, "error": "Survey not found"}
+        for survey_id in survey_ids
+    ]
+    return {"matched": len(survey_ids), "deleted": len(deleted), "failed": len(survey_ids) - len(deleted), "results": results}
+
 @app.patch("/surveys/{survey_id}", tags=["surveys"])
 async def update_survey(
     survey_id: str,
     survey_update: dict,
-    current_user: Optional[dict] = Depends(get_current_user)
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
 ):
     """
     Update a survey
@@ -457,91 +1694,86 @@ async def update_survey(
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    survey = next((s for s in surveys_db if s["id"] == survey_id), None)
+    survey = repository.get(survey_id)
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
     
+    error = key_field_error(survey_update)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    
     # Validate status transitions if status is being updated
     if "status" in survey_update:
-        new_status = survey_update["status"]
-        current_status = survey.get("status", "draft")
-        
-        # Define valid transitions
-        valid_transitions = {
-            "draft": ["pending-approval", "approved", "archived"],
-            "pending-approval": ["draft", "approved", "archived"],
-            "approved": ["archived"],
-            "archived": []
-        }
-        
-        if current_status not in valid_transitions:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid current status: {current_status}"
-            )
-        
-        if new_status not in valid_transitions[current_status]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid status transition from '{current_status}' to '{new_status}'. Allowed: {valid_transitions[current_status]}"
-            )
+        error = transition_error(survey.get("status", "draft"), survey_update["status"])
+        if error:
+            raise HTTPException(status_code=400, detail=error)
     
-    # Update survey fields
-    for key, value in survey_update.items():
-        if key != "id":  # Don't allow ID changes
-            survey[key] = value
-    
-    return survey
+    # Update survey fields (ID changes are ignored by the store)
+    return repository.update(survey_id, survey_update)
 
 @app.delete("/surveys/{survey_id}", tags=["surveys"])
 async def delete_survey(
     survey_id: str,
-    current_user: Optional[dict] = Depends(get_current_user)
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
 ):
     """Delete a survey"""
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    survey = next((s for s in surveys_db if s["id"] == survey_id), None)
+    survey = repository.get(survey_id)
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
     
-    surveys_db.remove(survey)
+    repository.delete(survey_id)
     return {"message": "Survey deleted successfully"}
 
 @app.post("/surveys/{survey_id}/approve", tags=["surveys"])
 async def approve_survey(
     survey_id: str,
     approval: ApprovalRequest,
-    current_user: Optional[dict] = Depends(get_current_user)
+    current_user: Optional[dict] = Depends(get_current_user),
+    repository: Repository = Depends(get_repository)
 ):
     """
     Approve a survey and send notification email
     
     Request Body:
     - recipient_email: Email address to send the form link to
+    - recipients: More email addresses
+    - distribution_lists: Names of distribution lists to send to
     - custom_message: Optional custom message to include in the email
     
+    At least one recipient is required; duplicates are sent to once. The
+    email is rendered once and sent to everyone over a single SMTP
+    session; see `GET /surveys/{id}/email` for per-recipient status.
+    
     Behavior:
     1. Mark survey as approved
     2. Record approver and approval timestamp
-    3. Send email with form URL to recipient
+    3. Queue the email with the form URL in the outbox; it is sent in
+       the background with retries and the survey's `email_status`
+       moves from `queued` to `sent` (or `retrying` / `failed`)
     
     Status Validation:
     - Survey must be in 'draft' or 'pending-approval' status
-    - Already approved surveys cannot be re-approved
+    - Already approved surveys cannot be re-approved, unless their email
+      never made it to the outbox
+    
+    If the email can't be queued, the approval is undone and the response
+    is 503.
     """
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
     # Find the survey
-    survey = next((s for s in surveys_db if s["id"] == survey_id), None)
+    survey = repository.get(survey_id)
     if not survey:
         raise HTTPException(status_code=404, detail="Survey not found")
     
     # Validate status transition
     current_status = survey.get("status", "draft")
-    if current_status == "approved":
+    if current_status == "approved" and not approval_email_lost(survey):
         raise HTTPException(
             status_code=400, 
             detail="Survey is already approved. Cannot approve again."
@@ -552,6 +1784,15 @@ async def approve_survey(
             detail="Cannot approve an archived survey."
         )
     
+    recipients = resolve_recipients(approval)
+    
+    # Forms created in the background must finish first
+    if survey.get("form_status") == "pending":
+        raise HTTPException(
+            status_code=400,
+            detail="Survey Google Form is still being provisioned. Cannot approve yet."
+        )
+    
     # Check if form URL exists
     if not survey.get("form_url"):
         raise HTTPException(
@@ -559,30 +1800,45 @@ async def approve_survey(
             detail="Survey does not have a Google Form URL. Cannot approve."
         )
     
-    # Update survey status
-    survey["status"] = "approved"
-    survey["approvedAt"] = datetime.utcnow().isoformat()
-    survey["approver"] = current_user.get("email")
+    # Update survey status; the email goes out in the background
+    approval_fields = {
+        "status": "approved",
+        "approvedAt": datetime.utcnow().isoformat(),
+        "approver": current_user.get("email"),
+        "email_status": "queued",
+        "email_error": None,
+        "email_sent_at": None,
+        "email_summary": email_summary(recipients, {})
+    }
+    previous = {field: survey.get(field) for field in approval_fields}
+    survey = repository.update(survey_id, approval_fields)
     
-    # Send approval email
-    email_sent = False
+    # Queue the approval email in the outbox. It lives in another database,
+    # so if it can't be written the approval is undone rather than left
+    # queued with no email to send
     try:
-        email_sent = await email_service.send_approval_email(
-            recipient_email=approval.recipient_email,
-            survey_title=survey["title"],
-            form_url=survey["form_url"],
-            approver_name=current_user.get("name", current_user.get("email")),
-            custom_message=approval.custom_message
-        )
+        email_outbox.enqueue(survey_id, {
+            "survey_id": survey_id,
+            "recipients": recipients,
+            "survey_title": survey["title"],
+            "form_url": survey["form_url"],
+            "approver_name": current_user.get("name", current_user.get("email")),
+            "custom_message": approval.custom_message
+        }, max_attempts=EMAIL_MAX_ATTEMPTS)
     except Exception as e:
-        print(f"⚠️ Error sending email: {e}")
-        # Continue even if email fails
+        print(f"❌ Could not queue the approval email for {survey_id}: {e}")
+        repository.update(survey_id, previous)
+        raise HTTPException(
+            status_code=503,
+            detail="Could not queue the approval email. The survey was not approved, try again."
+        )
     
     return {
         **survey,
         "message": "Survey approved successfully",
-        "email_sent": email_sent,
-        "email_recipient": approval.recipient_email
+        "email_sent": False,
+        "email_recipient": recipients[0],
+        "email_recipients": recipients
     }
 
 # --- RUN THE SERVER ---
@@ -0,0 +1,114 @@
+"""
+Benchmark: approve latency vs. mail server latency
+
+Approves APPROVALS surveys through POST /surveys/{id}/approve while the
+approval email goes to a local STARTTLS + AUTH aiosmtpd sink
+(benchmarks/smtp_sink.py) that adds LATENCY seconds to every SMTP command:
+
+- inline: the SMTP send awaited inside the request (what approve used to
+          do), measured as approve-with-outbox time plus the send
+- outbox: the endpoint as it is now - the email is queued and sent by
+          the background senders
+
+Reports median and p95 request latency, and how long the outbox took to
+deliver every email. Requires aiosmtpd.
+
+Usage:
+    python benchmarks/bench_approve_latency.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smtp_sink import PASSWORD, USERNAME, SmtpSink
+
+os.environ["PROVISIONING_QUEUE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/jobs.db"
+with contextlib.redirect_stdout(io.StringIO()):  # Silence the app's startup logging
+    import app as app_module
+    from email_service import EmailService
+from fastapi.testclient import TestClient
+
+APPROVALS = 50
+LATENCIES = [0.0, 0.02, 0.1]
+
+
+def add_survey(idx: int) -> str:
+    survey_id = f"bench_{time.time_ns()}_{idx}"
+    app_module.repository.add({
+        "id": survey_id,
+        "title": f"Survey {idx}",
+        "description": "Benchmark",
+        "status": "draft",
+        "createdAt": f"2024-01-01T00:00:{idx:02d}",
+        "form_url": "https://docs.google.com/forms/d/abc/viewform",
+        "form_status": "ready",
+    })
+    return survey_id
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(latency: float) -> dict:
+    with SmtpSink(latency=latency) as sink, contextlib.redirect_stdout(io.StringIO()):
+        service = EmailService(smtp_host="127.0.0.1", smtp_port=sink.port, smtp_user=USERNAME, smtp_password=PASSWORD)
+        service.pool.smtp_options["validate_certs"] = False
+        app_module.email_service = service
+        client = TestClient(app_module.app)
+
+        # What the endpoint used to await before answering
+        send_times = []
+        for idx in range(5):
+            start = time.perf_counter()
+            asyncio.run(service.send_approval_email(f"user{idx}@example.com", "Survey", "https://x", "Bench"))
+            send_times.append(time.perf_counter() - start)
+
+        request_times = []
+        survey_ids = [add_survey(idx) for idx in range(APPROVALS)]
+        first = time.perf_counter()
+        for survey_id in survey_ids:
+            start = time.perf_counter()
+            client.post(f"/surveys/{survey_id}/approve", json={"recipient_email": "team@example.com"})
+            request_times.append(time.perf_counter() - start)
+        while sink.messages < 5 + APPROVALS:
+            time.sleep(0.005)
+        delivered = time.perf_counter() - first
+        app_module.email_outbox.stop()
+        app_module.email_loop.run(service.close())
+
+    inline = [request + statistics.median(send_times) for request in request_times]
+    return {
+        "inline_p50": statistics.median(inline),
+        "inline_p95": percentile(inline, 0.95),
+        "outbox_p50": statistics.median(request_times),
+        "outbox_p95": percentile(request_times, 0.95),
+        "delivered": delivered,
+    }
+
+
+if __name__ == "__main__":
+    app_module.app.dependency_overrides[app_module.get_current_user] = lambda: {
+        "email": "bench@example.com", "name": "Bench"
+    }
+    print("=" * 78)
+    print(f"APPROVE LATENCY BENCHMARK ({APPROVALS} approvals, STARTTLS + AUTH sink)")
+    print("=" * 78)
+    print(f"{'SMTP latency':>12} | {'inline p50/p95 ms':>17} | {'outbox p50/p95 ms':>17} | {'all emails sent in':>18}")
+    print("-" * 78)
+    for latency in LATENCIES:
+        result = run(latency)
+        print(
+            f"{latency * 1000:>10.0f}ms | {result['inline_p50'] * 1000:>7.1f} / {result['inline_p95'] * 1000:>7.1f} | "
+            f"{result['outbox_p50'] * 1000:>7.1f} / {result['outbox_p95'] * 1000:>7.1f} | "
+            f"{result['delivered']:>17.2f}s"
+        )
@@ -0,0 +1,97 @@
+"""
+Benchmark: creating SURVEYS surveys one request at a time vs. POST /surveys/bulk
+
+Builds every form with the real GoogleFormsService.create_form against
+the local fake Google API (benchmarks/fake_google_api.py, LATENCY seconds
+per request), with FORM_CREATION_CONCURRENCY set to CONCURRENCY:
+
+- one by one: SURVEYS sequential POST /surveys calls (how a client
+              onboards today)
+- bulk:       a single POST /surveys/bulk with every survey
+
+Quota is enforced by the service's QuotaScheduler, with limits high
+enough that the API round trips are the bottleneck.
+
+Usage:
+    python benchmarks/bench_bulk_create.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_google_api import FakeGoogleApi
+
+with contextlib.redirect_stdout(io.StringIO()):  # Silence the app's startup logging
+    import app as app_module
+from bench_client_pool import make_service
+from fastapi.testclient import TestClient
+from form_executor import FormCreationExecutor
+from lazy_service import LazyService
+from repository import InMemoryRepository
+
+SURVEYS = 1000
+CONCURRENCY = 8
+LATENCY = 0.005
+QUESTIONS = "\n".join([
+    "1. What is your name? [TEXT]",
+    "2. How did you hear about us? [MULTIPLE_CHOICE]",
+    "- Search",
+    "- Friend",
+    "- Advertisement",
+    "3. Anything else? [PARAGRAPH]",
+])
+
+
+def surveys(mode: str) -> list:
+    return [
+        {"title": f"{mode} survey {idx}", "description": "Client onboarding", "questions": QUESTIONS}
+        for idx in range(SURVEYS)
+    ]
+
+
+def run(mode: str) -> dict:
+    with FakeGoogleApi(latency=LATENCY) as api:
+        service = make_service(api, CONCURRENCY)
+        app_module.repository = InMemoryRepository()
+        app_module.forms_service_loader = LazyService.preloaded(service, name="google-forms")
+        app_module.form_executor = FormCreationExecutor(max_concurrency=CONCURRENCY)
+        app_module.FORM_CREATION_CONCURRENCY = CONCURRENCY
+        client = TestClient(app_module.app)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if mode == "one by one":
+                ready = sum(
+                    client.post("/surveys", json=survey).json()["form_status"] == "ready"
+                    for survey in surveys(mode)
+                )
+            else:
+                ready = client.post("/surveys/bulk", json=surveys(mode)).json()["forms_ready"]
+        elapsed = time.perf_counter() - start
+        app_module.form_executor.shutdown()
+        service.pool.close()
+        return {"surveys_per_second": SURVEYS / elapsed, "seconds": elapsed, "ready": ready, "requests": api.requests}
+
+
+if __name__ == "__main__":
+    app_module.app.dependency_overrides[app_module.get_current_user] = lambda: {
+        "email": "bench@example.com", "name": "Bench"
+    }
+    print("=" * 76)
+    print(f"BULK CREATE BENCHMARK ({SURVEYS} surveys, {LATENCY * 1000:.0f} ms per API request, concurrency {CONCURRENCY})")
+    print("=" * 76)
+    print(f"{'mode':>10} | {'surveys/s':>9} | {'total s':>7} | {'speedup':>7} | {'forms ready':>11} | {'API requests':>12}")
+    print("-" * 76)
+    baseline = None
+    for mode in ("one by one", "bulk"):
+        result = run(mode)
+        baseline = baseline or result["surveys_per_second"]
+        print(
+            f"{mode:>10} | {result['surveys_per_second']:>9.1f} | {result['seconds']:>7.2f} | "
+            f"{result['surveys_per_second'] / baseline:>6.1f}x | {result['ready']:>11} | {result['requests']:>12}"
+        )
@@ -0,0 +1,104 @@
+"""
+Benchmark: archiving and deleting SURVEYS surveys in stores of growing size
+
+For each storage backend and store size, seeds the store (SURVEYS of its
+surveys belong to the benchmark user) and measures:
+
+- one by one: PATCH /surveys/{id} per survey (timed over the first
+              SINGLE_SAMPLE surveys, reported as updates per second)
+- bulk patch: one PATCH /surveys/bulk archiving the SURVEYS surveys by ID
+- bulk delete: one POST /surveys/bulk-delete of them by creator filter
+
+Bulk times should stay about the same as the store grows.
+
+Usage:
+    python benchmarks/bench_bulk_update.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):  # Silence the app's startup logging
+    import app as app_module
+from fastapi.testclient import TestClient
+from repository import InMemoryRepository, SqliteRepository
+
+SURVEYS = 10000
+STORE_SIZES = [10000, 200000, 1000000]
+SINGLE_SAMPLE = 1000
+
+
+def seed(repository, store_size: int, creator: str) -> list:
+    """Seed store_size surveys, every (store_size // SURVEYS)th one by creator"""
+    stride = store_size // SURVEYS
+    survey_ids = []
+    for start in range(0, store_size, 50000):
+        batch = []
+        for idx in range(start, min(start + 50000, store_size)):
+            mine = idx % stride == 0 and len(survey_ids) < SURVEYS
+            batch.append({
+                "id": f"survey_{idx}", "title": f"Survey {idx}", "description": "Q3", "status": "draft",
+                "creator": creator if mine else f"user{idx % 1000}@example.com",
+                "createdAt": f"2024-07-01T00:00:00.{idx:07d}",
+            })
+            if mine:
+                survey_ids.append(batch[-1]["id"])
+        repository.add_many(batch)
+    return survey_ids
+
+
+def run(backend: str, store_size: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        repository = (
+            SqliteRepository(f"sqlite:///{directory}/surveys.db") if backend == "sqlite" else InMemoryRepository()
+        )
+        app_module.repository = repository
+        client = TestClient(app_module.app)
+        survey_ids = seed(repository, store_size, "bench@example.com")
+
+        start = time.perf_counter()
+        for survey_id in survey_ids[:SINGLE_SAMPLE]:
+            client.patch(f"/surveys/{survey_id}", json={"status": "pending-approval"})
+        single = SINGLE_SAMPLE / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        patched = client.patch("/surveys/bulk", json={"ids": survey_ids, "changes": {"status": "archived"}}).json()
+        bulk_patch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        deleted = client.post("/surveys/bulk-delete", json={"filter": {"creator": "bench@example.com"}}).json()
+        bulk_delete = time.perf_counter() - start
+
+        assert patched["updated"] == SURVEYS and deleted["deleted"] == SURVEYS
+        repository.close()
+        return {"single": single, "bulk_patch": bulk_patch, "bulk_delete": bulk_delete}
+
+
+if __name__ == "__main__":
+    app_module.app.dependency_overrides[app_module.get_current_user] = lambda: {
+        "email": "bench@example.com", "name": "Bench"
+    }
+    print("=" * 96)
+    print(f"BULK UPDATE BENCHMARK ({SURVEYS} surveys changed)")
+    print("=" * 96)
+    print(
+        f"{'backend':>7} | {'store size':>10} | {'one by one/s':>12} | {f'{SURVEYS} one by one':>16} | "
+        f"{'bulk patch':>10} | {'bulk delete':>11} | {'speedup':>7}"
+    )
+    print("-" * 96)
+    for backend in ("memory", "sqlite"):
+        for store_size in STORE_SIZES:
+            result = run(backend, store_size)
+            estimated = SURVEYS / result["single"]
+            print(
+                f"{backend:>7} | {store_size:>10} | {result['single']:>12.0f} | {estimated:>14.2f}s* | "
+                f"{result['bulk_patch']:>9.3f}s | {result['bulk_delete']:>10.3f}s | "
+                f"{estimated / result['bulk_patch']:>6.0f}x"
+            )
+    print(f"* estimated from {SINGLE_SAMPLE} single PATCH requests")
@@ -0,0 +1,85 @@
+"""
+Benchmark: form creations per second vs. client pool size
+
+Builds FORMS forms with GoogleFormsService.create_form against the local
+fake Google API (benchmarks/fake_google_api.py, LATENCY seconds per
+request), running `pool size` builds in parallel with one checked-out
+client pair per thread. Also reports how many TCP connections the fake
+server saw: with keep-alive that stays at one per client pair.
+
+Usage:
+    python benchmarks/bench_client_pool.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client_pool import GoogleClientPool
+from fake_google_api import FakeGoogleApi
+from form_executor import FormCreationExecutor
+from google_forms_service import GoogleFormsService
+from quota_scheduler import QuotaScheduler
+from retry_policy import RetryPolicy
+
+LATENCY = 0.05
+FORMS = 48
+POOL_SIZES = [1, 2, 4, 8]
+QUESTIONS = [{"title": f"Question {idx}", "type": "TEXT"} for idx in range(5)]
+
+
+def make_service(api: FakeGoogleApi, pool_size: int) -> GoogleFormsService:
+    service = GoogleFormsService.__new__(GoogleFormsService)
+    service.use_oauth = True
+    service.quota = QuotaScheduler({key: 10 ** 6 for key in [
+        ("forms", "read"), ("forms", "write"), ("drive", "read"), ("drive", "write")
+    ]})
+    service.retry = RetryPolicy(max_attempts=1)
+    service.forms_service = None
+    service.drive_service = None
+    service._local = threading.local()
+    service.pool = GoogleClientPool(size=pool_size, factory=api.build_clients)
+    return service
+
+
+def run(pool_size: int) -> dict:
+    with FakeGoogleApi(latency=LATENCY) as api:
+        service = make_service(api, pool_size)
+        executor = FormCreationExecutor(max_concurrency=pool_size)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence the service's logging
+            futures = [
+                executor.submit(service.create_form, f"Form {idx}", "Description", QUESTIONS, "owner@example.com")
+                for idx in range(FORMS)
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        executor.shutdown()
+        service.pool.close()
+        return {
+            "forms_per_second": len(results) / elapsed,
+            "requests": api.requests,
+            "connections": api.connections,
+            "clients": service.pool.stats()["created"],
+        }
+
+
+if __name__ == "__main__":
+    print("=" * 72)
+    print(f"CLIENT POOL BENCHMARK ({FORMS} forms, {LATENCY * 1000:.0f} ms per request, local fake API)")
+    print("=" * 72)
+    print(f"{'pool size':>9} | {'forms/s':>8} | {'speedup':>7} | {'requests':>8} | {'TCP connections':>15}")
+    print("-" * 72)
+    baseline = None
+    for size in POOL_SIZES:
+        result = run(size)
+        baseline = baseline or result["forms_per_second"]
+        print(
+            f"{size:>9} | {result['forms_per_second']:>8.2f} | {result['forms_per_second'] / baseline:>6.1f}x | "
+            f"{result['requests']:>8} | {result['connections']:>15}"
+        )
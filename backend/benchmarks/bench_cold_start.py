@@ -0,0 +1,81 @@
+"""
+Benchmark: cold start with a slow Google Forms service initialization
+
+Simulates an OAuth token refresh / consent flow by making
+GoogleFormsService initialization take INIT_DELAY seconds, then measures
+in a fresh process:
+
+- eager: importing the app and building the service before serving
+         (what importing app.py used to do)
+- lazy:  importing the app and answering the first GET /ready, with the
+         service built in the background by forms_service_loader
+
+Third-party library imports are timed separately; they are the same in
+both modes.
+
+Runs offline; each measurement uses its own interpreter.
+
+Usage:
+    python benchmarks/bench_cold_start.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INIT_DELAY = 2.0
+RUNS = 3
+
+CHILD = """
+import contextlib, io, json, sys, time
+libraries_start = time.perf_counter()
+sys.path.insert(0, {backend!r})
+# Third-party imports cost the same either way; time them separately
+import fastapi, fastapi.testclient, sqlalchemy, jwt, uvicorn
+import googleapiclient.discovery, google_auth_oauthlib.flow, google.oauth2.id_token
+import google_forms_service
+google_forms_service.GoogleFormsService._initialize_services = lambda self: time.sleep({delay!r})
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import app as app_module
+    imported = time.perf_counter()
+    if {mode!r} == "eager":
+        app_module.create_forms_service()
+        status = 200
+    else:
+        status = fastapi.testclient.TestClient(app_module.app).get("/ready").status_code
+served = time.perf_counter()
+print(json.dumps({{
+    "libraries": start - libraries_start,
+    "import": imported - start,
+    "first_response": served - start,
+    "status": status
+}}))
+"""
+
+
+def measure(mode: str) -> dict:
+    code = CHILD.format(backend=BACKEND_DIR, delay=INIT_DELAY, mode=mode)
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=BACKEND_DIR
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print(f"COLD START BENCHMARK (Forms service init takes {INIT_DELAY:.1f}s, median of {RUNS})")
+    print("=" * 70)
+    print(f"{'mode':>6} | {'libraries ms':>12} | {'import app ms':>13} | {'ready to serve ms':>17} | {'status':>6}")
+    print("-" * 70)
+    for mode in ("eager", "lazy"):
+        results = sorted((measure(mode) for _ in range(RUNS)), key=lambda r: r["first_response"])
+        result = results[len(results) // 2]
+        print(
+            f"{mode:>6} | {result['libraries'] * 1000:>12.1f} | {result['import'] * 1000:>13.1f} | "
+            f"{result['first_response'] * 1000:>17.1f} | {result['status']:>6}"
+        )
+    print("\nlazy answers 503 on /ready until the service is up; API requests are served meanwhile.")
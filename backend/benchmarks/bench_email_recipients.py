@@ -0,0 +1,107 @@
+"""
+Benchmark: approval email to a recipient list
+
+Sends one survey's approval email to N recipients on a local STARTTLS +
+AUTH aiosmtpd sink (benchmarks/smtp_sink.py, LATENCY seconds per SMTP
+command):
+
+- new sessions:  one MIME build and one aiosmtplib.send() (connect,
+                 STARTTLS, AUTH) per address, 4 at a time - N approve
+                 calls as they used to be (only up to SESSION_LIMIT
+                 recipients; it is slow)
+- per recipient: one MIME build and one message per address, over the
+                 pooled connections
+- list:          EmailService.deliver_approval_emails - one MIME build,
+                 one SMTP session, SMTP_MAX_RECIPIENTS RCPT TOs per message
+
+Requires aiosmtpd.
+
+Usage:
+    python benchmarks/bench_email_recipients.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosmtplib
+
+from email_service import EmailService
+from smtp_sink import PASSWORD, USERNAME, SmtpSink
+
+LIST_SIZES = [100, 1000, 3000]
+LATENCY = 0.002
+SESSION_LIMIT = 1000
+
+
+def make_service(port: int) -> EmailService:
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = EmailService(smtp_host="127.0.0.1", smtp_port=port, smtp_user=USERNAME, smtp_password=PASSWORD)
+    service.pool.smtp_options["validate_certs"] = False
+    return service
+
+
+async def new_sessions(service: EmailService, recipients):
+    semaphore = asyncio.Semaphore(4)
+
+    async def send(recipient):
+        message = service._create_approval_message(
+            recipient, "Survey", "https://docs.google.com/forms/d/abc/viewform", "Approver"
+        )
+        async with semaphore:
+            await aiosmtplib.send(
+                message, hostname=service.smtp_host, port=service.smtp_port, username=USERNAME,
+                password=PASSWORD, start_tls=True, validate_certs=False,
+            )
+    await asyncio.gather(*(send(recipient) for recipient in recipients))
+
+
+async def per_recipient(service: EmailService, recipients):
+    await asyncio.gather(*(
+        service.deliver_approval_email(recipient, "Survey", "https://docs.google.com/forms/d/abc/viewform", "Approver")
+        for recipient in recipients
+    ))
+
+
+async def as_list(service: EmailService, recipients):
+    await service.deliver_approval_emails(recipients, "Survey", "https://docs.google.com/forms/d/abc/viewform", "Approver")
+
+
+def run(mode, size: int) -> dict:
+    recipients = [f"user{idx}@example.com" for idx in range(size)]
+    with SmtpSink(latency=LATENCY) as sink:
+        service = make_service(sink.port)
+
+        async def main():
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                await mode(service, recipients)
+            elapsed = time.perf_counter() - start
+            await service.close()
+            return elapsed
+        elapsed = asyncio.run(main())
+        return {"recipients_per_second": size / elapsed, "sessions": sink.sessions, "messages": sink.messages}
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print(f"RECIPIENT LIST BENCHMARK (STARTTLS + AUTH sink, {LATENCY * 1000:.0f} ms per SMTP command)")
+    print("=" * 80)
+    print(f"{'recipients':>10} | {'mode':>13} | {'recipients/s':>12} | {'speedup':>7} | {'sessions':>8} | {'messages':>8}")
+    print("-" * 80)
+    for size in LIST_SIZES:
+        baseline = None
+        for name, mode in (("new sessions", new_sessions), ("per recipient", per_recipient), ("list", as_list)):
+            if mode is new_sessions and size > SESSION_LIMIT:
+                continue
+            result = run(mode, size)
+            baseline = baseline or result["recipients_per_second"]
+            print(
+                f"{size:>10} | {name:>13} | {result['recipients_per_second']:>12.1f} | "
+                f"{result['recipients_per_second'] / baseline:>6.1f}x | {result['sessions']:>8} | {result['messages']:>8}"
+            )
@@ -0,0 +1,96 @@
+"""
+Benchmark: cost of building one approval email
+
+Times, per message, for a typical approval (title, form URL, approver and
+a short custom message):
+
+- string.Template: the HTML and text templates parsed and substituted on
+                   every call (an uncompiled template engine)
+- compiled:        the same templates as EmailTemplate, compiled once,
+                   rendered with escaping
+- per send:        compiled render + MIME parts + serialization for every
+                   message (what each send used to pay; the old f-string
+                   bodies cost about the same as "compiled" without escaping)
+- cached:          EmailService._approval_message_bytes once the survey's
+                   email is rendered - only the To header is new
+
+Usage:
+    python benchmarks/bench_email_render.py
+"""
+
+import contextlib
+import io
+import os
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_service import DEFAULT_TEMPLATES, SMTP_POLICY, EmailService
+
+ITERATIONS = 2000
+ARGS = (
+    "Customer Satisfaction Survey",
+    "https://docs.google.com/forms/d/1FAIpQLSd-example/viewform",
+    "Jane Approver",
+    "Please share this survey with everyone on the account team.",
+)
+
+
+def per_call(fn) -> float:
+    fn()  # Warm up
+    start = time.perf_counter()
+    for idx in range(ITERATIONS):
+        fn(idx)
+    return (time.perf_counter() - start) / ITERATIONS
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        service = EmailService(smtp_user="surveys@example.com", smtp_password="unused")
+    title, form_url, approver, message = ARGS
+
+    def string_template(idx=0):
+        for kind in ("txt", "html"):
+            section = string.Template(DEFAULT_TEMPLATES[f"approval_message.{kind}"]).substitute(custom_message=message)
+            string.Template(DEFAULT_TEMPLATES[f"approval.{kind}"]).substitute(
+                survey_title=title, form_url=form_url, approver_name=approver, custom_message_section=section
+            )
+
+    def compiled(idx=0):
+        bodies = []
+        for kind in ("txt", "html"):
+            section = service.templates[f"approval_message.{kind}"].render({"custom_message": message})
+            bodies.append(service.templates[f"approval.{kind}"].render({
+                "survey_title": title, "form_url": form_url, "approver_name": approver,
+                "custom_message_section": section,
+            }))
+        return bodies
+
+    def per_send(idx=0):
+        text_body, html_body = compiled()
+        message = service._build_approval_message(f"user{idx}@example.com", title, text_body, html_body)
+        message.as_bytes(policy=SMTP_POLICY)
+
+    def cached(idx=0):
+        service._approval_message_bytes(f"user{idx}@example.com", *ARGS)
+
+    results = [
+        ("string.Template", per_call(string_template)),
+        ("compiled", per_call(compiled)),
+        ("per send", per_call(per_send)),
+        ("cached", per_call(cached)),
+    ]
+    baseline = dict(results)["per send"]
+    print("=" * 62)
+    print(f"EMAIL RENDER BENCHMARK ({ITERATIONS} messages per mode)")
+    print("=" * 62)
+    print(f"{'mode':>16} | {'us/message':>10} | {'messages/s':>11} | {'vs per send':>11}")
+    print("-" * 62)
+    for name, seconds in results:
+        print(f"{name:>16} | {seconds * 1e6:>10.1f} | {1 / seconds:>11.0f} | {baseline / seconds:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
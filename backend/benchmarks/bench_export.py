@@ -0,0 +1,105 @@
+"""
+Benchmark: exporting every survey - time and peak memory vs. store size
+
+Seeds N surveys into each storage backend and serializes all of them:
+
+- GET pages:   what a client paging GET /surveys?limit=1000 makes the
+               server do - list a page with skip/limit, count, render the
+               JSON response - until every survey is out
+- one list:    every survey listed and rendered as one JSON document
+- export:      the GET /surveys/export NDJSON generator (keyset pages of
+               EXPORT_PAGE_SIZE, one chunk per page)
+
+Time is measured untraced; peak memory is what tracemalloc saw above the
+seeded store during a second run (the store itself is not counted).
+
+Usage:
+    python benchmarks/bench_export.py
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):  # Silence the app's startup logging
+    import app as app_module
+from repository import InMemoryRepository, SqliteRepository
+
+SIZES = [10000, 100000]
+PAGE_LIMIT = 1000
+
+
+def seed(repository, count: int):
+    batch = []
+    for idx in range(count):
+        batch.append({
+            "id": f"survey_{idx}", "title": f"Customer survey {idx}", "description": "Quarterly feedback",
+            "questions": "1. How satisfied are you? [MULTIPLE_CHOICE]\n- Very\n- Somewhat\n- Not at all\n2. Why? [PARAGRAPH]",
+            "status": "approved", "createdAt": f"2024-01-01T00:00:00.{idx:06d}", "creator": "bench@example.com",
+            "form_url": f"https://docs.google.com/forms/d/form{idx}/viewform", "form_status": "ready",
+        })
+        if len(batch) == 5000:
+            repository.add_many(batch)
+            batch = []
+    repository.add_many(batch)
+
+
+def get_pages(repository) -> int:
+    written = 0
+    total = repository.count()
+    for skip in range(0, total, PAGE_LIMIT):
+        page = repository.list(skip=skip, limit=PAGE_LIMIT)
+        written += len(json.dumps({"surveys": page, "total": repository.count(), "skip": skip, "limit": PAGE_LIMIT}))
+    return written
+
+
+def one_list(repository) -> int:
+    return len(json.dumps({"surveys": repository.list(), "total": repository.count()}))
+
+
+def export(repository) -> int:
+    surveys = app_module.iter_surveys(repository, page_size=app_module.EXPORT_PAGE_SIZE)
+    return sum(len(chunk) for chunk in app_module.export_chunks(surveys, "ndjson", None, app_module.EXPORT_PAGE_SIZE))
+
+
+def measure(mode, repository) -> dict:
+    start = time.perf_counter()
+    written = mode(repository)
+    elapsed = time.perf_counter() - start
+
+    # A second, traced run for memory (tracing slows it down)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    mode(repository)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mb": peak / 1e6, "mb_written": written / 1e6}
+
+
+if __name__ == "__main__":
+    print("=" * 76)
+    print(f"EXPORT BENCHMARK (export page size {app_module.EXPORT_PAGE_SIZE}, GET page limit {PAGE_LIMIT})")
+    print("=" * 76)
+    print(f"{'backend':>7} | {'surveys':>7} | {'mode':>9} | {'seconds':>7} | {'peak MB':>8} | {'MB written':>10}")
+    print("-" * 76)
+    for backend in ("memory", "sqlite"):
+        for size in SIZES:
+            with tempfile.TemporaryDirectory() as directory:
+                repository = (
+                    SqliteRepository(f"sqlite:///{directory}/surveys.db") if backend == "sqlite" else InMemoryRepository()
+                )
+                seed(repository, size)
+                for name, mode in (("GET pages", get_pages), ("one list", one_list), ("export", export)):
+                    result = measure(mode, repository)
+                    print(
+                        f"{backend:>7} | {size:>7} | {name:>9} | {result['seconds']:>7.2f} | "
+                        f"{result['peak_mb']:>8.1f} | {result['mb_written']:>10.1f}"
+                    )
+                repository.close()
@@ -0,0 +1,133 @@
+"""
+Benchmark: round trips and latency to build one Google Form
+
+Compares the previous build path (create with description, a separate
+questions batchUpdate, then one Drive permissions().create per
+permission) with the planned path in GoogleFormsService.create_form
+(one create, one batchUpdate carrying description/settings/questions,
+one batched Drive request). A fake API adds ROUND_TRIP_LATENCY seconds
+to every HTTP round trip.
+
+Usage:
+    python benchmarks/bench_form_build.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google_forms_service import GoogleFormsService
+from quota_scheduler import QuotaScheduler
+from retry_policy import RetryPolicy
+
+ROUND_TRIP_LATENCY = 0.05
+FORMS_PER_SCENARIO = 10
+QUESTIONS = [
+    {"title": f"Question {idx}", "type": "MULTIPLE_CHOICE", "options": ["A", "B", "C"]}
+    for idx in range(20)
+]
+
+
+class FakeApi:
+    """Fake Forms + Drive client; every execute() is one round trip"""
+
+    def __init__(self):
+        self.round_trips = 0
+
+    def _request(self, response):
+        api = self
+
+        class Request:
+            def execute(self, **kwargs):
+                api.round_trips += 1
+                time.sleep(ROUND_TRIP_LATENCY)
+                return response
+
+        return Request()
+
+    # Forms API
+    def forms(self):
+        return self
+
+    def create(self, body=None, **kwargs):
+        if body is not None and "info" in body:
+            return self._request({"formId": "form", "responderUri": "https://docs.google.com/forms/d/form/viewform"})
+        return self._request({"id": "permission"})
+
+    def batchUpdate(self, formId, body):
+        return self._request({"replies": []})
+
+    # Drive API
+    def permissions(self):
+        return self
+
+    def new_batch_http_request(self, callback=None):
+        api = self
+
+        class Batch:
+            def __init__(self):
+                self.calls = []
+
+            def add(self, request, request_id=None):
+                self.calls.append(request_id)
+
+            def execute(self):
+                api.round_trips += 1
+                time.sleep(ROUND_TRIP_LATENCY)
+                for request_id in self.calls:
+                    callback(request_id, {"id": "permission"}, None)
+
+        return Batch()
+
+
+def legacy_create_form(api: FakeApi, title, description, questions, owner_email):
+    """The build sequence used before the planner"""
+    service = make_service(api)
+    form_body = {"info": {"title": title, "documentTitle": title, "description": description}}
+    result = api.forms().create(body=form_body).execute()
+    if questions:
+        service.add_questions_to_form(result["formId"], questions)
+    api.permissions().create(fileId=result["formId"], body={"type": "anyone", "role": "reader"}).execute()
+    if owner_email:
+        api.permissions().create(fileId=result["formId"], body={"type": "user", "role": "writer"}).execute()
+
+
+def planned_create_form(api: FakeApi, title, description, questions, owner_email):
+    make_service(api).create_form(title, description, questions, owner_email)
+
+
+def make_service(api: FakeApi) -> GoogleFormsService:
+    service = GoogleFormsService.__new__(GoogleFormsService)
+    service.use_oauth = True
+    service.quota = QuotaScheduler({("forms", "write"): 60000, ("drive", "write"): 60000})
+    service.retry = RetryPolicy()
+    service.forms_service = api
+    service.drive_service = api
+    return service
+
+
+def run(build, questions) -> tuple:
+    api = FakeApi()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # Silence the service's logging
+        for idx in range(FORMS_PER_SCENARIO):
+            build(api, f"Form {idx}", "Description", questions, "owner@example.com")
+    elapsed = time.perf_counter() - start
+    return api.round_trips / FORMS_PER_SCENARIO, elapsed / FORMS_PER_SCENARIO * 1000
+
+
+if __name__ == "__main__":
+    print("=" * 72)
+    print(f"FORM BUILD BENCHMARK ({ROUND_TRIP_LATENCY * 1000:.0f} ms per round trip)")
+    print("=" * 72)
+    print(f"{'scenario':>18} | {'path':>8} | {'round trips/form':>16} | {'ms/form':>8}")
+    print("-" * 72)
+    for scenario, questions in [("20 questions", QUESTIONS), ("no questions", None)]:
+        for name, build in [("legacy", legacy_create_form), ("planned", planned_create_form)]:
+            round_trips, ms = run(build, questions)
+            print(f"{scenario:>18} | {name:>8} | {round_trips:>16.1f} | {ms:>8.1f}")
+    print("\nNote: the legacy path also loses the description, which forms().create ignores.")
@@ -0,0 +1,160 @@
+"""
+Benchmark: Google sign-in verification throughput
+
+Serves a signing certificate from a local HTTP server (LATENCY seconds per
+request, Cache-Control max-age like Google's) and verifies LOGINS ID tokens
+signed with it, as /auth/google would:
+
+- baseline: google.oauth2.id_token with a plain Request(), called on the
+            event loop (what /auth/google used to do) - downloads the
+            certificates for every login
+- cached:   GoogleIdTokenVerifier.verify_async - certificates fetched once,
+            RSA checks on worker threads
+
+Each mode runs a sequential login storm and CONCURRENCY logins gathered on
+one event loop. Runs offline.
+
+Usage:
+    python benchmarks/bench_google_login.py
+"""
+
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token
+import jwt
+
+from google_token_verifier import GoogleCertCache, GoogleIdTokenVerifier
+
+LATENCY = 0.05
+LOGINS = 200
+CONCURRENCY = 50
+AUDIENCE = "bench-client-id"
+
+
+class CertServer:
+    """Local stand-in for https://www.googleapis.com/oauth2/v1/certs"""
+
+    def __init__(self, certs: dict, latency: float):
+        body = json.dumps(certs).encode("utf-8")
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.hits += 1
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", "public, max-age=19800, must-revalidate, no-transform")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.hits = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}/oauth2/v1/certs"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def make_signing_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "accounts.google.com")])
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(datetime.utcnow() - timedelta(days=1))
+        .not_valid_after(datetime.utcnow() + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+
+
+def make_token(key) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": AUDIENCE,
+        "sub": "1234",
+        "email": "user@example.com",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": "bench-key"})
+
+
+def baseline_verifier(certs_url: str):
+    request = google_requests.Request()
+
+    async def verify(token: str) -> dict:
+        return id_token.verify_token(token, request, audience=AUDIENCE, certs_url=certs_url)
+    return verify
+
+
+def cached_verifier(certs_url: str):
+    return GoogleIdTokenVerifier(AUDIENCE, GoogleCertCache(certs_url=certs_url)).verify_async
+
+
+async def storm(verify, token: str, concurrency: int) -> float:
+    start = time.perf_counter()
+    if concurrency == 1:
+        for _ in range(LOGINS):
+            await verify(token)
+    else:
+        for offset in range(0, LOGINS, concurrency):
+            await asyncio.gather(*(verify(token) for _ in range(min(concurrency, LOGINS - offset))))
+    return time.perf_counter() - start
+
+
+def run(make_verifier, certs: dict, token: str, concurrency: int) -> dict:
+    with CertServer(certs, LATENCY) as server:
+        verify = make_verifier(server.url)
+        elapsed = asyncio.run(storm(verify, token, concurrency))
+        return {"logins_per_second": LOGINS / elapsed, "cert_fetches": server.hits}
+
+
+if __name__ == "__main__":
+    key, pem = make_signing_key()
+    certs = {"bench-key": pem}
+    token = make_token(key)
+
+    print("=" * 72)
+    print(f"GOOGLE LOGIN BENCHMARK ({LOGINS} logins, {LATENCY * 1000:.0f} ms certificate endpoint)")
+    print("=" * 72)
+    print(f"{'mode':>8} | {'concurrency':>11} | {'logins/s':>9} | {'speedup':>7} | {'cert fetches':>12}")
+    print("-" * 72)
+    for concurrency in (1, CONCURRENCY):
+        baseline = None
+        for mode, make_verifier in (("baseline", baseline_verifier), ("cached", cached_verifier)):
+            result = run(make_verifier, certs, token, concurrency)
+            baseline = baseline or result["logins_per_second"]
+            print(
+                f"{mode:>8} | {concurrency:>11} | {result['logins_per_second']:>9.1f} | "
+                f"{result['logins_per_second'] / baseline:>6.1f}x | {result['cert_fetches']:>12}"
+            )
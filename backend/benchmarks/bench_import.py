@@ -0,0 +1,144 @@
+"""
+Benchmark: importing an NDJSON upload - time and peak memory vs. upload size
+
+Generates an NDJSON upload of the given size on the fly, CHUNK_SIZE bytes
+per ASGI body message (what a server receives from a client streaming the
+file), into a SQLite repository:
+
+- buffered:  the whole body read, split into lines and validated, then
+             saved in one add_many (how POST /surveys/bulk handles a body);
+             only up to BUFFERED_LIMIT_MB
+- streaming: POST /surveys/import, driven as an ASGI app so the body
+             really arrives chunk by chunk
+
+Peak memory is what tracemalloc saw during the import (the generated
+upload itself is never held); rows/s is from an untraced run.
+
+Usage:
+    python benchmarks/bench_import.py
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):  # Silence the app's startup logging
+    import app as app_module
+from repository import SqliteRepository
+
+SIZES_MB = [10, 50, 200]
+BUFFERED_LIMIT_MB = 50
+CHUNK_SIZE = 64 * 1024
+QUESTIONS = "\n".join([
+    "1. What is your name? [TEXT]",
+    "2. How did you hear about us? [MULTIPLE_CHOICE]",
+    "- Search",
+    "- Friend",
+    "- Advertisement",
+    "3. Anything else? [PARAGRAPH]",
+])
+
+
+def upload(size_mb: int):
+    """NDJSON chunks adding up to about size_mb megabytes"""
+    total = 0
+    buffer = []
+    buffered = 0
+    idx = 0
+    while total < size_mb * 1_000_000:
+        line = json.dumps({
+            "id": f"import_{idx}", "title": f"Imported survey {idx}", "description": "Migrated from the old system",
+            "questions": QUESTIONS, "status": "approved", "createdAt": f"2024-01-01T00:00:00.{idx:06d}",
+        }).encode() + b"\n"
+        buffer.append(line)
+        buffered += len(line)
+        total += len(line)
+        idx += 1
+        if buffered >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def buffered(repository, size_mb: int) -> int:
+    body = b"".join(upload(size_mb))
+    records = []
+    for line in body.splitlines():
+        survey = app_module.Survey.model_validate_json(line)
+        app_module.parse_survey_questions(survey.questions)
+        records.append({**survey.model_dump(), "creator": "bench@example.com", "edit_url": None})
+    repository.add_many(records)
+    return len(records)
+
+
+def streaming(repository, size_mb: int) -> int:
+    app_module.repository = repository
+    chunks = upload(size_mb)
+    sent = []
+
+    async def receive():
+        chunk = next(chunks, None)
+        return {"type": "http.request", "body": chunk or b"", "more_body": chunk is not None}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http", "path": "/surveys/import",
+        "raw_path": b"/surveys/import", "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", b"application/x-ndjson")], "client": ("bench", 1), "server": ("bench", 80),
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(app_module.app(scope, receive, send))
+    result = json.loads(b"".join(message.get("body", b"") for message in sent[1:]))
+    assert result["failed"] == 0, result["errors"][:3]
+    return result["imported"]
+
+
+def measure(mode, size_mb: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SqliteRepository(f"sqlite:///{directory}/surveys.db")
+        start = time.perf_counter()
+        rows = mode(repository, size_mb)
+        elapsed = time.perf_counter() - start
+        repository.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SqliteRepository(f"sqlite:///{directory}/surveys.db")
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        mode(repository, size_mb)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+        repository.close()
+    return {"rows": rows, "rows_per_second": rows / elapsed, "peak_mb": peak / 1e6}
+
+
+if __name__ == "__main__":
+    app_module.app.dependency_overrides[app_module.get_current_user] = lambda: {
+        "email": "bench@example.com", "name": "Bench"
+    }
+    print("=" * 70)
+    print(f"IMPORT BENCHMARK (SQLite, {CHUNK_SIZE // 1024} KB chunks, batch size {app_module.IMPORT_BATCH_SIZE})")
+    print("=" * 70)
+    print(f"{'upload MB':>9} | {'mode':>9} | {'rows':>8} | {'rows/s':>8} | {'peak MB':>8}")
+    print("-" * 70)
+    for size_mb in SIZES_MB:
+        for name, mode in (("buffered", buffered), ("streaming", streaming)):
+            if mode is buffered and size_mb > BUFFERED_LIMIT_MB:
+                continue
+            result = measure(mode, size_mb)
+            print(
+                f"{size_mb:>9} | {name:>9} | {result['rows']:>8} | "
+                f"{result['rows_per_second']:>8.0f} | {result['peak_mb']:>8.1f}"
+            )
@@ -0,0 +1,139 @@
+"""
+Benchmark: GoogleFormsService.parse_questions_from_text
+
+- 100k questions: a text blob of QUESTIONS questions (a mix of types,
+                  options on the choice questions), parsed by the previous
+                  parser (copied below as legacy_parse) and the current one,
+                  from a string and from an open file
+- pathological:   single lines of growing length that stress the prefix
+                  strip and [TYPE] marker scan (long digit runs, thousands
+                  of markers, unclosed brackets, long option bullets).
+                  Linear parsing shows as a constant ns/char as the line
+                  doubles in length
+
+Usage:
+    python benchmarks/bench_question_parser.py
+"""
+
+import io
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google_forms_service import GoogleFormsService
+
+QUESTIONS = 100000
+LINE_LENGTHS = [250000, 500000, 1000000, 2000000]
+TEMPLATES = [
+    "{n}. What is your name? [TEXT]",
+    "{n}. How did you hear about us? [MULTIPLE_CHOICE]\n   - Search\n   - Friend\n   - Advertisement",
+    "{n}. Which products do you use? [CHECKBOX]\n   * Forms\n   * Sheets\n   * Docs\n   * Slides",
+    "{n}. Which region are you in? [DROPDOWN]\n   - Americas\n   - EMEA\n   - APAC",
+    "{n}. Tell us about yourself [PARAGRAPH]",
+    "{n}) Anything else?",
+]
+PATHOLOGICAL = {
+    "digit prefix": lambda length: "1" * length + " Title",
+    "markers": lambda length: "1. " + "[TEXT]" * (length // 6),
+    "mixed markers": lambda length: "1. " + "[SHORT] [LONG] [RADIO] " * (length // 23),
+    "open brackets": lambda length: "1. " + "[PARAGRAPH" * (length // 10),
+    "option bullets": lambda length: "1. Q [RADIO]\n" + "- ( * • ) " * (length // 10) + "option",
+}
+
+
+def legacy_parse(text: str) -> List[Dict]:
+    """parse_questions_from_text before the single-pass rewrite"""
+    questions = []
+    lines = text.strip().split('\n')
+    current_question = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        is_question_line = any(
+            line.startswith(prefix)
+            for prefix in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0']
+        ) or (
+            line.startswith(('-', '*', '•')) and not current_question
+        )
+        if is_question_line:
+            if current_question:
+                questions.append(current_question)
+            question_text = line.lstrip('0123456789.-*•() ').strip()
+            question_type = "TEXT"
+            if "[PARAGRAPH]" in question_text or "[LONG]" in question_text:
+                question_type = "PARAGRAPH"
+                question_text = question_text.replace("[PARAGRAPH]", "").replace("[LONG]", "").strip()
+            elif "[MULTIPLE_CHOICE]" in question_text or "[RADIO]" in question_text:
+                question_type = "MULTIPLE_CHOICE"
+                question_text = question_text.replace("[MULTIPLE_CHOICE]", "").replace("[RADIO]", "").strip()
+            elif "[CHECKBOX]" in question_text:
+                question_type = "CHECKBOX"
+                question_text = question_text.replace("[CHECKBOX]", "").strip()
+            elif "[DROPDOWN]" in question_text:
+                question_type = "DROPDOWN"
+                question_text = question_text.replace("[DROPDOWN]", "").strip()
+            else:
+                question_text = question_text.replace("[TEXT]", "").replace("[SHORT]", "").strip()
+            current_question = {"title": question_text, "type": question_type, "required": False, "options": []}
+        elif current_question and (line.startswith('-') or line.startswith('*') or line.startswith('•')):
+            option = line.lstrip('-*•() ').strip()
+            if option:
+                current_question["options"].append(option)
+    if current_question:
+        questions.append(current_question)
+    if not questions and text.strip():
+        questions.append({"title": text.strip(), "type": "TEXT", "required": False, "options": []})
+    return questions
+
+
+def best_of(fn, arg_factory, runs: int = 3) -> float:
+    times = []
+    for _ in range(runs):
+        arg = arg_factory()
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parse = GoogleFormsService.parse_questions_from_text
+    text = "\n".join(TEMPLATES[idx % len(TEMPLATES)].format(n=idx + 1) for idx in range(QUESTIONS))
+    assert parse(text) == legacy_parse(text) == parse(io.StringIO(text))
+
+    print("=" * 64)
+    print(f"QUESTION PARSER BENCHMARK ({QUESTIONS} questions, {len(text) / 1e6:.1f} MB)")
+    print("=" * 64)
+    print(f"{'parser':>16} | {'ms':>8} | {'questions/s':>11} | {'speedup':>7}")
+    print("-" * 64)
+    baseline = None
+    for name, fn, arg_factory in (
+        ("previous", legacy_parse, lambda: text),
+        ("single pass", parse, lambda: text),
+        ("single pass/file", parse, lambda: io.StringIO(text)),
+    ):
+        seconds = best_of(fn, arg_factory)
+        baseline = baseline or seconds
+        print(f"{name:>16} | {seconds * 1000:>8.1f} | {QUESTIONS / seconds:>11.0f} | {baseline / seconds:>6.1f}x")
+
+    print()
+    print("=" * 64)
+    print("PATHOLOGICAL LINES (ns per character; flat = linear)")
+    print("=" * 64)
+    print(f"{'line':>14} | {'chars':>8} | {'previous':>8} | {'single pass':>11}")
+    print("-" * 64)
+    for name, make_line in PATHOLOGICAL.items():
+        for length in LINE_LENGTHS:
+            line = make_line(length)
+            assert parse(line) == legacy_parse(line)
+            legacy = best_of(legacy_parse, lambda: line)
+            current = best_of(parse, lambda: line)
+            print(f"{name:>14} | {len(line):>8} | {legacy / len(line) * 1e9:>8.2f} | {current / len(line) * 1e9:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
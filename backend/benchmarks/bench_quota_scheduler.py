@@ -0,0 +1,162 @@
+"""
+Benchmark: sustained form creation against a rate-limited fake Google API
+
+A fake Forms/Drive API enforces a server-side write quota and answers
+429 (with Retry-After) once it is exceeded. Worker threads create forms
+as fast as they can for DURATION seconds, in two modes:
+
+- unscheduled: calls go straight out; a 429 fails the form (old behavior)
+- scheduled:   calls go through QuotaScheduler, configured above the real
+               quota so it has to adapt to the 429s it sees
+
+Usage:
+    python benchmarks/bench_quota_scheduler.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from google_forms_service import FormBuildError, GoogleFormsService
+from quota_scheduler import QuotaScheduler, TokenBucket
+from retry_policy import RetryPolicy
+
+DURATION = 10.0
+THREADS = 8
+SERVER_FORMS_WRITES_PER_MINUTE = 1200   # 20/s
+SERVER_DRIVE_WRITES_PER_MINUTE = 2400   # 40/s
+CLIENT_FORMS_WRITES_PER_MINUTE = 3000   # Deliberately above the real quota
+CLIENT_DRIVE_WRITES_PER_MINUTE = 6000
+LATENCY = 0.01
+
+
+class RateLimitedApi:
+    """Fake Forms + Drive API with a server-side write quota"""
+
+    def __init__(self):
+        self.forms_quota = TokenBucket(SERVER_FORMS_WRITES_PER_MINUTE, burst=5)
+        self.drive_quota = TokenBucket(SERVER_DRIVE_WRITES_PER_MINUTE, burst=10)
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _call(self, quota: TokenBucket, tokens: int, response):
+        time.sleep(LATENCY)
+        if quota.reserve(tokens) > 0:
+            with self._lock:
+                self.rejected += 1
+            raise HttpError(httplib2.Response({"status": 429, "retry-after": "0.2"}), b'{"error": "rateLimitExceeded"}')
+        return response
+
+    def request(self, quota, response, tokens=1):
+        api = self
+
+        class Request:
+            def execute(self, **kwargs):
+                return api._call(quota, tokens, response)
+
+        return Request()
+
+    # Forms API
+    def forms(self):
+        return self
+
+    def create(self, body=None, **kwargs):
+        if body is not None and "info" in body:
+            return self.request(self.forms_quota, {"formId": "form", "responderUri": "https://example.com/form"})
+        return self.request(self.drive_quota, {"id": "permission"})
+
+    def batchUpdate(self, formId, body):
+        return self.request(self.forms_quota, {"replies": []})
+
+    # Drive API
+    def permissions(self):
+        return self
+
+    def new_batch_http_request(self, callback=None):
+        api = self
+
+        class Batch:
+            def __init__(self):
+                self.calls = []
+
+            def add(self, request, request_id=None):
+                self.calls.append(request_id)
+
+            def execute(self):
+                api._call(api.drive_quota, len(self.calls), None)
+                for request_id in self.calls:
+                    callback(request_id, {"id": "permission"}, None)
+
+        return Batch()
+
+
+def run(scheduler: QuotaScheduler) -> dict:
+    api = RateLimitedApi()
+    service = GoogleFormsService.__new__(GoogleFormsService)
+    service.use_oauth = True
+    service.quota = scheduler
+    service.retry = RetryPolicy(max_attempts=1)  # Measure the scheduler alone
+    service.forms_service = api
+    service.drive_service = api
+
+    counts = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + DURATION
+
+    def worker():
+        while time.monotonic() < deadline:
+            try:
+                service.create_form("Form", "Description", [{"title": "Q", "type": "TEXT"}], "owner@example.com")
+                outcome = "ok"
+            except FormBuildError:
+                outcome = "failed"
+            with lock:
+                counts[outcome] += 1
+
+    with contextlib.redirect_stdout(io.StringIO()):  # Silence the service's logging
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return {
+        "ok_per_minute": counts["ok"] / DURATION * 60,
+        "failed": counts["failed"],
+        "rejected": api.rejected,
+        "budget": scheduler.budget()["forms.write"],
+    }
+
+
+if __name__ == "__main__":
+    print("=" * 78)
+    print(f"QUOTA SCHEDULER BENCHMARK ({THREADS} threads, {DURATION:.0f}s, "
+          f"server quota {SERVER_FORMS_WRITES_PER_MINUTE} forms writes/min)")
+    print("=" * 78)
+    print(f"{'mode':>12} | {'forms ok/min':>12} | {'forms failed':>12} | {'429s':>6} | {'final rate/min':>14}")
+    print("-" * 78)
+    unlimited = {
+        ("forms", "write"): 10 ** 7, ("forms", "read"): 10 ** 7,
+        ("drive", "write"): 10 ** 7, ("drive", "read"): 10 ** 7,
+    }
+    for name, scheduler in [
+        ("unscheduled", QuotaScheduler(unlimited, max_throttle_retries=0)),
+        ("scheduled", QuotaScheduler({
+            ("forms", "write"): CLIENT_FORMS_WRITES_PER_MINUTE,
+            ("drive", "write"): CLIENT_DRIVE_WRITES_PER_MINUTE,
+        })),
+    ]:
+        result = run(scheduler)
+        print(
+            f"{name:>12} | {result['ok_per_minute']:>12.0f} | {result['failed']:>12} | "
+            f"{result['rejected']:>6} | {result['budget']['rate_per_minute']:>14.0f}"
+        )
+    print(f"\nUpper bound: {SERVER_FORMS_WRITES_PER_MINUTE // 2} forms/min (2 Forms writes per form)")
@@ -0,0 +1,104 @@
+"""
+Benchmark: Google API client construction time at startup
+
+Measures building the Forms v1 and Drive v3 clients the way
+GoogleFormsService used to (googleapiclient.build with
+cache_discovery=False) against DiscoveryCache, for:
+
+- cold:  first build in a fresh process with an empty cache directory
+- disk:  first build in a fresh process with the cache already on disk
+- warm:  later builds in the same process (parsed document memoized)
+
+Each cold/disk measurement runs in a subprocess so nothing is shared.
+Runs fully offline (anonymous credentials, bundled discovery documents).
+
+Usage:
+    python benchmarks/bench_service_startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+RUNS = 5
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build
+from discovery_cache import DiscoveryCache
+credentials = AnonymousCredentials()
+start = time.perf_counter()
+if {mode!r} == "build":
+    build("forms", "v1", credentials=credentials, cache_discovery=False)
+    build("drive", "v3", credentials=credentials, cache_discovery=False)
+else:
+    cache = DiscoveryCache({cache_dir!r})
+    cache.build("forms", "v1", credentials=credentials)
+    cache.build("drive", "v3", credentials=credentials)
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+def time_in_subprocess(mode: str, cache_dir: str = "") -> float:
+    """Seconds to build both clients in a fresh interpreter (imports excluded)"""
+    code = CHILD.format(backend=BACKEND_DIR, mode=mode, cache_dir=cache_dir)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_warm(runs: int) -> tuple:
+    from google.auth.credentials import AnonymousCredentials
+    from googleapiclient.discovery import build
+    from discovery_cache import DiscoveryCache
+
+    credentials = AnonymousCredentials()
+    start = time.perf_counter()
+    for _ in range(runs):
+        build("forms", "v1", credentials=credentials, cache_discovery=False)
+        build("drive", "v3", credentials=credentials, cache_discovery=False)
+    build_time = (time.perf_counter() - start) / runs
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = DiscoveryCache(cache_dir)
+        cache.build("forms", "v1", credentials=credentials)
+        cache.build("drive", "v3", credentials=credentials)
+        start = time.perf_counter()
+        for _ in range(runs):
+            cache.build("forms", "v1", credentials=credentials)
+            cache.build("drive", "v3", credentials=credentials)
+        cached_time = (time.perf_counter() - start) / runs
+    return build_time, cached_time
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+if __name__ == "__main__":
+    print("=" * 66)
+    print(f"API CLIENT STARTUP BENCHMARK (forms v1 + drive v3, median of {RUNS})")
+    print("=" * 66)
+    print(f"{'scenario':>14} | {'build() ms':>12} | {'DiscoveryCache ms':>18}")
+    print("-" * 66)
+
+    build_fresh = median([time_in_subprocess("build") * 1000 for _ in range(RUNS)])
+    cold = []
+    for _ in range(RUNS):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold.append(time_in_subprocess("cache", cache_dir) * 1000)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        time_in_subprocess("cache", cache_dir)  # Populate the disk cache
+        disk = [time_in_subprocess("cache", cache_dir) * 1000 for _ in range(RUNS)]
+
+    print(f"{'cold process':>14} | {build_fresh:>12.1f} | {median(cold):>18.1f}")
+    print(f"{'disk cache':>14} | {build_fresh:>12.1f} | {median(disk):>18.1f}")
+    build_warm, cached_warm = time_warm(RUNS)
+    print(f"{'warm process':>14} | {build_warm * 1000:>12.1f} | {cached_warm * 1000:>18.1f}")
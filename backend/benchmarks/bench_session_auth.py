@@ -0,0 +1,79 @@
+"""
+Benchmark: per-request session authentication overhead
+
+Measures get_current_user (cookie -> claims) on its own, and GET /surveys
+with a session cookie through the ASGI app, with:
+
+- baseline: jwt.decode on every request (what verify_token used to do)
+- cached:   verify_token backed by the session cache
+
+Usage:
+    python benchmarks/bench_session_auth.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):  # Silence the app's startup logging
+    import app as app_module
+from fastapi.testclient import TestClient
+import jwt
+
+AUTH_CALLS = 100_000
+REQUESTS = 2_000
+
+
+def baseline_verify_token(token: str):
+    try:
+        return jwt.decode(token, app_module.JWT_SECRET_KEY, algorithms=[app_module.JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+
+
+def auth_us(token: str) -> float:
+    async def loop():
+        start = time.perf_counter()
+        for _ in range(AUTH_CALLS):
+            await app_module.get_current_user(token)
+        return time.perf_counter() - start
+    return asyncio.run(loop()) / AUTH_CALLS * 1_000_000
+
+
+def request_us(client: TestClient) -> float:
+    client.get("/surveys?limit=10")  # Warm up
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        client.get("/surveys?limit=10")
+    return (time.perf_counter() - start) / REQUESTS * 1_000_000
+
+
+def run(verify_token) -> dict:
+    app_module.verify_token = verify_token
+    app_module.session_cache.clear()
+    token = app_module.create_access_token({"email": "bench@example.com", "name": "Bench"})
+    client = TestClient(app_module.app, cookies={"auth_token": token})
+    return {"auth_us": auth_us(token), "request_us": request_us(client)}
+
+
+if __name__ == "__main__":
+    cached_verify_token = app_module.verify_token
+    results = {
+        "baseline": run(baseline_verify_token),
+        "cached": run(cached_verify_token),
+    }
+    print("=" * 64)
+    print(f"SESSION AUTH BENCHMARK ({AUTH_CALLS} auth checks, {REQUESTS} GET /surveys)")
+    print("=" * 64)
+    print(f"{'mode':>8} | {'auth µs/request':>15} | {'GET /surveys µs':>15}")
+    print("-" * 64)
+    for mode, result in results.items():
+        print(f"{mode:>8} | {result['auth_us']:>15.2f} | {result['request_us']:>15.1f}")
+    saved = results["baseline"]["auth_us"] - results["cached"]["auth_us"]
+    print(f"\nAuth overhead per request: {results['baseline']['auth_us'] / results['cached']['auth_us']:.1f}x lower "
+          f"({saved:.1f} µs saved)")
@@ -0,0 +1,103 @@
+"""
+Benchmark: SMTP messages per second with and without connection pooling
+
+Sends MESSAGES approval-sized emails to a local aiosmtpd sink that
+requires STARTTLS and AUTH (benchmarks/smtp_sink.py), CONCURRENCY at a
+time, with:
+
+- per-message: aiosmtplib.send() - connect, EHLO, STARTTLS, EHLO, AUTH,
+               send, QUIT for every message (what EmailService used to do)
+- pooled:      SmtpConnectionPool with CONCURRENCY long-lived connections
+
+Each configuration runs with no added latency and with LATENCY seconds per
+SMTP command. Requires aiosmtpd.
+
+Usage:
+    python benchmarks/bench_smtp_pool.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosmtplib
+
+from email_service import EmailService
+from smtp_pool import SmtpConnectionPool
+from smtp_sink import PASSWORD, USERNAME, SmtpSink
+
+MESSAGES = 300
+CONCURRENCY = 4
+LATENCIES = [0.0, 0.005]
+
+
+def make_message(service: EmailService, idx: int):
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    message = MIMEMultipart("alternative")
+    message["Subject"] = f"Survey Approved: Survey {idx}"
+    message["From"] = "surveys@example.com"
+    message["To"] = f"user{idx}@example.com"
+    args = (f"Survey {idx}", "https://docs.google.com/forms/d/abc/viewform", "Approver", None)
+    message.attach(MIMEText(service._create_text_email_body(*args), "plain"))
+    message.attach(MIMEText(service._create_html_email_body(*args), "html"))
+    return message
+
+
+async def send_all(send, messages) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(message):
+        async with semaphore:
+            await send(message)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(message) for message in messages))
+    return time.perf_counter() - start
+
+
+def run(mode: str, latency: float, messages) -> dict:
+    with SmtpSink(latency=latency) as sink:
+        if mode == "per-message":
+            async def send(message):
+                await aiosmtplib.send(
+                    message, hostname="127.0.0.1", port=sink.port, username=USERNAME,
+                    password=PASSWORD, start_tls=True, validate_certs=False,
+                )
+            elapsed = asyncio.run(send_all(send, messages))
+        else:
+            pool = SmtpConnectionPool(
+                "127.0.0.1", sink.port, USERNAME, PASSWORD, size=CONCURRENCY, validate_certs=False
+            )
+
+            async def main():
+                elapsed = await send_all(pool.send_message, messages)
+                await pool.close()
+                return elapsed
+            elapsed = asyncio.run(main())
+        return {"messages_per_second": len(messages) / elapsed, "sessions": sink.sessions}
+
+
+if __name__ == "__main__":
+    with contextlib.redirect_stdout(io.StringIO()):  # Silence the "not configured" warning
+        service = EmailService()
+    messages = [make_message(service, idx) for idx in range(MESSAGES)]
+
+    print("=" * 72)
+    print(f"SMTP POOL BENCHMARK ({MESSAGES} messages, {CONCURRENCY} concurrent, STARTTLS + AUTH sink)")
+    print("=" * 72)
+    print(f"{'latency':>7} | {'mode':>11} | {'messages/s':>10} | {'speedup':>7} | {'SMTP sessions':>13}")
+    print("-" * 72)
+    for latency in LATENCIES:
+        baseline = None
+        for mode in ("per-message", "pooled"):
+            result = run(mode, latency, messages)
+            baseline = baseline or result["messages_per_second"]
+            print(
+                f"{latency * 1000:>5.0f}ms | {mode:>11} | {result['messages_per_second']:>10.1f} | "
+                f"{result['messages_per_second'] / baseline:>6.1f}x | {result['sessions']:>13}"
+            )
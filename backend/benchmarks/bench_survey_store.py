@@ -0,0 +1,80 @@
+"""
+Benchmark: survey lookups in the indexed SurveyStore vs. a linear list scan
+
+Shows that get/update/delete stay flat from 1k to 1M surveys while the old
+`next(s for s in surveys_db if s["id"] == survey_id)` scan grows linearly.
+
+Usage:
+    python benchmarks/bench_survey_store.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from survey_store import SurveyStore
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LOOKUPS = 10_000
+LINEAR_LOOKUPS = 50
+STATUSES = ["draft", "pending-approval", "approved", "archived"]
+
+
+def make_survey(idx: int) -> dict:
+    return {
+        "id": f"survey_{idx}",
+        "title": f"Survey {idx}",
+        "status": STATUSES[idx % len(STATUSES)],
+        "creator": f"user{idx % 100}@example.com",
+        "createdAt": f"2024-01-01T00:00:00.{idx:07d}",
+    }
+
+
+def per_op_us(elapsed: float, ops: int) -> float:
+    return elapsed / ops * 1_000_000
+
+
+def bench_size(size: int):
+    surveys = [make_survey(idx) for idx in range(size)]
+    store = SurveyStore()
+    for survey in surveys:
+        store.add(dict(survey))
+
+    ids = [f"survey_{random.randrange(size)}" for _ in range(LOOKUPS)]
+
+    start = time.perf_counter()
+    for survey_id in ids:
+        store.get(survey_id)
+    get_us = per_op_us(time.perf_counter() - start, LOOKUPS)
+
+    start = time.perf_counter()
+    for survey_id in ids:
+        store.update(survey_id, {"status": random.choice(STATUSES)})
+    update_us = per_op_us(time.perf_counter() - start, LOOKUPS)
+
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        store.count(status="draft")
+    count_us = per_op_us(time.perf_counter() - start, LOOKUPS)
+
+    linear_ids = ids[:LINEAR_LOOKUPS]
+    start = time.perf_counter()
+    for survey_id in linear_ids:
+        next((s for s in surveys if s["id"] == survey_id), None)
+    linear_us = per_op_us(time.perf_counter() - start, len(linear_ids))
+
+    print(f"{size:>10,} | {get_us:>10.2f} | {update_us:>10.2f} | {count_us:>10.2f} | {linear_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    print("=" * 68)
+    print("SURVEY STORE LOOKUP BENCHMARK (microseconds per operation)")
+    print("=" * 68)
+    print(f"{'surveys':>10} | {'get':>10} | {'update':>10} | {'count':>10} | {'linear scan':>12}")
+    print("-" * 68)
+    for size in SIZES:
+        bench_size(size)
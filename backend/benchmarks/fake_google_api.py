@@ -0,0 +1,142 @@
+"""
+Local fake of the Google Forms and Drive APIs for benchmarks
+
+Serves just enough of Forms v1 (create, batchUpdate, get) and Drive v3
+(multipart batch requests) for GoogleFormsService.create_form, over
+HTTP/1.1 keep-alive, adding LATENCY seconds to every request like a real
+round trip to Google. It also counts TCP connections, so benchmarks can
+show whether clients reuse them.
+
+Usage (from a benchmark):
+    with FakeGoogleApi(latency=0.05) as api:
+        clients = api.build_clients()
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import copy
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httplib2
+from googleapiclient.discovery import build_from_document
+
+from client_pool import ApiClients
+from discovery_cache import discovery_cache
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+
+    def setup(self):
+        super().setup()
+        self.server.api.record_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        match = re.match(r"^/v1/forms/([^/?]+)", self.path)
+        if not match:
+            return self._send_json(404, {"error": "not found"})
+        self._send_json(200, {"formId": match.group(1), "items": []})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.api.record_request()
+        time.sleep(self.server.api.latency)
+        path = self.path.split("?", 1)[0]
+
+        if path == "/v1/forms":
+            form_id = f"form{next(self.server.api.ids)}"
+            return self._send_json(200, {
+                "formId": form_id,
+                "responderUri": f"https://docs.google.com/forms/d/{form_id}/viewform",
+            })
+        if re.match(r"^/v1/forms/[^/]+:batchUpdate$", path):
+            return self._send_json(200, {"replies": []})
+        if path == "/batch/drive/v3":
+            return self._send_batch(body)
+        self._send_json(404, {"error": "not found"})
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_batch(self, body: bytes):
+        """Answer every part of a multipart/mixed batch with a created permission"""
+        boundary = self.headers.get_content_type() and self.headers.get_param("boundary")
+        content_ids = re.findall(rb"Content-ID: <([^>]+)>", body) if boundary else []
+        parts = []
+        for content_id in content_ids:
+            response = json.dumps({"id": "permission"})
+            parts.append(
+                "--batch_response\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id.decode()}>\r\n\r\n"
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(response)}\r\n\r\n"
+                f"{response}\r\n"
+            )
+        data = ("".join(parts) + "--batch_response--\r\n").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "multipart/mixed; boundary=batch_response")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeGoogleApi:
+    """Threaded local server standing in for forms.googleapis.com and www.googleapis.com"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.ids = itertools.count()
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.api = self
+        self.root_url = f"http://127.0.0.1:{self._server.server_port}/"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def build_clients(self) -> ApiClients:
+        """Forms + Drive clients pointed at this server, sharing one keep-alive Http"""
+        http = httplib2.Http(timeout=30)
+        return ApiClients(
+            forms=build_from_document(self._document("forms", "v1"), http=http),
+            drive=build_from_document(self._document("drive", "v3"), http=http),
+        )
+
+    def _document(self, api: str, version: str) -> dict:
+        document = copy.deepcopy(discovery_cache.document(api, version))
+        document["rootUrl"] = self.root_url
+        document.pop("mtlsRootUrl", None)
+        return document
@@ -0,0 +1,121 @@
+"""
+Load test: list/get latency during a burst of form creations
+
+Fires a burst of POST /surveys requests against a fake Forms service that
+blocks for FORM_LATENCY seconds per form (like the real googleapiclient
+round trips), while a reader keeps calling GET /surveys and
+GET /surveys/{id}. Runs twice:
+
+- inline:   create_form called directly in the async handler (old behavior)
+- executor: create_form runs on the bounded FormCreationExecutor
+
+Usage:
+    python benchmarks/load_test_form_creation.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import app as app_module
+from app import app, get_current_user
+from form_executor import FormCreationExecutor
+from lazy_service import LazyService
+
+FORM_LATENCY = 0.2
+BURST_SIZE = 20
+CONCURRENCY = 4
+
+
+class BlockingFormsService:
+    """Fake Forms service whose create_form blocks like real HTTP calls"""
+
+    def parse_questions_from_text(self, text):
+        return [{"title": text, "type": "TEXT", "required": False, "options": []}]
+
+    def create_form(self, title, description, questions=None, owner_email=None):
+        time.sleep(FORM_LATENCY)
+        return {
+            "form_id": title,
+            "form_url": f"https://docs.google.com/forms/d/{title}/viewform",
+            "edit_url": f"https://docs.google.com/forms/d/{title}/edit",
+        }
+
+
+class InlineExecutor:
+    """Runs the call on the event loop thread, like the original code"""
+
+    async def run(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+async def run_scenario(executor) -> dict:
+    app_module.form_executor = executor
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        seed = await client.post("/surveys", json={"title": "seed", "description": "seed"})
+        seed_id = seed.json()["id"]
+
+        latencies = []
+        done = asyncio.Event()
+
+        async def reader():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/surveys", params={"limit": 10})
+                await client.get(f"/surveys/{seed_id}")
+                latencies.append((time.perf_counter() - start) / 2)
+                await asyncio.sleep(0.005)
+
+        async def burst():
+            await asyncio.gather(*[
+                client.post("/surveys", json={"title": f"form_{i}", "description": "load test"})
+                for i in range(BURST_SIZE)
+            ])
+            done.set()
+
+        start = time.perf_counter()
+        await asyncio.gather(reader(), burst())
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "reads": len(latencies_ms),
+        "p50": statistics.median(latencies_ms),
+        "p95": latencies_ms[int(len(latencies_ms) * 0.95) - 1] if len(latencies_ms) > 1 else latencies_ms[0],
+        "max": latencies_ms[-1],
+        "burst_seconds": elapsed,
+    }
+
+
+async def main():
+    app.dependency_overrides[get_current_user] = lambda: {"email": "load@example.com", "name": "Load Test"}
+    app_module.forms_service_loader = LazyService.preloaded(BlockingFormsService())
+
+    print("=" * 78)
+    print(f"FORM CREATION LOAD TEST ({BURST_SIZE} forms x {FORM_LATENCY}s, executor concurrency {CONCURRENCY})")
+    print("=" * 78)
+    print(f"{'mode':>10} | {'reads served':>12} | {'p50 ms':>8} | {'p95 ms':>8} | {'max ms':>8} | {'burst s':>8}")
+    print("-" * 78)
+    for name, executor in [
+        ("inline", InlineExecutor()),
+        ("executor", FormCreationExecutor(max_concurrency=CONCURRENCY)),
+    ]:
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence the app's logging
+            result = await run_scenario(executor)
+        print(
+            f"{name:>10} | {result['reads']:>12} | {result['p50']:>8.2f} | {result['p95']:>8.2f} | "
+            f"{result['max']:>8.1f} | {result['burst_seconds']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
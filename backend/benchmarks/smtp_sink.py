@@ -0,0 +1,136 @@
+"""
+Local SMTP sink for email benchmarks
+
+An aiosmtpd server that accepts and discards mail like a real submission
+server would: STARTTLS with a self-signed certificate, AUTH LOGIN/PLAIN
+(user "bench", password "bench"), and LATENCY seconds added to every EHLO,
+MAIL, RCPT and DATA command to stand in for the network round trip. It
+counts SMTP sessions, messages and recipients.
+
+Requires aiosmtpd (see requirements.txt).
+
+Usage (from a benchmark):
+    with SmtpSink(latency=0.005) as sink:
+        ... connect to 127.0.0.1:sink.port with validate_certs=False
+"""
+
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import socket
+import ssl
+import tempfile
+import threading
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+# aiosmtpd logs every session (and a deprecation warning per AUTH)
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+USERNAME = "bench"
+PASSWORD = "bench"
+
+
+class _Handler:
+    def __init__(self, sink: "SmtpSink"):
+        self.sink = sink
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.sink.latency)
+        session.host_name = hostname
+        if not session.ssl:
+            self.sink.record("sessions")
+        return responses
+
+    async def handle_MAIL(self, server, session, envelope, address, mail_options):
+        await asyncio.sleep(self.sink.latency)
+        envelope.mail_from = address
+        envelope.mail_options.extend(mail_options)
+        return "250 OK"
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        await asyncio.sleep(self.sink.latency)
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.sink.latency)
+        self.sink.record("messages")
+        self.sink.record("recipients", len(envelope.rcpt_tos))
+        return "250 Message accepted"
+
+
+class SmtpSink:
+    """STARTTLS + AUTH SMTP server on 127.0.0.1 that discards everything it receives"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sessions = 0
+        self.messages = 0
+        self.recipients = 0
+        self._lock = threading.Lock()
+        self.port = _free_port()
+        self._cert_dir = tempfile.TemporaryDirectory()
+        self.controller = Controller(
+            _Handler(self),
+            hostname="127.0.0.1",
+            port=self.port,
+            tls_context=self._tls_context(),
+            require_starttls=True,
+            authenticator=self._authenticate,
+        )
+
+    def __enter__(self):
+        self.controller.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.controller.stop()
+        self._cert_dir.cleanup()
+
+    def record(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    @staticmethod
+    def _authenticate(server, session, envelope, mechanism, data):
+        return AuthResult(success=data.login == USERNAME.encode() and data.password == PASSWORD.encode())
+
+    def _tls_context(self) -> ssl.SSLContext:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(datetime.utcnow() - timedelta(days=1))
+            .not_valid_after(datetime.utcnow() + timedelta(days=1))
+            .sign(key, hashes.SHA256())
+        )
+        cert_file = os.path.join(self._cert_dir.name, "cert.pem")
+        key_file = os.path.join(self._cert_dir.name, "key.pem")
+        with open(cert_file, "wb") as f:
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+        with open(key_file, "wb") as f:
+            f.write(key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption(),
+            ))
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert_file, key_file)
+        return context
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
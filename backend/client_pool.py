@@ -0,0 +1,158 @@
+"""
+Client Pool
+Thread-safe pool of Google Forms/Drive API clients
+
+googleapiclient clients sit on top of httplib2.Http, which is not
+thread-safe, so one client pair cannot be shared by concurrent form
+builds. GoogleClientPool hands out client pairs to one thread at a time.
+Every pair has its own httplib2.Http (whose connections stay open and are
+reused by the next checkout), and all pairs share one credentials object.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional
+import queue
+import threading
+
+import google_auth_httplib2
+import httplib2
+
+from discovery_cache import discovery_cache
+
+
+class ApiClients(NamedTuple):
+    """One Forms client and one Drive client sharing an HTTP connection pool"""
+    forms: Any
+    drive: Any
+
+
+class GoogleClientPool:
+    """Bounded pool of ApiClients, created on demand"""
+
+    def __init__(
+        self,
+        credentials=None,
+        size: int = 4,
+        factory: Optional[Callable[[], ApiClients]] = None,
+        http_timeout: float = 60.0,
+    ):
+        """
+        Initialize the pool (clients are built the first time they are needed)
+
+        Args:
+            credentials: google.auth credentials shared by every client
+            size: Maximum number of client pairs (= concurrent API users)
+            factory: Builds one client pair; defaults to Forms v1 + Drive v3
+                     from the discovery cache over an authorized httplib2.Http
+            http_timeout: Socket timeout for each client's connections
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.credentials = credentials
+        self.size = size
+        self.http_timeout = http_timeout
+        self.factory = factory or self._build_clients
+        self._idle: "queue.LifoQueue[ApiClients]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[ApiClients]:
+        """
+        Borrow a client pair for the current thread
+
+        Reuses an idle pair (most recently used first, so its connections
+        are still warm), builds a new one while below `size`, and otherwise
+        waits for one to be returned.
+
+        Raises:
+            TimeoutError: No client became available within timeout
+        """
+        clients = self._acquire(timeout)
+        try:
+            yield clients
+        finally:
+            self._release(clients)
+
+    def warm_up(self, count: int = 1):
+        """Build up to `count` client pairs ahead of time (fails fast on bad configuration)"""
+        borrowed = []
+        try:
+            for _ in range(min(count, self.size)):
+                borrowed.append(self._acquire(timeout=0))
+        except TimeoutError:
+            pass  # Every client is already built and in use
+        finally:
+            for clients in borrowed:
+                self._release(clients)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+            }
+
+    def close(self):
+        """Close the idle clients' connections"""
+        while True:
+            try:
+                clients = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            for client in clients:
+                close = getattr(client, "close", None)
+                if close:
+                    close()
+
+    def _acquire(self, timeout: Optional[float]) -> ApiClients:
+        try:
+            clients = self._idle.get_nowait()
+        except queue.Empty:
+            clients = None
+
+        if clients is None:
+            with self._lock:
+                build = self._created < self.size
+                if build:
+                    self._created += 1
+            if build:
+                try:
+                    clients = self.factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                with self._lock:
+                    self._waits += 1
+                try:
+                    clients = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No Google API client available within {timeout}s") from None
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+        return clients
+
+    def _release(self, clients: ApiClients):
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(clients)
+
+    def _build_clients(self) -> ApiClients:
+        # One connection pool per pair, shared by its Forms and Drive clients
+        http = httplib2.Http(timeout=self.http_timeout)
+        authorized = google_auth_httplib2.AuthorizedHttp(self.credentials, http=http)
+        return ApiClients(
+            forms=discovery_cache.build("forms", "v1", http=authorized),
+            drive=discovery_cache.build("drive", "v3", http=authorized),
+        )
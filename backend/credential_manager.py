@@ -0,0 +1,238 @@
+"""
+Credential Manager
+Proactive, shared refresh of Google OAuth / service account credentials
+
+Google access tokens last about an hour. Left alone, google-auth refreshes
+an expired token inside whichever API request first notices, so a user's
+request pays for the token round trip, and several threads can refresh at
+once and race on token.json. CredentialManager refreshes on a background
+thread a few minutes before expiry, serializes refreshes behind a lock so
+every thread shares the result, writes token.json atomically and keeps
+timing metrics.
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import os
+import tempfile
+import threading
+import time
+
+import google.auth.credentials
+from google.auth.transport.requests import Request
+
+
+class CredentialManager:
+    """Keeps one credentials object fresh for every thread that uses it"""
+
+    def __init__(
+        self,
+        credentials,
+        token_file: Optional[str] = None,
+        refresh_margin: float = 300.0,
+        retry_interval: float = 30.0,
+        request_factory: Callable = Request,
+    ):
+        """
+        Initialize the manager (call start() to refresh in the background)
+
+        Args:
+            credentials: google.auth credentials to keep fresh
+            token_file: Where to save refreshed OAuth tokens (None for service accounts)
+            refresh_margin: Refresh this many seconds before the token expires
+                            (must exceed google-auth's own 3m45s threshold so
+                            requests never refresh first)
+            retry_interval: Base delay before retrying a failed refresh
+            request_factory: Builds the transport used to refresh
+        """
+        self.credentials = credentials
+        self.token_file = token_file
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.request_factory = request_factory
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failures_in_a_row = 0
+        self._metrics = {
+            "refreshes": 0,
+            "background_refreshes": 0,
+            "request_path_refreshes": 0,
+            "failures": 0,
+            "last_refresh_at": None,
+            "last_refresh_seconds": None,
+            "max_refresh_seconds": 0.0,
+            "total_refresh_seconds": 0.0,
+            "last_error": None,
+        }
+
+    def start(self):
+        """Start the background refresh thread (no-op if running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="credential-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def expires_in(self) -> Optional[float]:
+        """Seconds until the current token expires (None if unknown)"""
+        expiry = getattr(self.credentials, "expiry", None)
+        if expiry is None:
+            return None
+        return (expiry - datetime.utcnow()).total_seconds()
+
+    def needs_refresh(self, margin: Optional[float] = None) -> bool:
+        """True if there is no token or it expires within `margin` seconds"""
+        if not getattr(self.credentials, "token", None):
+            return True
+        expires_in = self.expires_in()
+        return expires_in is not None and expires_in <= (self.refresh_margin if margin is None else margin)
+
+    def ensure_valid(self):
+        """Refresh now if the token is actually expired (the request-path fallback)"""
+        if self.needs_refresh(margin=0):
+            self.refresh(source="request_path")
+
+    def refresh(self, force: bool = False, source: str = "background") -> bool:
+        """
+        Refresh the credentials unless another thread just did
+
+        Args:
+            force: Refresh even if the token looks fresh (e.g. after a 401)
+            source: "background" or "request_path", for metrics
+
+        Returns:
+            True if this call refreshed the token
+        """
+        with self._lock:
+            last = self._metrics["last_refresh_at"]
+            if not force and not self.needs_refresh():
+                return False
+            if force and last is not None and time.time() - last < 5:
+                # Another thread refreshed after this caller's 401
+                return False
+
+            start = time.perf_counter()
+            try:
+                self.credentials.refresh(self.request_factory())
+            except Exception as e:
+                self._metrics["failures"] += 1
+                self._metrics["last_error"] = str(e) or e.__class__.__name__
+                raise
+            elapsed = time.perf_counter() - start
+
+            self._metrics["refreshes"] += 1
+            self._metrics[f"{source}_refreshes"] += 1
+            self._metrics["last_refresh_at"] = time.time()
+            self._metrics["last_refresh_seconds"] = elapsed
+            self._metrics["max_refresh_seconds"] = max(self._metrics["max_refresh_seconds"], elapsed)
+            self._metrics["total_refresh_seconds"] += elapsed
+            self._metrics["last_error"] = None
+
+            if self.token_file:
+                write_token_file(self.token_file, self.credentials)
+            print(f"🔄 Google credentials refreshed in {elapsed * 1000:.0f} ms ({source})")
+            return True
+
+    def metrics(self) -> Dict:
+        """Refresh counters and timings"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        refreshes = metrics.pop("total_refresh_seconds")
+        metrics["avg_refresh_seconds"] = refreshes / metrics["refreshes"] if metrics["refreshes"] else None
+        expires_in = self.expires_in()
+        metrics["expires_in_seconds"] = round(expires_in, 1) if expires_in is not None else None
+        metrics["background_refresh_running"] = bool(self._thread and self._thread.is_alive())
+        return metrics
+
+    def authorized_credentials(self) -> "ManagedCredentials":
+        """Credentials to hand to AuthorizedHttp so refreshes go through this manager"""
+        return ManagedCredentials(self)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.refresh()
+                self._failures_in_a_row = 0
+                wait = self._seconds_until_refresh()
+            except Exception as e:
+                self._failures_in_a_row += 1
+                wait = min(self.retry_interval * (2 ** (self._failures_in_a_row - 1)), 300.0)
+                expires_in = self.expires_in()
+                if expires_in is not None and expires_in > 0:
+                    # Keep trying before the token actually runs out
+                    wait = min(wait, max(1.0, expires_in / 2))
+                print(f"⚠️ Google credential refresh failed, retrying in {wait:.0f}s: {e}")
+            self._stopping.wait(wait)
+
+    def _seconds_until_refresh(self) -> float:
+        expires_in = self.expires_in()
+        if expires_in is None:
+            return 300.0  # No expiry known; check again later
+        return max(1.0, expires_in - self.refresh_margin)
+
+
+class ManagedCredentials(google.auth.credentials.Credentials):
+    """
+    Credentials for AuthorizedHttp that route refreshes through a CredentialManager
+
+    A real google.auth Credentials, so googleapiclient treats it like any
+    other (batch requests check `valid` and call `apply` per part). The
+    token, expiry and headers are the manager's credentials'; a refresh is
+    only forced when the token still looks valid, i.e. after a 401.
+    """
+
+    def __init__(self, manager: CredentialManager):
+        # The base initializer isn't called: token and expiry are read
+        # through from the managed credentials, not stored here
+        self.manager = manager
+
+    @property
+    def token(self):
+        return self.manager.credentials.token
+
+    @property
+    def expiry(self):
+        return self.manager.credentials.expiry
+
+    @property
+    def quota_project_id(self):
+        return getattr(self.manager.credentials, "quota_project_id", None)
+
+    @property
+    def universe_domain(self):
+        return getattr(self.manager.credentials, "universe_domain", google.auth.credentials.DEFAULT_UNIVERSE_DOMAIN)
+
+    def apply(self, headers, token=None):
+        self.manager.credentials.apply(headers, token=token)
+
+    def before_request(self, request, method, url, headers):
+        self.manager.ensure_valid()
+        self.apply(headers)
+
+    def refresh(self, request):
+        # Called after a 401 (token looks valid but was rejected) or for an
+        # invalid token; concurrent callers share one refresh
+        self.manager.refresh(force=self.valid, source="request_path")
+
+
+def write_token_file(path: str, credentials):
+    """Save OAuth credentials atomically (temp file + rename), readable only by the owner"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            tmp.write(credentials.to_json())
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
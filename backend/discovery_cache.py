@@ -0,0 +1,162 @@
+"""
+Discovery Cache
+On-disk cache of Google API discovery documents for building API clients
+
+googleapiclient.build() reads and parses a discovery document every time
+it is called (the Drive v3 document alone is several hundred KB), in
+every process. DiscoveryCache keeps each document as a file shared by all
+workers and memoizes the parsed document in-process, then builds clients
+with build_from_document.
+
+Documents are seeded from the copies bundled with googleapiclient, so no
+network access is needed. A cached document is refreshed when the bundled
+copy has a newer revision (the library was upgraded) or, if
+DISCOVERY_CACHE_MAX_AGE is set, when it is older than that and a fresh
+copy can be downloaded.
+"""
+
+from typing import Dict, Optional, Tuple
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+
+import googleapiclient
+from googleapiclient.discovery import build_from_document
+
+
+BUNDLED_DOCUMENTS_DIR = os.path.join(os.path.dirname(googleapiclient.__file__), "discovery_cache", "documents")
+DISCOVERY_URL = "https://{api}.googleapis.com/$discovery/rest?version={version}"
+
+
+class DiscoveryCache:
+    """Disk + in-process cache of discovery documents"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age: Optional[float] = None, download_timeout: float = 5.0):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding the cached documents
+                       (default DISCOVERY_CACHE_DIR or ./discovery_cache)
+            max_age: Seconds after which a cached document is re-downloaded
+                     (default DISCOVERY_CACHE_MAX_AGE; unset means never)
+            download_timeout: Timeout for re-downloading a document
+        """
+        self.cache_dir = cache_dir or os.getenv("DISCOVERY_CACHE_DIR", "./discovery_cache")
+        if max_age is None and os.getenv("DISCOVERY_CACHE_MAX_AGE"):
+            max_age = float(os.getenv("DISCOVERY_CACHE_MAX_AGE"))
+        self.max_age = max_age
+        self.download_timeout = download_timeout
+        self._documents: Dict[Tuple[str, str], dict] = {}
+        self._lock = threading.Lock()
+
+    def build(self, api: str, version: str, **kwargs):
+        """
+        Build an API client from the cached discovery document
+
+        Args:
+            api: API name, e.g. "forms"
+            version: API version, e.g. "v1"
+            **kwargs: Passed to build_from_document (credentials, http, ...)
+
+        Returns:
+            googleapiclient Resource
+        """
+        return build_from_document(self.document(api, version), **kwargs)
+
+    def document(self, api: str, version: str) -> dict:
+        """Get the parsed discovery document, loading it at most once per process"""
+        key = (api, version)
+        document = self._documents.get(key)
+        if document is None:
+            with self._lock:
+                document = self._documents.get(key)
+                if document is None:
+                    document = self._load(api, version)
+                    self._documents[key] = document
+        return document
+
+    def path(self, api: str, version: str) -> str:
+        return os.path.join(self.cache_dir, f"{api}.{version}.json")
+
+    def _load(self, api: str, version: str) -> dict:
+        path = self.path(api, version)
+        cached = _read_document(path)
+        if cached is not None and cached.get("version") != version:
+            print(f"⚠️ Cached discovery document {path} is for version {cached.get('version')}, ignoring it")
+            cached = None
+
+        # Only re-read the bundled copy when it changed after the cache was
+        # written (googleapiclient was installed or upgraded since)
+        bundled_path = os.path.join(BUNDLED_DOCUMENTS_DIR, f"{api}.{version}.json")
+        if cached is None or _mtime(bundled_path) > _mtime(path):
+            bundled = _read_document(bundled_path)
+            if bundled is not None and (cached is None or _revision(bundled) > _revision(cached)):
+                self._save(path, bundled)
+                cached = bundled
+
+        if cached is None or self._expired(path):
+            downloaded = self._download(api, version)
+            if downloaded is not None and (cached is None or _revision(downloaded) >= _revision(cached)):
+                self._save(path, downloaded)
+                cached = downloaded
+
+        if cached is None:
+            raise FileNotFoundError(f"No discovery document available for {api} {version}")
+        return cached
+
+    def _expired(self, path: str) -> bool:
+        if self.max_age is None:
+            return False
+        try:
+            return time.time() - os.path.getmtime(path) > self.max_age
+        except OSError:
+            return True
+
+    def _download(self, api: str, version: str) -> Optional[dict]:
+        url = DISCOVERY_URL.format(api=api, version=version)
+        try:
+            with urllib.request.urlopen(url, timeout=self.download_timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except Exception as e:
+            print(f"⚠️ Could not download discovery document for {api} {version}: {e}")
+            return None
+
+    def _save(self, path: str, document: dict):
+        """Write atomically so concurrent workers never read a partial file"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                json.dump(document, tmp)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # A read-only cache dir only costs the disk cache, not the client
+            print(f"⚠️ Could not write discovery cache {path}: {e}")
+
+
+def _read_document(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _revision(document: dict) -> str:
+    """Discovery revisions are YYYYMMDD strings, so they compare lexically"""
+    return str(document.get("revision", ""))
+
+
+# Shared by every GoogleFormsService in the process
+discovery_cache = DiscoveryCache()
@@ -3,193 +3,178 @@ Email Service
 Handles sending approval emails using SMTP
 """
 
-import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import email.policy
+import html
+import json
 import os
+import string
+import aiosmtplib
 from dotenv import load_dotenv
 
+from smtp_pool import SmtpConnectionPool
+from ttl_cache import TTLCache
+
 load_dotenv()
 
+# How aiosmtplib serializes email.message.Message objects
+SMTP_POLICY = email.policy.compat32.clone(linesep="\r\n")
 
-class EmailService:
-    """Service for sending emails via SMTP"""
+
+class EmailDeliveryError(Exception):
+    """Sending to a recipient list failed part-way; `statuses` holds what already went out"""
+    
+    def __init__(self, statuses: Dict[str, str], cause: Exception):
+        super().__init__(str(cause) or cause.__class__.__name__)
+        self.statuses = statuses
+        self.cause = cause
+
+
+class SafeText(str):
+    """Text that is already escaped for its template (a rendered section) and is inserted as-is"""
+
+
+class EmailTemplate:
+    """
+    A $placeholder template (string.Template syntax) compiled once
+    
+    The source is split into its literal text and the positions of its
+    fields when the template is created, so rendering is a single join
+    instead of re-parsing (or rebuilding) the whole body per message.
+    """
     
     def __init__(
         self,
-        smtp_host: Optional[str] = None,
-        smtp_port: Optional[int] = None,
-        smtp_user: Optional[str] = None,
-        smtp_password: Optional[str] = None
+        source: str,
+        fields: Sequence[str],
+        escape: Callable[[str], str] = str,
+        name: str = "template"
     ):
         """
-        Initialize email service
+        Compile a template
         
         Args:
-            smtp_host: SMTP server hostname
-            smtp_port: SMTP server port
-            smtp_user: SMTP username
-            smtp_password: SMTP password
-        """
-        self.smtp_host = smtp_host or os.getenv("SMTP_HOST", "smtp.gmail.com")
-        self.smtp_port = smtp_port or int(os.getenv("SMTP_PORT", "587"))
-        self.smtp_user = smtp_user or os.getenv("SMTP_USER", "")
-        self.smtp_password = smtp_password or os.getenv("SMTP_PASSWORD", "")
-        
-        # Check if credentials are configured
-        self.is_configured = bool(self.smtp_user and self.smtp_password)
+            source: Template text; $name or ${name} for fields, $$ for "$"
+            fields: Field names the template may use
+            escape: Applied to every field value that is not SafeText
+                (html.escape for HTML templates)
+            name: Template name for error messages
         
-        if not self.is_configured:
-            print("⚠️ Email service not configured. Set SMTP_USER and SMTP_PASSWORD in .env")
+        Raises:
+            ValueError: The source uses an unknown field or a bad placeholder
+        """
+        self.name = name
+        self.escape = escape
+        self._parts: List[str] = []
+        self._slots: List[Tuple[int, str]] = []
+        position = 0
+        for match in string.Template.pattern.finditer(source):
+            field = match.group("named") or match.group("braced")
+            if match.group("invalid") is not None:
+                line = source.count("\n", 0, match.start()) + 1
+                raise ValueError(f"{name}: invalid placeholder on line {line}")
+            if field is not None and field not in fields:
+                raise ValueError(f"{name}: unknown field ${field} (expected one of {', '.join(fields)})")
+            self._parts.append(source[position:match.start()])
+            if field is None:  # $$
+                self._parts.append("$")
+            else:
+                self._slots.append((len(self._parts), field))
+                self._parts.append("")
+            position = match.end()
+        self._parts.append(source[position:])
     
-    async def send_approval_email(
-        self,
-        recipient_email: str,
-        survey_title: str,
-        form_url: str,
-        approver_name: str,
-        custom_message: Optional[str] = None
-    ) -> bool:
+    def render(self, values: Dict[str, Optional[str]]) -> SafeText:
         """
-        Send an approval email with the form link
+        Fill in the fields
         
         Args:
-            recipient_email: Email address of the recipient
-            survey_title: Title of the survey
-            form_url: URL of the Google Form
-            approver_name: Name of the person who approved
-            custom_message: Optional custom message to include
+            values: Field values (missing or None render as "")
         
         Returns:
-            True if email sent successfully, False otherwise
+            The rendered text, safe to insert into another template of the same kind
         """
-        if not self.is_configured:
-            print("⚠️ Cannot send email: SMTP not configured")
-            print(f"📧 Would have sent email to: {recipient_email}")
-            print(f"📝 Survey: {survey_title}")
-            print(f"🔗 Form URL: {form_url}")
-            return False
-        
-        try:
-            # Create message
-            message = MIMEMultipart("alternative")
-            message["Subject"] = f"Survey Approved: {survey_title}"
-            message["From"] = self.smtp_user
-            message["To"] = recipient_email
-            
-            # Create email body
-            text_body = self._create_text_email_body(
-                survey_title, form_url, approver_name, custom_message
-            )
-            html_body = self._create_html_email_body(
-                survey_title, form_url, approver_name, custom_message
-            )
-            
-            # Attach both plain text and HTML versions
-            part1 = MIMEText(text_body, "plain")
-            part2 = MIMEText(html_body, "html")
-            message.attach(part1)
-            message.attach(part2)
-            
-            # Send email
-            await aiosmtplib.send(
-                message,
-                hostname=self.smtp_host,
-                port=self.smtp_port,
-                username=self.smtp_user,
-                password=self.smtp_password,
-                start_tls=True
-            )
-            
-            print(f"✅ Email sent successfully to {recipient_email}")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error sending email: {e}")
-            return False
-    
-    def _create_text_email_body(
-        self,
-        survey_title: str,
-        form_url: str,
-        approver_name: str,
-        custom_message: Optional[str] = None
-    ) -> str:
-        """Create plain text email body"""
-        body = f"""
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            value = values.get(field)
+            if value:
+                parts[index] = value if isinstance(value, SafeText) else self.escape(str(value))
+        return SafeText("".join(parts))
+
+
+# Fields each approval template may use; approval_message.* is rendered
+# into ${custom_message_section} when the approver added a message
+APPROVAL_TEMPLATE_FIELDS = {
+    "approval.txt": ("survey_title", "form_url", "approver_name", "custom_message_section"),
+    "approval.html": ("survey_title", "form_url", "approver_name", "custom_message_section"),
+    "approval_message.txt": ("custom_message",),
+    "approval_message.html": ("custom_message",),
+}
+
+DEFAULT_TEMPLATES = {
+    "approval.txt": """
 Survey Approval Notification
 
 Hello,
 
-The survey "{survey_title}" has been approved by {approver_name}.
+The survey "${survey_title}" has been approved by ${approver_name}.
 
 You can now access and share the survey using the following link:
-{form_url}
-
-"""
-        if custom_message:
-            body += f"""
-Message from the approver:
-{custom_message}
+${form_url}
 
-"""
-        
-        body += """
+${custom_message_section}
 Thank you for using SurveyForge!
 
 ---
 This is an automated message from the Survey Creation & Review System.
-"""
-        return body
-    
-    def _create_html_email_body(
-        self,
-        survey_title: str,
-        form_url: str,
-        approver_name: str,
-        custom_message: Optional[str] = None
-    ) -> str:
-        """Create HTML email body"""
-        html = f"""
+""",
+    "approval_message.txt": """
+Message from the approver:
+${custom_message}
+
+""",
+    "approval.html": """
 <!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <style>
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
             line-height: 1.6;
             color: #333;
             max-width: 600px;
             margin: 0 auto;
             padding: 20px;
-        }}
-        .header {{
+        }
+        .header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 30px;
             border-radius: 8px 8px 0 0;
             text-align: center;
-        }}
-        .header h1 {{
+        }
+        .header h1 {
             margin: 0;
             font-size: 24px;
-        }}
-        .content {{
+        }
+        .content {
             background: #ffffff;
             padding: 30px;
             border: 1px solid #e5e7eb;
             border-top: none;
-        }}
-        .survey-title {{
+        }
+        .survey-title {
             font-size: 20px;
             font-weight: 600;
             color: #667eea;
             margin: 20px 0;
-        }}
-        .button {{
+        }
+        .button {
             display: inline-block;
             padding: 12px 30px;
             background: #667eea;
@@ -198,18 +183,18 @@ This is an automated message from the Survey Creation & Review System.
             border-radius: 6px;
             font-weight: 600;
             margin: 20px 0;
-        }}
-        .button:hover {{
+        }
+        .button:hover {
             background: #5568d3;
-        }}
-        .custom-message {{
+        }
+        .custom-message {
             background: #f9fafb;
             border-left: 4px solid #667eea;
             padding: 15px;
             margin: 20px 0;
             font-style: italic;
-        }}
-        .footer {{
+        }
+        .footer {
             background: #f9fafb;
             padding: 20px;
             border-radius: 0 0 8px 8px;
@@ -218,11 +203,11 @@ This is an automated message from the Survey Creation & Review System.
             color: #6b7280;
             border: 1px solid #e5e7eb;
             border-top: none;
-        }}
-        .approved-by {{
+        }
+        .approved-by {
             color: #059669;
             font-weight: 600;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -235,28 +220,18 @@ This is an automated message from the Survey Creation & Review System.
         
         <p>Great news! The survey has been approved and is ready to share.</p>
         
-        <div class="survey-title">"{survey_title}"</div>
-        
-        <p>Approved by: <span class="approved-by">{approver_name}</span></p>
-"""
+        <div class="survey-title">"${survey_title}"</div>
         
-        if custom_message:
-            html += f"""
-        <div class="custom-message">
-            <strong>Message from the approver:</strong><br>
-            {custom_message}
-        </div>
-"""
-        
-        html += f"""
+        <p>Approved by: <span class="approved-by">${approver_name}</span></p>
+${custom_message_section}
         <p>Click the button below to access the survey:</p>
         
         <center>
-            <a href="{form_url}" class="button">Open Survey Form</a>
+            <a href="${form_url}" class="button">Open Survey Form</a>
         </center>
         
         <p style="font-size: 12px; color: #6b7280; margin-top: 20px;">
-            Or copy this link: <a href="{form_url}">{form_url}</a>
+            Or copy this link: <a href="${form_url}">${form_url}</a>
         </p>
     </div>
     
@@ -266,8 +241,339 @@ This is an automated message from the Survey Creation & Review System.
     </div>
 </body>
 </html>
-"""
-        return html
+""",
+    "approval_message.html": """
+        <div class="custom-message">
+            <strong>Message from the approver:</strong><br>
+            ${custom_message}
+        </div>
+""",
+}
+
+
+def load_email_templates(directory: Optional[str] = None) -> Dict[str, EmailTemplate]:
+    """
+    Compile the approval email templates
+    
+    Args:
+        directory: Folder with custom approval.txt, approval.html,
+            approval_message.txt and/or approval_message.html; the built-in
+            template is used for any file that is missing
+    
+    Returns:
+        {template name: EmailTemplate}
+    
+    Raises:
+        ValueError: A custom template uses an unknown field or a bad placeholder
+    """
+    templates = {}
+    for name, fields in APPROVAL_TEMPLATE_FIELDS.items():
+        source = DEFAULT_TEMPLATES[name]
+        path = os.path.join(directory, name) if directory else None
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+            print(f"📝 Loaded custom email template {path}")
+        escape = html.escape if name.endswith(".html") else str
+        templates[name] = EmailTemplate(source, fields, escape=escape, name=path or name)
+    return templates
+
+
+class RenderedApproval(NamedTuple):
+    """A survey's approval email, rendered once and shared by every message sent for it"""
+    text: str
+    html: str
+    data: bytes  # The serialized MIME message without its To header
+
+
+class EmailService:
+    """Service for sending emails via SMTP"""
+    
+    def __init__(
+        self,
+        smtp_host: Optional[str] = None,
+        smtp_port: Optional[int] = None,
+        smtp_user: Optional[str] = None,
+        smtp_password: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        templates_dir: Optional[str] = None
+    ):
+        """
+        Initialize email service
+        
+        Args:
+            smtp_host: SMTP server hostname
+            smtp_port: SMTP server port
+            smtp_user: SMTP username
+            smtp_password: SMTP password
+            pool_size: Number of SMTP connections kept open (SMTP_POOL_SIZE, default 4)
+            templates_dir: Folder with custom email templates (EMAIL_TEMPLATES_DIR)
+        
+        Raises:
+            ValueError: A custom email template is invalid
+        """
+        self.smtp_host = smtp_host or os.getenv("SMTP_HOST", "smtp.gmail.com")
+        self.smtp_port = smtp_port or int(os.getenv("SMTP_PORT", "587"))
+        self.smtp_user = smtp_user or os.getenv("SMTP_USER", "")
+        self.smtp_password = smtp_password or os.getenv("SMTP_PASSWORD", "")
+        
+        self.pool_size = pool_size or int(os.getenv("SMTP_POOL_SIZE", "4"))
+        # RCPT TO commands per message; servers commonly accept at least 100
+        self.max_recipients = int(os.getenv("SMTP_MAX_RECIPIENTS", "100"))
+        # Disable only for local relays without TLS (e.g. a development mail sink)
+        self.start_tls = os.getenv("SMTP_START_TLS", "true").lower() != "false"
+        
+        # Templates are compiled once; rendered bodies are reused for every
+        # recipient and retry of the same survey approval
+        self.templates = load_email_templates(templates_dir or os.getenv("EMAIL_TEMPLATES_DIR") or None)
+        self._rendered_bodies = TTLCache(max_entries=int(os.getenv("EMAIL_RENDER_CACHE_SIZE", "1000")))
+        
+        # Check if credentials are configured
+        self.is_configured = bool(self.smtp_user and self.smtp_password)
+        
+        # Authenticated connections are reused across sends instead of
+        # connecting, STARTTLS-ing and logging in for every message
+        self.pool = SmtpConnectionPool(
+            hostname=self.smtp_host,
+            port=self.smtp_port,
+            username=self.smtp_user,
+            password=self.smtp_password,
+            size=self.pool_size,
+            start_tls=self.start_tls
+        )
+        
+        if not self.is_configured:
+            print("⚠️ Email service not configured. Set SMTP_USER and SMTP_PASSWORD in .env")
+    
+    async def send_approval_email(
+        self,
+        recipient_email: str,
+        survey_title: str,
+        form_url: str,
+        approver_name: str,
+        custom_message: Optional[str] = None
+    ) -> bool:
+        """
+        Send an approval email with the form link
+        
+        Args:
+            recipient_email: Email address of the recipient
+            survey_title: Title of the survey
+            form_url: URL of the Google Form
+            approver_name: Name of the person who approved
+            custom_message: Optional custom message to include
+        
+        Returns:
+            True if email sent successfully, False otherwise
+        """
+        try:
+            return await self.deliver_approval_email(
+                recipient_email, survey_title, form_url, approver_name, custom_message
+            )
+        except Exception as e:
+            print(f"❌ Error sending email: {e}")
+            return False
+    
+    async def deliver_approval_email(
+        self,
+        recipient_email: str,
+        survey_title: str,
+        form_url: str,
+        approver_name: str,
+        custom_message: Optional[str] = None
+    ) -> bool:
+        """
+        Send an approval email, raising on failure so the caller can retry
+        
+        Args:
+            recipient_email: Email address of the recipient
+            survey_title: Title of the survey
+            form_url: URL of the Google Form
+            approver_name: Name of the person who approved
+            custom_message: Optional custom message to include
+        
+        Returns:
+            True if the email was sent, False if SMTP is not configured
+        
+        Raises:
+            aiosmtplib.SMTPException, OSError: The SMTP server could not be
+                reached or refused the message
+        """
+        if not self.is_configured:
+            print("⚠️ Cannot send email: SMTP not configured")
+            print(f"📧 Would have sent email to: {recipient_email}")
+            print(f"📝 Survey: {survey_title}")
+            print(f"🔗 Form URL: {form_url}")
+            return False
+        
+        data = self._approval_message_bytes(
+            recipient_email, survey_title, form_url, approver_name, custom_message
+        )
+        
+        # Send email over a pooled connection
+        await self.pool.sendmail(self.smtp_user, [recipient_email], data)
+        
+        print(f"✅ Email sent successfully to {recipient_email}")
+        return True
+    
+    async def deliver_approval_emails(
+        self,
+        recipients: Sequence[str],
+        survey_title: str,
+        form_url: str,
+        approver_name: str,
+        custom_message: Optional[str] = None,
+        on_progress: Optional[Callable[[Dict[str, str]], None]] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Send one approval email to a list of recipients
+        
+        The message is rendered and serialized once, then sent over a single
+        SMTP session as one message per `max_recipients` RCPT TO addresses.
+        Recipients only see themselves (or no one, for lists) in the To header.
+        
+        Args:
+            recipients: Email addresses to send to
+            survey_title: Title of the survey
+            form_url: URL of the Google Form
+            approver_name: Name of the person who approved
+            custom_message: Optional custom message to include
+            on_progress: Called (on a worker thread) with the statuses so far
+                         after each message; raising stops the delivery
+        
+        Returns:
+            {recipient: "sent" or "refused: <SMTP reply>"}, or None if SMTP
+            is not configured
+        
+        Raises:
+            EmailDeliveryError: The session failed; its `statuses` list the
+                recipients handled before the failure
+        """
+        if not self.is_configured:
+            print(f"⚠️ Cannot send email: SMTP not configured (would have sent to {len(recipients)} recipients)")
+            return None
+        
+        to_header = recipients[0] if len(recipients) == 1 else "undisclosed-recipients:;"
+        data = self._approval_message_bytes(
+            to_header, survey_title, form_url, approver_name, custom_message
+        )
+        
+        statuses: Dict[str, str] = {}
+        try:
+            async with self.pool.connection() as smtp:
+                for start in range(0, len(recipients), self.max_recipients):
+                    chunk = list(recipients[start:start + self.max_recipients])
+                    try:
+                        refused, _ = await smtp.sendmail(self.smtp_user, chunk, data)
+                    except aiosmtplib.SMTPRecipientsRefused as e:
+                        refused = {error.recipient: error for error in e.recipients}
+                    for recipient in chunk:
+                        error = refused.get(recipient)
+                        statuses[recipient] = f"refused: {error.code} {error.message}" if error else "sent"
+                    if on_progress:
+                        await asyncio.to_thread(on_progress, dict(statuses))
+        except Exception as e:
+            raise EmailDeliveryError(statuses, e) from e
+        
+        sent = sum(1 for status in statuses.values() if status == "sent")
+        print(f"✅ Approval email sent to {sent}/{len(recipients)} recipients")
+        return statuses
+    
+    def _create_approval_message(
+        self,
+        to_header: str,
+        survey_title: str,
+        form_url: str,
+        approver_name: str,
+        custom_message: Optional[str] = None
+    ) -> MIMEMultipart:
+        """Build the approval email (plain text and HTML alternatives)"""
+        rendered = self._render_approval(survey_title, form_url, approver_name, custom_message)
+        return self._build_approval_message(to_header, survey_title, rendered.text, rendered.html)
+    
+    def _approval_message_bytes(
+        self,
+        to_header: str,
+        survey_title: str,
+        form_url: str,
+        approver_name: str,
+        custom_message: Optional[str] = None
+    ) -> bytes:
+        """The serialized approval email for one To header"""
+        rendered = self._render_approval(survey_title, form_url, approver_name, custom_message)
+        return SMTP_POLICY.fold_binary("To", to_header) + rendered.data
+    
+    def _build_approval_message(
+        self,
+        to_header: Optional[str],
+        survey_title: str,
+        text_body: str,
+        html_body: str
+    ) -> MIMEMultipart:
+        message = MIMEMultipart("alternative")
+        message["Subject"] = f"Survey Approved: {survey_title}"
+        message["From"] = self.smtp_user
+        if to_header is not None:
+            message["To"] = to_header
+        
+        # Attach both plain text and HTML versions
+        part1 = MIMEText(text_body, "plain")
+        part2 = MIMEText(html_body, "html")
+        message.attach(part1)
+        message.attach(part2)
+        return message
+    
+    def _create_text_email_body(
+        self,
+        survey_title: str,
+        form_url: str,
+        approver_name: str,
+        custom_message: Optional[str] = None
+    ) -> str:
+        """Create plain text email body"""
+        return self._render_approval(survey_title, form_url, approver_name, custom_message).text
+    
+    def _create_html_email_body(
+        self,
+        survey_title: str,
+        form_url: str,
+        approver_name: str,
+        custom_message: Optional[str] = None
+    ) -> str:
+        """Create HTML email body"""
+        return self._render_approval(survey_title, form_url, approver_name, custom_message).html
+    
+    def _render_approval(
+        self,
+        survey_title: str,
+        form_url: str,
+        approver_name: str,
+        custom_message: Optional[str] = None
+    ) -> RenderedApproval:
+        """
+        Render a survey's approval email, or reuse it while the survey's inputs are unchanged
+        
+        The MIME encoding and serialization, which cost far more than the
+        templates, are done here once per survey instead of once per message.
+        """
+        key = (survey_title, form_url, approver_name, custom_message)
+        rendered = self._rendered_bodies.get(key)
+        if rendered is None:
+            text_body, html_body = (
+                self.templates[f"approval.{kind}"].render({
+                    "survey_title": survey_title,
+                    "form_url": form_url,
+                    "approver_name": approver_name,
+                    "custom_message_section": self.templates[f"approval_message.{kind}"].render(
+                        {"custom_message": custom_message}
+                    ) if custom_message else "",
+                })
+                for kind in ("txt", "html")
+            )
+            message = self._build_approval_message(None, survey_title, text_body, html_body)
+            rendered = RenderedApproval(text_body, html_body, message.as_bytes(policy=SMTP_POLICY))
+            self._rendered_bodies.set(key, rendered)
+        return rendered
     
     async def send_notification_email(
         self,
@@ -297,15 +603,8 @@ This is an automated message from the Survey Creation & Review System.
             email_message["From"] = self.smtp_user
             email_message["To"] = recipient_email
             
-            # Send email
-            await aiosmtplib.send(
-                email_message,
-                hostname=self.smtp_host,
-                port=self.smtp_port,
-                username=self.smtp_user,
-                password=self.smtp_password,
-                start_tls=True
-            )
+            # Send email over a pooled connection
+            await self.pool.send_message(email_message)
             
             print(f"✅ Notification email sent to {recipient_email}")
             return True
@@ -313,6 +612,35 @@ This is an automated message from the Survey Creation & Review System.
         except Exception as e:
             print(f"❌ Error sending notification email: {e}")
             return False
+    
+    async def close(self):
+        """Close the pooled SMTP connections"""
+        await self.pool.close()
+
+
+def load_distribution_lists(path: str) -> Dict[str, List[str]]:
+    """
+    Load named distribution lists from a JSON file
+    
+    Args:
+        path: JSON file mapping list names to arrays of email addresses
+    
+    Returns:
+        {list name: [email, ...]} (empty if the file does not exist)
+    
+    Raises:
+        ValueError: The file is not a JSON object of string arrays
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        lists = json.load(f)
+    if not isinstance(lists, dict) or not all(
+        isinstance(members, list) and all(isinstance(member, str) for member in members)
+        for members in lists.values()
+    ):
+        raise ValueError(f"{path} must map list names to arrays of email addresses")
+    return lists
 
 
 # Example usage
@@ -0,0 +1,65 @@
+"""
+Event Loop Thread
+An asyncio event loop running on its own daemon thread
+
+Job workers are plain threads, but email sending is async (aiosmtplib).
+EventLoopThread gives them one long-lived loop to run coroutines on, so
+state bound to a loop - like the pooled SMTP connections - survives from
+one job to the next instead of being rebuilt by asyncio.run() each time.
+"""
+
+from typing import Any, Coroutine, Optional
+import asyncio
+import threading
+
+
+class EventLoopThread:
+    """Runs coroutines submitted from other threads on a private event loop"""
+
+    def __init__(self, name: str = "event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def run(self, coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and wait for its result (starts the loop if needed)
+
+        Raises:
+            Whatever the coroutine raises; TimeoutError if it takes longer than timeout
+        """
+        loop = self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout)
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread (no-op if running) and return the loop"""
+        with self._lock:
+            if self.running:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_forever():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                loop.close()
+
+            self._thread = threading.Thread(target=run_forever, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the loop after the callbacks already scheduled on it"""
+        with self._lock:
+            if not self.running:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
@@ -0,0 +1,76 @@
+"""
+Form Creation Executor
+Runs blocking Google Forms API calls off the event loop on a bounded thread pool
+
+GoogleFormsService.create_form makes several synchronous googleapiclient
+round trips. Calling it directly from an async endpoint blocks the whole
+uvicorn worker; running it here keeps the event loop free to serve other
+requests while at most `max_concurrency` forms are being built.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+import asyncio
+import threading
+
+
+class FormCreationExecutor:
+    """Bounded thread pool for blocking form-creation work"""
+
+    def __init__(self, max_concurrency: int = 1):
+        """
+        Initialize the executor
+
+        Args:
+            max_concurrency: Maximum number of forms created at the same time.
+                             Extra submissions wait in the pool's queue.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="form-create")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._pending = 0
+        self._completed = 0
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Schedule a blocking call on the pool
+
+        Returns:
+            concurrent.futures.Future with the call's result
+        """
+        with self._lock:
+            self._pending += 1
+        return self._pool.submit(self._track, partial(func, *args, **kwargs))
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the pool and await its result"""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, int]:
+        """Current pool usage"""
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queued": self._pending,
+                "completed": self._completed,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release the worker threads"""
+        self._pool.shutdown(wait=wait)
+
+    def _track(self, call: Callable) -> Any:
+        with self._lock:
+            self._pending -= 1
+            self._active += 1
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
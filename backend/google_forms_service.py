@@ -10,24 +10,118 @@ from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from typing import List, Dict, Optional
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Dict, Optional, Sequence, Tuple, Union
+import functools
 import os
+import re
+import threading
 import time
 import json
 
+from client_pool import GoogleClientPool
+from credential_manager import CredentialManager, write_token_file
+from permission_batcher import Grant, PermissionBatcher
+from quota_scheduler import QuotaScheduler, is_rate_limit_error, retry_after_seconds
+from retry_policy import RetryPolicy
+
+
+class FormBuildError(Exception):
+    """A form build step failed; `state` lets create_form resume where it stopped"""
+    
+    def __init__(self, state: Dict, cause: Exception):
+        self.state = state
+        self.cause = cause
+        done = ", ".join(state.get("completed", [])) or "nothing"
+        super().__init__(f"{cause} (completed: {done})")
+
+
+def _uses_clients(method):
+    """Run a GoogleFormsService method with a client pair checked out"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.clients():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _complete_step(state: Dict, step: str):
+    """Record a finished build step"""
+    if step not in state["completed"]:
+        state["completed"].append(step)
+
+
+# Question text parsing: the numbering/bullet prefix stripped from a
+# question or option, and the [TYPE] markers that set a question's type
+_QUESTION_DIGITS = frozenset("0123456789")
+_BULLETS = frozenset("-*•")
+_QUESTION_PREFIX = re.compile(r"[0-9.\-*•() ]*\s*")
+_OPTION_PREFIX = re.compile(r"[\-*•() ]*\s*")
+_TYPE_MARKER = re.compile(r"\[(PARAGRAPH|LONG|MULTIPLE_CHOICE|RADIO|CHECKBOX|DROPDOWN|TEXT|SHORT)\]")
+# (type, markers removed from the title), highest precedence first
+_QUESTION_TYPES = [
+    ("PARAGRAPH", ("[PARAGRAPH]", "[LONG]")),
+    ("MULTIPLE_CHOICE", ("[MULTIPLE_CHOICE]", "[RADIO]")),
+    ("CHECKBOX", ("[CHECKBOX]",)),
+    ("DROPDOWN", ("[DROPDOWN]",)),
+    ("TEXT", ("[TEXT]", "[SHORT]")),
+]
+_MARKER_PRECEDENCE = {
+    marker[1:-1]: rank for rank, (_, markers) in enumerate(_QUESTION_TYPES) for marker in markers
+}
+
+
+def _question_type(question_text: str) -> Tuple[str, str]:
+    """A question's type from its [TYPE] markers, and its title without them"""
+    match = _TYPE_MARKER.search(question_text)
+    if not match:
+        return "TEXT", question_text
+    rank = _MARKER_PRECEDENCE[match.group(1)]
+    # Markers that take precedence over the first one can only come after it
+    for higher in range(rank):
+        if any(question_text.find(marker, match.end()) >= 0 for marker in _QUESTION_TYPES[higher][1]):
+            rank = higher
+            break
+    question_type, markers = _QUESTION_TYPES[rank]
+    for marker in markers:
+        question_text = question_text.replace(marker, "")
+    return question_type, question_text.strip()
+
+
+def _text_lines(text: str) -> Iterator[str]:
+    """The lines of a string, split on \\n only, without copying it whole"""
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
 
 class GoogleFormsService:
     """Service class for interacting with Google Forms API"""
     
+    # Stores the user's access and refresh tokens between runs
+    TOKEN_FILE = 'token.json'
+    
     SCOPES = [
         'https://www.googleapis.com/auth/forms.body',
         'https://www.googleapis.com/auth/drive',
         'https://www.googleapis.com/auth/drive.file'
     ]
     
-    def __init__(self, credentials_file: str = "credentials.json", use_oauth: bool = False, oauth_credentials_file: str = "credentials-oauth.json"):
+    def __init__(
+        self,
+        credentials_file: str = "credentials.json",
+        use_oauth: bool = False,
+        oauth_credentials_file: str = "credentials-oauth.json",
+        quota_scheduler: Optional[QuotaScheduler] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        client_pool_size: int = 4
+    ):
         """
         Initialize the Google Forms service
         
@@ -36,13 +130,24 @@ class GoogleFormsService:
             use_oauth: If True, use OAuth 2.0 (recommended, 100% success rate)
                       If False, use Service Account (10-30% success rate)
             oauth_credentials_file: Path to OAuth 2.0 credentials (for Desktop app)
+            quota_scheduler: Shared scheduler every Forms/Drive call goes through
+                             (a private one is created if omitted)
+            retry_policy: Backoff policy for transient API failures
+            client_pool_size: Number of Forms/Drive client pairs, i.e. how many
+                              threads can call the APIs at the same time
         """
         self.credentials_file = credentials_file
         self.oauth_credentials_file = oauth_credentials_file
         self.use_oauth = use_oauth
+        self.quota = quota_scheduler or QuotaScheduler()
+        self.retry = retry_policy or RetryPolicy()
+        self.client_pool_size = client_pool_size
         self.credentials = None
+        self.credential_manager: Optional[CredentialManager] = None
         self.forms_service = None
         self.drive_service = None
+        self._local = threading.local()
+        self.permission_batcher = PermissionBatcher(self._grant_permissions)
         self._initialize_services()
     
     def _initialize_services(self):
@@ -56,11 +161,22 @@ class GoogleFormsService:
                 print("⚠️  Consider switching to OAuth 2.0 by setting use_oauth=True")
                 self._initialize_service_account()
             
-            # Build Forms API service
-            self.forms_service = build('forms', 'v1', credentials=self.credentials, cache_discovery=False)
+            # Refresh tokens in the background before they expire, so no
+            # API request has to wait for a refresh
+            self.credential_manager = CredentialManager(
+                self.credentials,
+                token_file=self.TOKEN_FILE if self.use_oauth else None
+            )
+            self.credential_manager.start()
             
-            # Build Drive API service (for sharing forms)
-            self.drive_service = build('drive', 'v3', credentials=self.credentials, cache_discovery=False)
+            # Forms and Drive API clients, one pair per concurrent caller
+            # (httplib2 is not thread-safe). Discovery documents come from
+            # the on-disk cache, no download or re-parse per client.
+            self.pool = GoogleClientPool(
+                self.credential_manager.authorized_credentials(),
+                size=self.client_pool_size
+            )
+            self.pool.warm_up()
             
             print("✅ Google Forms and Drive services initialized successfully")
             
@@ -88,7 +204,7 @@ class GoogleFormsService:
     def _initialize_oauth(self):
         """Initialize OAuth 2.0 credentials (User consent flow)"""
         creds = None
-        token_file = 'token.json'
+        token_file = self.TOKEN_FILE
         
         # Token file stores user's access and refresh tokens
         if os.path.exists(token_file):
@@ -110,8 +226,7 @@ class GoogleFormsService:
                 creds = flow.run_local_server(port=0)
             
             # Save credentials for next run
-            with open(token_file, 'w') as token:
-                token.write(creds.to_json())
+            write_token_file(token_file, creds)
             print("✅ OAuth token saved to token.json")
         
         self.credentials = creds
@@ -127,15 +242,80 @@ class GoogleFormsService:
             scopes=self.SCOPES
         )
     
+    # Set by _initialize_services; without a pool (e.g. fakes in tests) the
+    # forms_service/drive_service attributes are used directly
+    pool: Optional[GoogleClientPool] = None
+    _local = None
+    # Set in __init__; without one each build sends its own permission batch
+    permission_batcher: Optional[PermissionBatcher] = None
+    
+    @property
+    def forms_service(self):
+        """Forms API client checked out by the current thread"""
+        clients = getattr(self._local, "clients", None)
+        return clients.forms if clients else self._forms_service
+    
+    @forms_service.setter
+    def forms_service(self, value):
+        self._forms_service = value
+    
+    @property
+    def drive_service(self):
+        """Drive API client checked out by the current thread"""
+        clients = getattr(self._local, "clients", None)
+        return clients.drive if clients else self._drive_service
+    
+    @drive_service.setter
+    def drive_service(self, value):
+        self._drive_service = value
+    
+    @contextmanager
+    def clients(self):
+        """Check out a client pair from the pool for the current thread (re-entrant)"""
+        if self.pool is None or getattr(self._local, "clients", None) is not None:
+            yield
+            return
+        with self.pool.checkout() as clients:
+            self._local.clients = clients
+            try:
+                yield
+            finally:
+                self._local.clients = None
+    
+    @_uses_clients
     def create_form(
         self,
         title: str,
         description: str,
         questions: Optional[List[Dict]] = None,
-        owner_email: Optional[str] = None
+        owner_email: Optional[str] = None,
+        is_quiz: bool = False,
+        resume_state: Optional[Dict] = None,
+        grant_permissions: bool = True
     ) -> Dict:
         """
-        Create a new Google Form (single attempt, no retries)
+        Create a new Google Form, retrying transient failures step by step
+        
+        The build runs as steps: create -> questions -> public -> share.
+        Each step is recorded in a build state once done, so a retry never
+        recreates the form or re-sends work that already went through. The
+        create step is sent once (forms().create is not idempotent, and a
+        timeout can hide a form that was created; only 429s, which the API
+        rejected, are re-queued by the quota scheduler); the later steps
+        are retried with backoff (see RetryPolicy). If a step still fails, a
+        FormBuildError carrying the state is raised; pass that state back
+        as resume_state to continue from the failed step.
+        
+        The permissions are best-effort: the form is returned even if it
+        could not be made public or shared, with the failures listed in
+        permission_errors. With grant_permissions=False the build stops
+        after the questions step, for callers that grant many forms at once
+        with grant_form_permissions.
+        
+        Uses the minimum number of round trips: one forms().create (the API
+        only accepts the title there), one batchUpdate carrying the
+        description, settings and every question, and one batched Drive
+        request for the permissions.
         
         Args:
             title: Form title
@@ -148,53 +328,68 @@ class GoogleFormsService:
                           "options": List[str] (for choice-based questions)
                       }
             owner_email: Email address to share the form with as owner (optional)
+            is_quiz: Turn the form into a quiz
+            resume_state: Build state from a previous FormBuildError
+            grant_permissions: Run the public and share steps
         
         Returns:
             Dict with form details: {
                 "form_id": str,
                 "form_url": str,
                 "responder_uri": str,
-                "title": str
+                "title": str,
+                "edit_url": str,
+                "round_trips": int (API round trips used to build the form),
+                "permission_errors": Dict of "public"/"share" -> error for
+                                     the permissions that could not be granted
             }
+        
+        Raises:
+            FormBuildError: A step failed after all retries
         """
+        state = dict(resume_state or {})
+        state["completed"] = list(state.get("completed", []))
+        state.setdefault("round_trips", 0)
+        
         try:
-            # Create the form
-            form_body = {
-                "info": {
-                    "title": title,
-                    "documentTitle": title  # Important: prevents some edge case failures
-                }
-            }
-            
-            # Add description if provided
-            if description:
-                form_body["info"]["description"] = description
-            
-            # Create the form (single attempt)
-            result = self.forms_service.forms().create(body=form_body).execute()
-            
-            form_id = result['formId']
-            form_url = result['responderUri']
-            
-            print(f"✅ Created form: {title} (ID: {form_id})")
+            if "create" not in state["completed"]:
+                self._create_step(state, title)
+            form_id = state["form_id"]
             
-            # Add questions if provided
-            if questions:
-                self.add_questions_to_form(form_id, questions)
+            if "questions" not in state["completed"]:
+                # Description, settings and questions in a single batchUpdate
+                update_requests = self.build_form_update_requests(description, questions, is_quiz=is_quiz)
+                if update_requests:
+                    self.retry.call(self._questions_step, state, update_requests, description="Update form")
+                _complete_step(state, "questions")
             
-            # Make the form publicly accessible
-            self._make_form_public(form_id)
-            
-            # Share the form with the creator so they can see it in Drive
-            if owner_email:
-                self._share_form_with_owner(form_id, owner_email)
+            # Make the form public and share it with the creator in one
+            # batched Drive request (one round trip for both permissions)
+            if not owner_email:
+                _complete_step(state, "share")
+            permission_errors = {}
+            if grant_permissions and ("public" not in state["completed"] or "share" not in state["completed"]):
+                try:
+                    self.retry.call(self._permissions_step, state, owner_email, description="Grant permissions")
+                except Exception as error:
+                    # The form is usable without them: report, don't fail the build
+                    permission_errors = {
+                        step: str(error)
+                        for step, error in state.pop("permission_errors", {}).items()
+                    } or {
+                        step: str(error)
+                        for step in ("public", "share") if step not in state["completed"]
+                    }
+                    print(f"⚠️ Could not grant {', '.join(permission_errors)} permission for form {form_id}: {error}")
             
             return {
                 "form_id": form_id,
-                "form_url": form_url,
-                "responder_uri": form_url,
+                "form_url": state["form_url"],
+                "responder_uri": state["form_url"],
                 "title": title,
-                "edit_url": f"https://docs.google.com/forms/d/{form_id}/edit"
+                "edit_url": f"https://docs.google.com/forms/d/{form_id}/edit",
+                "round_trips": state["round_trips"],
+                "permission_errors": permission_errors
             }
             
         except HttpError as error:
@@ -207,11 +402,170 @@ class GoogleFormsService:
             else:
                 print("⚠️ Service accounts have only 10-30% success rate with Forms API")
                 print("💡 SOLUTION: Switch to OAuth 2.0 (set USE_OAUTH=true in .env)")
-            raise
+            raise FormBuildError(state, error) from error
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
-            raise
+            raise FormBuildError(state, e) from e
+    
+    def _create_step(self, state: Dict, title: str):
+        """Build step: create the form (forms().create only accepts the title)"""
+        form_body = {
+            "info": {
+                "title": title,
+                "documentTitle": title  # Important: prevents some edge case failures
+            }
+        }
+        state["round_trips"] += 1
+        result = self.quota.execute(
+            self.forms_service.forms().create(body=form_body), "forms", "write"
+        )
+        state["form_id"] = result['formId']
+        state["form_url"] = result['responderUri']
+        _complete_step(state, "create")
+        print(f"✅ Created form: {title} (ID: {state['form_id']})")
+    
+    def _questions_step(self, state: Dict, update_requests: List[Dict]):
+        """Build step: apply the batchUpdate, unless a failed attempt already did"""
+        form_id = state["form_id"]
+        if state.get("questions_attempted"):
+            # batchUpdate is atomic, but a timeout or 5xx can hide a success;
+            # re-sending it would duplicate every question
+            state["round_trips"] += 1
+            form = self.quota.execute(self.forms_service.forms().get(formId=form_id), "forms", "read")
+            expected_items = sum(1 for request in update_requests if "createItem" in request)
+            if expected_items and len(form.get("items", [])) >= expected_items:
+                print(f"ℹ️  Form {form_id} already has its questions, skipping batchUpdate")
+                _complete_step(state, "questions")
+                return
+        
+        state["questions_attempted"] = True
+        state["round_trips"] += 1
+        self.quota.execute(
+            self.forms_service.forms().batchUpdate(
+                formId=form_id,
+                body={"requests": update_requests}
+            ),
+            "forms", "write"
+        )
+        _complete_step(state, "questions")
+        print(f"✅ Applied {len(update_requests)} updates to form {form_id} in one batch")
+    
+    def _permissions_step(self, state: Dict, owner_email: Optional[str]):
+        """Build step: grant the permissions that are still missing"""
+        form_id = state["form_id"]
+        # Worked out on every attempt, so a retry only re-sends the grants that failed
+        steps = [step for step in ("public", "share") if step not in state["completed"]]
+        kinds = ["owner" if step == "share" else step for step in steps]
+        state["round_trips"] += 1
+        if self.permission_batcher:
+            # Shares a Drive batch with other builds granting at the same time
+            errors = self.permission_batcher.grant(form_id, owner_email, kinds)
+        else:
+            errors = self._grant_permissions([(form_id, owner_email, kinds)])[form_id]
+        
+        state["permission_errors"] = {}
+        for step, kind in zip(steps, kinds):
+            if errors.get(kind) is None:
+                _complete_step(state, step)
+            else:
+                state["permission_errors"][step] = errors[kind]
+        if state["permission_errors"]:
+            raise next(iter(state["permission_errors"].values()))
+        del state["permission_errors"]
+    
+    def build_form_update_requests(
+        self,
+        description: Optional[str] = None,
+        questions: Optional[List[Dict]] = None,
+        is_quiz: bool = False
+    ) -> List[Dict]:
+        """
+        Plan every post-create change to a form as batchUpdate requests
+        
+        Args:
+            description: Form description (sent with updateFormInfo)
+            questions: List of question dictionaries
+            is_quiz: Turn the form into a quiz (sent with updateSettings)
+        
+        Returns:
+            List of batchUpdate requests (empty if there is nothing to change)
+        """
+        requests = []
+        
+        if description:
+            requests.append({
+                "updateFormInfo": {
+                    "info": {"description": description},
+                    "updateMask": "description"
+                }
+            })
+        
+        if is_quiz:
+            requests.append({
+                "updateSettings": {
+                    "settings": {"quizSettings": {"isQuiz": True}},
+                    "updateMask": "quizSettings.isQuiz"
+                }
+            })
+        
+        for idx, question in enumerate(questions or []):
+            requests.append(self._create_item_request(idx, question))
+        
+        return requests
+    
+    def _create_item_request(self, idx: int, question: Dict) -> Dict:
+        """Build the createItem request for one question"""
+        question_type = question.get("type", "TEXT").upper()
+        title = question.get("title", f"Question {idx + 1}")
+        required = question.get("required", False)
+        options = question.get("options", [])
+        
+        # Build the question body with required field and type
+        question_body = {
+            "required": required
+        }
+        
+        # Handle different question types
+        if question_type in ["TEXT", "SHORT_ANSWER"]:
+            question_body["textQuestion"] = {
+                "paragraph": False
+            }
+        elif question_type in ["PARAGRAPH", "PARAGRAPH_TEXT", "LONG_ANSWER"]:
+            question_body["textQuestion"] = {
+                "paragraph": True
+            }
+        elif question_type == "MULTIPLE_CHOICE":
+            question_body["choiceQuestion"] = {
+                "type": "RADIO",
+                "options": [{"value": opt} for opt in options]
+            }
+        elif question_type == "CHECKBOX":
+            question_body["choiceQuestion"] = {
+                "type": "CHECKBOX",
+                "options": [{"value": opt} for opt in options]
+            }
+        elif question_type == "DROPDOWN":
+            question_body["choiceQuestion"] = {
+                "type": "DROP_DOWN",
+                "options": [{"value": opt} for opt in options]
+            }
+        
+        # Create the request to add this question with correct structure
+        return {
+            "createItem": {
+                "item": {
+                    "title": title,
+                    "questionItem": {
+                        "question": question_body
+                    }
+                },
+                "location": {
+                    "index": idx
+                }
+            }
+        }
     
+    @_uses_clients
     def add_questions_to_form(self, form_id: str, questions: List[Dict]) -> Dict:
         """
         Add questions to an existing form
@@ -224,58 +578,7 @@ class GoogleFormsService:
             Updated form object
         """
         try:
-            requests = []
-            
-            for idx, question in enumerate(questions):
-                question_type = question.get("type", "TEXT").upper()
-                title = question.get("title", f"Question {idx + 1}")
-                required = question.get("required", False)
-                options = question.get("options", [])
-                
-                # Build the question body with required field and type
-                question_body = {
-                    "required": required
-                }
-                
-                # Handle different question types
-                if question_type in ["TEXT", "SHORT_ANSWER"]:
-                    question_body["textQuestion"] = {
-                        "paragraph": False
-                    }
-                elif question_type in ["PARAGRAPH", "PARAGRAPH_TEXT", "LONG_ANSWER"]:
-                    question_body["textQuestion"] = {
-                        "paragraph": True
-                    }
-                elif question_type == "MULTIPLE_CHOICE":
-                    question_body["choiceQuestion"] = {
-                        "type": "RADIO",
-                        "options": [{"value": opt} for opt in options]
-                    }
-                elif question_type == "CHECKBOX":
-                    question_body["choiceQuestion"] = {
-                        "type": "CHECKBOX",
-                        "options": [{"value": opt} for opt in options]
-                    }
-                elif question_type == "DROPDOWN":
-                    question_body["choiceQuestion"] = {
-                        "type": "DROP_DOWN",
-                        "options": [{"value": opt} for opt in options]
-                    }
-                
-                # Create the request to add this question with correct structure
-                requests.append({
-                    "createItem": {
-                        "item": {
-                            "title": title,
-                            "questionItem": {
-                                "question": question_body
-                            }
-                        },
-                        "location": {
-                            "index": idx
-                        }
-                    }
-                })
+            requests = self.build_form_update_requests(questions=questions)
             
             # Batch update the form with all questions
             if requests:
@@ -283,10 +586,13 @@ class GoogleFormsService:
                     "requests": requests
                 }
                 
-                result = self.forms_service.forms().batchUpdate(
-                    formId=form_id,
-                    body=update_body
-                ).execute()
+                result = self.quota.execute(
+                    self.forms_service.forms().batchUpdate(
+                        formId=form_id,
+                        body=update_body
+                    ),
+                    "forms", "write"
+                )
                 
                 print(f"✅ Added {len(questions)} questions to form {form_id}")
                 return result
@@ -298,60 +604,122 @@ class GoogleFormsService:
             print(f"❌ Unexpected error: {e}")
             raise
     
-    def _make_form_public(self, form_id: str):
+    # Drive accepts at most 100 calls per batch request
+    DRIVE_BATCH_LIMIT = 100
+    
+    @_uses_clients
+    def grant_form_permissions(self, grants: List[Tuple[str, Optional[str]]]) -> Dict[str, Dict[str, Optional[str]]]:
         """
-        Make a form publicly accessible (anyone with link can respond)
+        Make forms public and share them with their owners using batched Drive requests
+        
+        Each form gets an "anyone can respond" permission and, when an owner
+        email is given, a writer permission for that user (so the form shows
+        up in their Drive). All permissions, across all forms, are sent as
+        googleapiclient batch requests of up to DRIVE_BATCH_LIMIT calls each.
+        Failures are handled per permission and are non-critical; calls
+        rate limited inside a batch are retried in a follow-up batch once
+        the Drive write quota allows.
         
         Args:
-            form_id: The ID of the form to make public
+            grants: List of (form_id, owner_email or None)
+        
+        Returns:
+            Dict of form_id -> {"public": error or None, "owner": error or None}
+            ("owner" is only present when an owner email was given)
         """
-        try:
-            permission = {
-                'type': 'anyone',
-                'role': 'reader'  # 'reader' allows anyone to view and respond to the form
-            }
-            
-            self.drive_service.permissions().create(
-                fileId=form_id,
-                body=permission,
-                fields='id'
-            ).execute()
-            
-            print(f"✅ Form {form_id} is now publicly readable (anyone can respond)")
-            
-        except HttpError as error:
-            print(f"⚠️ Could not make form public: {error}")
-            # Non-critical error, continue execution
+        results = self._grant_permissions([(form_id, owner_email, ("public", "owner")) for form_id, owner_email in grants])
+        return {
+            form_id: {kind: str(error) if error is not None else None for kind, error in errors.items()}
+            for form_id, errors in results.items()
+        }
     
-    def _share_form_with_owner(self, form_id: str, email: str):
-        """
-        Share the form with a human user as an owner.
-        This ensures the form appears in the user's Google Drive.
+    def _grant_permissions(self, grants: List[Grant]) -> Dict[str, Dict[str, Optional[Exception]]]:
+        """grant_form_permissions for (form_id, owner_email, kinds) grants, reporting the exceptions themselves"""
+        calls = []
+        results: Dict[str, Dict[str, Optional[Exception]]] = {}
+        for form_id, owner_email, kinds in grants:
+            results.setdefault(form_id, {})
+            if "public" in kinds:
+                results[form_id]["public"] = None
+                calls.append((f"{form_id}:public", self._public_permission_request(form_id)))
+            if owner_email and "owner" in kinds:
+                results[form_id]["owner"] = None
+                calls.append((f"{form_id}:owner", self._owner_permission_request(form_id, owner_email)))
         
-        Args:
-            form_id: The ID of the form to share
-            email: The email address of the human owner
-        """
-        try:
-            permission = {
-                'type': 'user',
-                'role': 'writer',  # 'writer' allows the user to edit the form
-                'emailAddress': email
-            }
-            
-            self.drive_service.permissions().create(
-                fileId=form_id,
-                body=permission,
-                fields='id',
-                sendNotificationEmail=False  # Don't spam the user with emails
-            ).execute()
-            
-            print(f"✅ Form {form_id} shared with {email} as writer")
+        throttled = []
+        
+        def on_response(request_id, response, exception):
+            form_id, kind = request_id.rsplit(":", 1)
+            if isinstance(exception, HttpError) and is_rate_limit_error(exception):
+                # Rate limited inside the batch: retry it in a later round
+                results[form_id][kind] = exception
+                throttled.append((request_id, retry_after_seconds(exception)))
+            elif exception is not None:
+                results[form_id][kind] = exception
+                if kind == "public":
+                    print(f"⚠️ Could not make form public: {exception}")
+                else:
+                    print(f"⚠️ Could not share form {form_id} with owner: {exception}")
+            else:
+                results[form_id][kind] = None
+                if kind == "public":
+                    print(f"✅ Form {form_id} is now publicly readable (anyone can respond)")
+                else:
+                    print(f"✅ Form {form_id} shared with owner as writer")
+        
+        requests_by_id = dict(calls)
+        pending = calls
+        for _ in range(self.quota.max_throttle_retries + 1):
+            for start in range(0, len(pending), self.DRIVE_BATCH_LIMIT):
+                chunk = pending[start:start + self.DRIVE_BATCH_LIMIT]
+                batch = self.drive_service.new_batch_http_request(callback=on_response)
+                for request_id, request in chunk:
+                    batch.add(request, request_id=request_id)
+                try:
+                    self.quota.execute(batch, "drive", "write", tokens=len(chunk))
+                except HttpError as error:
+                    # The whole batch failed; record it against every call in it
+                    print(f"⚠️ Drive permission batch failed: {error}")
+                    for request_id, _ in chunk:
+                        form_id, kind = request_id.rsplit(":", 1)
+                        results[form_id][kind] = error
             
-        except HttpError as error:
-            print(f"⚠️ Could not share form with {email}: {error}")
-            # Non-critical error, continue execution
+            if not throttled:
+                break
+            retry_after = max((delay for _, delay in throttled if delay is not None), default=None)
+            self.quota.throttle("drive", "write", retry_after)
+            pending = [(request_id, requests_by_id[request_id]) for request_id, _ in throttled]
+            throttled.clear()
+        
+        return results
     
+    def _public_permission_request(self, form_id: str):
+        """Drive request making a form publicly accessible (anyone with link can respond)"""
+        permission = {
+            'type': 'anyone',
+            'role': 'reader'  # 'reader' allows anyone to view and respond to the form
+        }
+        return self.drive_service.permissions().create(
+            fileId=form_id,
+            body=permission,
+            fields='id'
+        )
+    
+    def _owner_permission_request(self, form_id: str, email: str):
+        """Drive request sharing a form with a human user so it appears in their Drive"""
+        permission = {
+            'type': 'user',
+            'role': 'writer',  # 'writer' allows the user to edit the form
+            'emailAddress': email
+        }
+        return self.drive_service.permissions().create(
+            fileId=form_id,
+            body=permission,
+            fields='id',
+            sendNotificationEmail=False  # Don't spam the user with emails
+        )
+    
+    @_uses_clients
     def get_form(self, form_id: str) -> Dict:
         """
         Get details about a form
@@ -363,13 +731,16 @@ class GoogleFormsService:
             Form details
         """
         try:
-            result = self.forms_service.forms().get(formId=form_id).execute()
+            result = self.quota.execute(
+                self.forms_service.forms().get(formId=form_id), "forms", "read"
+            )
             return result
         except HttpError as error:
             print(f"❌ An error occurred getting the form: {error}")
             raise
     
-    def parse_questions_from_text(self, text: str) -> List[Dict]:
+    @staticmethod
+    def parse_questions_from_text(text: Union[str, Iterable[str]]) -> List[Dict]:
         """
         Parse questions from text blob
         
@@ -387,81 +758,59 @@ class GoogleFormsService:
                - Green
             3. Tell us about yourself [PARAGRAPH]
         
+        Each line is classified by its first character and read in one
+        pass, with precompiled patterns for the prefix and [TYPE] markers,
+        so parsing time grows linearly with the text.
+        
         Args:
-            text: Text containing questions
+            text: Text containing questions, or an iterable of its lines
+                (such as an open file; trailing newlines are ignored)
         
         Returns:
             List of parsed question dictionaries
         """
         questions = []
-        lines = text.strip().split('\n')
         current_question = None
+        # Lines before the first question: the whole text becomes a single
+        # question if there is none
+        preamble = None if isinstance(text, str) else []
         
-        for line in lines:
+        for line in _text_lines(text) if isinstance(text, str) else text:
+            if preamble is not None:
+                preamble.append(line[:-1] if line.endswith("\n") else line)
             line = line.strip()
-            
             if not line:
                 continue
             
-            # Check if line is a question (starts with number or bullet at the beginning)
-            is_question_line = any(
-                line.startswith(prefix) 
-                for prefix in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0']
-            ) or (
-                line.startswith(('-', '*', '•')) and not current_question
-            )
-            
-            if is_question_line:
-                # Save previous question if exists
-                if current_question:
-                    questions.append(current_question)
-                
-                # Parse question text and type
-                question_text = line.lstrip('0123456789.-*•() ').strip()
-                
-                # Determine question type from brackets
-                question_type = "TEXT"
-                if "[PARAGRAPH]" in question_text or "[LONG]" in question_text:
-                    question_type = "PARAGRAPH"
-                    question_text = question_text.replace("[PARAGRAPH]", "").replace("[LONG]", "").strip()
-                elif "[MULTIPLE_CHOICE]" in question_text or "[RADIO]" in question_text:
-                    question_type = "MULTIPLE_CHOICE"
-                    question_text = question_text.replace("[MULTIPLE_CHOICE]", "").replace("[RADIO]", "").strip()
-                elif "[CHECKBOX]" in question_text:
-                    question_type = "CHECKBOX"
-                    question_text = question_text.replace("[CHECKBOX]", "").strip()
-                elif "[DROPDOWN]" in question_text:
-                    question_type = "DROPDOWN"
-                    question_text = question_text.replace("[DROPDOWN]", "").strip()
-                else:
-                    # Remove [TEXT] or [SHORT] markers
-                    question_text = question_text.replace("[TEXT]", "").replace("[SHORT]", "").strip()
-                
+            first = line[0]
+            if first in _QUESTION_DIGITS or (first in _BULLETS and current_question is None):
+                # A question: number or bullet prefix, then the title and [TYPE] markers
+                question_type, question_text = _question_type(line[_QUESTION_PREFIX.match(line).end():])
                 current_question = {
                     "title": question_text,
                     "type": question_type,
                     "required": False,
                     "options": []
                 }
+                questions.append(current_question)
+                preamble = None
             
-            # Check if line is an option (indented or starts with -)
-            elif current_question and (line.startswith('-') or line.startswith('*') or line.startswith('•')):
-                option = line.lstrip('-*•() ').strip()
+            elif first in _BULLETS:
+                # An option of the current question
+                option = line[_OPTION_PREFIX.match(line).end():]
                 if option:
                     current_question["options"].append(option)
         
-        # Add last question
-        if current_question:
-            questions.append(current_question)
-        
         # Handle single-line input (no number or bullet)
-        if not questions and text.strip():
-            questions.append({
-                "title": text.strip(),
-                "type": "TEXT",
-                "required": False,
-                "options": []
-            })
+        if not questions:
+            title = text.strip() if isinstance(text, str) else "\n".join(preamble).strip()
+            if title:
+                questions.append({
+                    "title": title,
+                    "type": "TEXT",
+                    "required": False,
+                    "options": []
+                })
         
         return questions
 
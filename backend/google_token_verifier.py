@@ -0,0 +1,207 @@
+"""
+Google Token Verifier
+Verifies Google Sign-In ID tokens against cached signing certificates
+
+google.oauth2.id_token.verify_oauth2_token downloads Google's signing
+certificates on every call when given a plain Request(). GoogleCertCache
+keeps the parsed public keys until the Cache-Control max-age Google sends
+with them runs out, refreshes them on a background thread shortly before
+that, and refetches early only when a token is signed with a key it has
+not seen (key rotation). GoogleIdTokenVerifier then checks tokens locally
+with PyJWT (RS256 signature, audience, issuer, expiry), off the event loop.
+"""
+
+from email.message import Message
+from typing import Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import re
+import threading
+import time
+import urllib.request
+
+from cryptography.x509 import load_pem_x509_certificate
+import jwt
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Used when Google's response carries no max-age
+DEFAULT_MAX_AGE = 3600
+
+
+class GoogleCertCache:
+    """Google's token signing keys, cached for as long as Google allows"""
+
+    def __init__(
+        self,
+        certs_url: str = GOOGLE_CERTS_URL,
+        refresh_margin: float = 60.0,
+        min_refetch_interval: float = 30.0,
+        fetch: Optional[Callable[[], Tuple[Dict[str, str], float]]] = None,
+        timeout: float = 10.0,
+    ):
+        """
+        Initialize the cache (nothing is downloaded until first use)
+
+        Args:
+            certs_url: URL serving {key id: PEM certificate}
+            refresh_margin: Background refresh this many seconds before expiry
+            min_refetch_interval: Minimum seconds between fetches triggered by
+                                  unknown key IDs (stops forged kids from
+                                  hammering Google)
+            fetch: Returns (certificates, max_age seconds); defaults to an
+                   HTTP GET of certs_url
+            timeout: HTTP timeout for the default fetch
+        """
+        self.certs_url = certs_url
+        self.refresh_margin = refresh_margin
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.fetch = fetch or self._download
+        self._keys: Dict[str, object] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self.fetches = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def get_key(self, key_id: str):
+        """
+        Public key for a key ID, fetching the certificates only when needed
+
+        Raises:
+            ValueError: No certificate with that key ID
+        """
+        keys = self._current_keys()
+        if key_id not in keys:
+            # Possibly a rotated key: refetch now, however fresh the cache is
+            keys = self._refresh(margin=float("inf"), min_interval=self.min_refetch_interval)
+        if key_id not in keys:
+            raise ValueError(f"Token signed with unknown key ID {key_id!r}")
+        return keys[key_id]
+
+    def start(self):
+        """Keep the certificates fresh on a background thread (no-op if running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="google-certs", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "keys": len(self._keys),
+            "fetches": self.fetches,
+            "expires_in_seconds": round(max(0.0, self._expires_at - time.time()), 1),
+        }
+
+    def _current_keys(self) -> Dict[str, object]:
+        if time.time() < self._expires_at:
+            return self._keys
+        return self._refresh()
+
+    def _refresh(self, margin: float = 0.0, min_interval: float = 0.0) -> Dict[str, object]:
+        """
+        Fetch the certificates if they expire within `margin` seconds and
+        were last fetched at least `min_interval` seconds ago. Checked under
+        the lock, so threads that queued up behind a fetch reuse its result.
+        """
+        with self._lock:
+            now = time.time()
+            if now < self._expires_at - margin or now - self._fetched_at < min_interval:
+                return self._keys
+            try:
+                certs, max_age = self.fetch()
+            except Exception as e:
+                if not self._keys:
+                    raise
+                # Google unreachable: keep verifying with the keys we have
+                print(f"⚠️ Could not refresh Google signing certificates, using cached keys: {e}")
+                return self._keys
+            self._keys = {
+                key_id: load_pem_x509_certificate(pem.encode("utf-8")).public_key()
+                for key_id, pem in certs.items()
+            }
+            self._fetched_at = time.time()
+            self._expires_at = self._fetched_at + max_age
+            self.fetches += 1
+            return self._keys
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self._refresh(margin=self.refresh_margin)
+                wait = max(1.0, self._expires_at - self.refresh_margin - time.time())
+            except Exception as e:
+                print(f"⚠️ Could not refresh Google signing certificates: {e}")
+                wait = 30.0
+            self._stopping.wait(wait)
+
+    def _download(self) -> Tuple[Dict[str, str], float]:
+        with urllib.request.urlopen(self.certs_url, timeout=self.timeout) as response:
+            certs = json.loads(response.read().decode("utf-8"))
+            return certs, cache_max_age(response.headers)
+
+
+class GoogleIdTokenVerifier:
+    """Verifies Google ID tokens locally using GoogleCertCache"""
+
+    def __init__(self, audience: str, cert_cache: Optional[GoogleCertCache] = None, leeway: float = 10.0):
+        """
+        Initialize the verifier
+
+        Args:
+            audience: OAuth client ID the tokens must be issued for
+            cert_cache: Signing key cache (a private one is created if omitted)
+            leeway: Allowed clock skew in seconds
+        """
+        self.audience = audience
+        self.cert_cache = cert_cache or GoogleCertCache()
+        self.leeway = leeway
+
+    def verify(self, token: str) -> dict:
+        """
+        Verify a Google ID token (blocking; only fetches certificates when needed)
+
+        Returns:
+            The token's claims
+
+        Raises:
+            ValueError: The token is malformed, forged, expired, or not for us
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+            key = self.cert_cache.get_key(header.get("kid", ""))
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.audience,
+                leeway=self.leeway,
+                options={"require": ["exp", "iat", "iss", "aud"]},
+            )
+        except jwt.PyJWTError as e:
+            raise ValueError(f"Invalid Google ID token: {e}") from e
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer {claims.get('iss')!r}")
+        return claims
+
+    async def verify_async(self, token: str) -> dict:
+        """verify() on a worker thread, so RSA checks and fetches never block the event loop"""
+        return await asyncio.to_thread(self.verify, token)
+
+
+def cache_max_age(headers: Message) -> float:
+    """Seconds a response may be cached, from Cache-Control max-age minus Age"""
+    match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", "") or "")
+    if not match:
+        return DEFAULT_MAX_AGE
+    age = headers.get("Age", "0") or "0"
+    return max(0.0, float(match.group(1)) - (float(age) if age.isdigit() else 0.0))
@@ -0,0 +1,497 @@
+"""
+Job Queue
+Persisted job queue with worker leases, backed by SQLite through SQLAlchemy Core
+
+Jobs move through queued -> running -> done/failed. A worker claims a job
+by taking a time-limited lease; if the worker crashes, the lease expires
+and another worker picks the job up again, so queued work survives
+process and worker crashes. Workers renew the lease while a job runs, and
+a worker whose lease has lapsed can no longer finish or checkpoint the
+job, so a reclaimed job's outcome is only recorded by its current worker.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import socket
+import threading
+import time
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    and_,
+    create_engine,
+    event,
+    func,
+    or_,
+    select,
+)
+from sqlalchemy.pool import QueuePool
+
+from repository import configure_sqlite_connection
+
+
+class LeaseLostError(RuntimeError):
+    """The worker no longer holds the lease on the job it is running"""
+
+
+class PersistentJobQueue:
+    """SQLite-backed job queue with leases and retry scheduling"""
+
+    def __init__(self, database_url: str = "sqlite:///./jobs.db", table_name: str = "jobs"):
+        """
+        Initialize the queue and create its table if needed
+
+        Args:
+            database_url: SQLAlchemy SQLite URL
+            table_name: Table holding this queue's jobs (one table per queue)
+        """
+        self.database_url = database_url
+        self.engine = create_engine(
+            database_url,
+            poolclass=QueuePool,
+            pool_size=2,
+            max_overflow=4,
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        event.listen(self.engine, "connect", configure_sqlite_connection)
+
+        self.metadata = MetaData()
+        self.jobs = Table(
+            table_name,
+            self.metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("key", String, nullable=False),
+            Column("payload", Text, nullable=False),
+            Column("status", String, nullable=False, default="queued"),
+            Column("attempts", Integer, nullable=False, default=0),
+            Column("max_attempts", Integer, nullable=False, default=5),
+            Column("available_at", Float, nullable=False),
+            Column("lease_expires_at", Float),
+            Column("worker", String),
+            Column("result", Text),
+            Column("error", Text),
+            Column("created_at", Float, nullable=False),
+            Column("updated_at", Float, nullable=False),
+            Index(f"ix_{table_name}_claim", "status", "available_at"),
+            Index(f"ix_{table_name}_key", "key", "id"),
+        )
+        self.metadata.create_all(self.engine)
+
+    def enqueue(self, key: str, payload: dict, max_attempts: int = 5, delay: float = 0.0) -> dict:
+        """
+        Add a job to the queue
+
+        Args:
+            key: Identifier of the thing the job works on (e.g. a survey ID)
+            payload: JSON-serializable job data
+            max_attempts: Attempts before the job is marked failed
+            delay: Seconds to wait before the job becomes claimable
+
+        Returns:
+            The stored job
+        """
+        now = time.time()
+        with self.engine.begin() as conn:
+            job_id = conn.execute(
+                self.jobs.insert().values(
+                    key=key,
+                    payload=json.dumps(payload),
+                    status="queued",
+                    attempts=0,
+                    max_attempts=max_attempts,
+                    available_at=now + delay,
+                    created_at=now,
+                    updated_at=now,
+                )
+            ).inserted_primary_key[0]
+        return self.get(job_id)
+
+    def enqueue_many(self, jobs: Iterable[Tuple[str, dict]], max_attempts: int = 5) -> List[dict]:
+        """
+        Add many jobs to the queue in one transaction
+
+        Args:
+            jobs: (key, payload) pairs, as for enqueue
+            max_attempts: Attempts before each job is marked failed
+
+        Returns:
+            The stored jobs, in order
+        """
+        now = time.time()
+        job_ids = []
+        with self.engine.begin() as conn:
+            for key, payload in jobs:
+                job_ids.append(conn.execute(
+                    self.jobs.insert().values(
+                        key=key,
+                        payload=json.dumps(payload),
+                        status="queued",
+                        attempts=0,
+                        max_attempts=max_attempts,
+                        available_at=now,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                ).inserted_primary_key[0])
+            if not job_ids:
+                return []
+            rows = conn.execute(select(self.jobs).where(self.jobs.c.id.in_(job_ids))).mappings().all()
+        stored = {row["id"]: _job_from_row(row) for row in rows}
+        return [stored[job_id] for job_id in job_ids]
+
+    def claim(self, worker: str, lease_seconds: float = 300.0) -> Optional[dict]:
+        """
+        Atomically claim the next runnable job
+
+        A job is runnable when it is queued and due, or when it is running
+        but its lease has expired (its worker died).
+
+        Args:
+            worker: Name of the claiming worker
+            lease_seconds: How long the claim is valid without completing
+
+        Returns:
+            The claimed job (attempts already incremented), or None
+        """
+        jobs = self.jobs
+        now = time.time()
+        next_job = (
+            select(jobs.c.id)
+            .where(or_(
+                and_(jobs.c.status == "queued", jobs.c.available_at <= now),
+                and_(jobs.c.status == "running", jobs.c.lease_expires_at < now),
+            ))
+            .order_by(jobs.c.available_at, jobs.c.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                jobs.update()
+                .where(jobs.c.id == next_job)
+                .values(
+                    status="running",
+                    attempts=jobs.c.attempts + 1,
+                    lease_expires_at=now + lease_seconds,
+                    worker=worker,
+                    updated_at=now,
+                )
+                .returning(*jobs.c)
+            ).mappings().first()
+        return _job_from_row(row) if row else None
+
+    def complete(self, job_id: int, result: Optional[dict] = None, worker: Optional[str] = None) -> bool:
+        """
+        Mark a job as done
+
+        Args:
+            job_id: Job to complete
+            result: JSON-serializable job result
+            worker: The worker that claimed the job; when given, the job is
+                    only completed while that worker still holds its lease
+
+        Returns:
+            False if the worker's lease had lapsed (the job was left as is)
+        """
+        return self._finish(
+            job_id, status="done", result=json.dumps(result) if result is not None else None, error=None,
+            worker=worker
+        )
+
+    def fail(self, job_id: int, error: str, retry_delay: float = 0.0, worker: Optional[str] = None) -> Optional[dict]:
+        """
+        Record a failed attempt
+
+        The job is re-queued after `retry_delay` seconds while it has
+        attempts left, and marked failed otherwise.
+
+        Args:
+            job_id: Job that failed
+            error: What went wrong
+            retry_delay: Seconds before the job can be claimed again
+            worker: The worker that claimed the job; when given, the failure
+                    is only recorded while that worker still holds its lease
+
+        Returns:
+            The updated job, or None if the worker's lease had lapsed
+        """
+        job = self.get(job_id)
+        if job and job["attempts"] < job["max_attempts"]:
+            now = time.time()
+            with self.engine.begin() as conn:
+                updated = conn.execute(
+                    self.jobs.update().where(self._held(job_id, worker, now)).values(
+                        status="queued",
+                        available_at=now + retry_delay,
+                        lease_expires_at=None,
+                        worker=None,
+                        error=error,
+                        updated_at=now,
+                    )
+                ).rowcount
+        else:
+            updated = self._finish(job_id, status="failed", result=None, error=error, worker=worker)
+        return self.get(job_id) if updated else None
+
+    def renew(self, job_id: int, worker: str, lease_seconds: float = 300.0) -> bool:
+        """
+        Extend a running job's lease (a heartbeat from the worker running it)
+
+        Returns:
+            False if the worker no longer holds the lease (it expired, or the
+            job was reclaimed); the worker should stop working on the job
+        """
+        now = time.time()
+        with self.engine.begin() as conn:
+            return conn.execute(
+                self.jobs.update().where(self._held(job_id, worker, now)).values(
+                    lease_expires_at=now + lease_seconds,
+                    updated_at=now,
+                )
+            ).rowcount == 1
+
+    def update_payload(self, job_id: int, payload: dict, worker: Optional[str] = None) -> bool:
+        """
+        Replace a job's payload (e.g. to checkpoint progress for the next attempt)
+
+        Returns:
+            False if a worker was given and no longer holds the job's lease
+        """
+        with self.engine.begin() as conn:
+            return conn.execute(
+                self.jobs.update().where(self._held(job_id, worker, time.time())).values(
+                    payload=json.dumps(payload),
+                    updated_at=time.time(),
+                )
+            ).rowcount == 1
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """Get a job by ID"""
+        with self.engine.connect() as conn:
+            row = conn.execute(select(self.jobs).where(self.jobs.c.id == job_id)).mappings().first()
+        return _job_from_row(row) if row else None
+
+    def latest_for_key(self, key: str) -> Optional[dict]:
+        """Get the most recent job for a key"""
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(self.jobs).where(self.jobs.c.key == key).order_by(self.jobs.c.id.desc()).limit(1)
+            ).mappings().first()
+        return _job_from_row(row) if row else None
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(self.jobs.c.status, func.count()).group_by(self.jobs.c.status)
+            ).all()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        """Release pooled connections"""
+        self.engine.dispose()
+
+    def _finish(self, job_id: int, status: str, result: Optional[str], error: Optional[str],
+                worker: Optional[str] = None) -> bool:
+        now = time.time()
+        with self.engine.begin() as conn:
+            return conn.execute(
+                self.jobs.update().where(self._held(job_id, worker, now)).values(
+                    status=status,
+                    result=result,
+                    error=error,
+                    lease_expires_at=None,
+                    updated_at=now,
+                )
+            ).rowcount == 1
+
+    def _held(self, job_id: int, worker: Optional[str], now: float):
+        """WHERE clause for a job, limited to a live lease held by worker (if given)"""
+        jobs = self.jobs
+        if worker is None:
+            return jobs.c.id == job_id
+        return and_(
+            jobs.c.id == job_id,
+            jobs.c.status == "running",
+            jobs.c.worker == worker,
+            jobs.c.lease_expires_at >= now,
+        )
+
+
+class JobWorkerPool:
+    """Pool of daemon threads that drain a PersistentJobQueue"""
+
+    def __init__(
+        self,
+        queue: PersistentJobQueue,
+        handler: Callable[[dict], Optional[dict]],
+        on_give_up: Optional[Callable[[dict, str], None]] = None,
+        workers: int = 2,
+        name: str = "job-worker",
+        lease_seconds: float = 300.0,
+        poll_interval: float = 1.0,
+        retry_delay: float = 2.0,
+    ):
+        """
+        Initialize the worker pool (call start() to run it)
+
+        Args:
+            queue: Queue to drain
+            handler: Called with each claimed job; its return value is stored
+                     as the job result, an exception counts as a failed attempt
+            on_give_up: Called with (job, error) when a job runs out of attempts
+            workers: Number of worker threads
+            name: Thread name prefix
+            lease_seconds: Lease taken on each claimed job, renewed every
+                           third of it while the handler runs
+            poll_interval: Seconds between polls when the queue is empty
+            retry_delay: Base delay for exponential backoff between attempts
+        """
+        self.queue = queue
+        self.handler = handler
+        self.on_give_up = on_give_up
+        self.workers = workers
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self._threads = []
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Start the worker threads (no-op if already running)"""
+        with self._lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"{self.name}-{idx}", daemon=True)
+                for idx in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Ask the workers to stop and wait for them"""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def enqueue(self, key: str, payload: dict, max_attempts: int = 5) -> dict:
+        """Queue a job, start the workers if needed and wake one up"""
+        job = self.queue.enqueue(key, payload, max_attempts=max_attempts)
+        self.start()
+        self._wake.set()
+        return job
+
+    def enqueue_many(self, jobs: Iterable[Tuple[str, dict]], max_attempts: int = 5) -> List[dict]:
+        """Queue many jobs in one transaction, start the workers if needed and wake them up"""
+        stored = self.queue.enqueue_many(jobs, max_attempts=max_attempts)
+        if stored:
+            self.start()
+            self._wake.set()
+        return stored
+
+    def _run(self):
+        # Unique across processes sharing the queue, so leases can't be confused
+        worker = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.claim(worker, lease_seconds=self.lease_seconds)
+            except Exception as e:
+                print(f"⚠️ {worker}: could not claim job: {e}")
+                job = None
+
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            self._process(job)
+
+    def _process(self, job: dict):
+        if job["attempts"] > job["max_attempts"]:
+            # The lease expired on the last allowed attempt (worker crashed)
+            self._give_up(job, job["error"] or "Worker stopped while processing job")
+            return
+
+        worker = job["worker"]
+        done = threading.Event()
+        threading.Thread(
+            target=self._heartbeat, args=(job, done), name=f"{threading.current_thread().name}-lease", daemon=True
+        ).start()
+        try:
+            result = self.handler(job)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            delay = self.retry_delay * (2 ** (job["attempts"] - 1))
+            updated = self.queue.fail(job["id"], error, retry_delay=delay, worker=worker)
+            if updated is None:
+                print(f"⚠️ Job {job['id']} ({job['key']}) failed after its lease lapsed, leaving it to its new worker")
+            elif updated["status"] == "failed":
+                self._give_up(updated, error)
+            else:
+                print(f"⚠️ Job {job['id']} ({job['key']}) failed, retrying in {delay:.1f}s: {error}")
+            return
+        finally:
+            done.set()
+
+        if not self.queue.complete(job["id"], result, worker=worker):
+            print(f"⚠️ Job {job['id']} ({job['key']}) finished after its lease lapsed, result not recorded")
+
+    def _heartbeat(self, job: dict, done: threading.Event):
+        """Keep renewing a job's lease until its handler returns"""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.renew(job["id"], job["worker"], self.lease_seconds):
+                    print(f"⚠️ Lost the lease on job {job['id']} ({job['key']})")
+                    return
+            except Exception as e:
+                print(f"⚠️ Could not renew the lease on job {job['id']}: {e}")
+
+    def _give_up(self, job: dict, error: str):
+        print(f"❌ Job {job['id']} ({job['key']}) failed after {job['attempts']} attempts: {error}")
+        if job["status"] != "failed":
+            self.queue.fail(job["id"], error, worker=job["worker"])
+        if self.on_give_up:
+            try:
+                self.on_give_up(job, error)
+            except Exception as e:
+                print(f"⚠️ Error handling failed job {job['id']}: {e}")
+
+
+def _job_from_row(row) -> dict:
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def job_summary(job: Optional[dict]) -> Optional[dict]:
+    """Public view of a job for API responses"""
+    if job is None:
+        return None
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
@@ -0,0 +1,102 @@
+"""
+Lazy Service
+Builds a slow-to-initialize service on a background thread
+
+Creating GoogleFormsService can refresh OAuth tokens over the network or
+even open a browser for consent. LazyService runs that factory on a
+daemon thread the first time the service is needed (or when the app
+starts), so importing the app and binding the port never wait on it.
+Callers get the service if it is ready and None otherwise, and can see
+which state it is in.
+"""
+
+from typing import Any, Callable, Dict, Optional
+import threading
+import time
+
+
+class LazyService:
+    """Holds a service created in the background by a factory"""
+
+    NOT_STARTED = "not_started"
+    INITIALIZING = "initializing"
+    READY = "ready"
+    UNAVAILABLE = "unavailable"
+
+    def __init__(self, factory: Callable[[], Any], name: str = "service"):
+        """
+        Initialize the holder (nothing runs until start() or get())
+
+        Args:
+            factory: Builds the service; raising or returning None marks it unavailable
+            name: Name used for the thread and in status reports
+        """
+        self.factory = factory
+        self.name = name
+        self.state = self.NOT_STARTED
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.init_seconds: Optional[float] = None
+        self._instance = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def preloaded(cls, instance: Any, name: str = "service") -> "LazyService":
+        """A holder that is already finished (ready, or unavailable if instance is None)"""
+        holder = cls(lambda: instance, name=name)
+        holder._finish(instance, None if instance is not None else "Service disabled")
+        return holder
+
+    def start(self):
+        """Start initializing in the background (no-op if already started)"""
+        with self._lock:
+            if self.state != self.NOT_STARTED:
+                return
+            self.state = self.INITIALIZING
+            self.started_at = time.time()
+        threading.Thread(target=self._initialize, name=f"{self.name}-init", daemon=True).start()
+
+    def get(self) -> Optional[Any]:
+        """The service if it is ready, else None (never blocks; starts initialization)"""
+        if self.state == self.NOT_STARTED:
+            self.start()
+        return self._instance
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Block until initialization finishes (or timeout) and return the service or None"""
+        self.start()
+        self._done.wait(timeout)
+        return self._instance
+
+    @property
+    def pending(self) -> bool:
+        """True until initialization has finished, one way or the other"""
+        return self.state in (self.NOT_STARTED, self.INITIALIZING)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "error": self.error,
+            "started_at": self.started_at,
+            "init_seconds": round(self.init_seconds, 3) if self.init_seconds is not None else None,
+        }
+
+    def _initialize(self):
+        start = time.perf_counter()
+        try:
+            instance, error = self.factory(), None
+        except Exception as e:
+            instance, error = None, str(e) or e.__class__.__name__
+        self.init_seconds = time.perf_counter() - start
+        if instance is None and error is None:
+            error = "Not configured"
+        self._finish(instance, error)
+
+    def _finish(self, instance: Any, error: Optional[str]):
+        with self._lock:
+            self._instance = instance
+            self.error = error
+            self.state = self.READY if instance is not None else self.UNAVAILABLE
+        self._done.set()
@@ -0,0 +1,81 @@
+"""
+Permission Batcher
+Shares Drive permission batches between form builds running at the same time
+
+Every form build ends by granting two Drive permissions (public + owner).
+Built one form at a time that is one batch request per form. When many
+builds run in parallel (bulk creates, imports, provisioning workers), the
+grants that arrive while a batch is in flight are collected and sent
+together in the next one, like a group commit: the thread that finds no
+batch in flight sends everything pending, and the others wait for their
+form's results. Nothing waits for a batch to fill, so a lone build costs
+no extra latency.
+"""
+
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import threading
+
+# (form_id, owner_email or None, permission kinds to grant)
+Grant = Tuple[str, Optional[str], Sequence[str]]
+
+
+class PermissionBatcher:
+    """Groups concurrent permission grants into shared Drive batch requests"""
+
+    def __init__(self, send: Callable[[List[Grant]], Dict[str, Dict[str, Optional[Exception]]]]):
+        """
+        Initialize the batcher
+
+        Args:
+            send: Grants permissions for many forms at once, returning
+                  form_id -> {kind: exception or None}; runs on the thread
+                  that leads the batch, with that thread's API clients
+        """
+        self.send = send
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[Grant, Future]] = []
+        self._sending = False
+        self._batches = 0
+        self._grants = 0
+
+    def grant(self, form_id: str, owner_email: Optional[str], kinds: Sequence[str]) -> Dict[str, Optional[Exception]]:
+        """
+        Grant a form's permissions, in a batch with any other pending grants
+
+        Returns:
+            {kind: exception or None} for this form
+        """
+        future: Future = Future()
+        with self._lock:
+            self._pending.append(((form_id, owner_email, tuple(kinds)), future))
+            lead = not self._sending
+            self._sending = True
+        if lead:
+            self._lead()
+        return future.result()
+
+    def stats(self) -> Dict[str, int]:
+        """Batches sent and grants they carried"""
+        with self._lock:
+            return {"batches": self._batches, "grants": self._grants}
+
+    def _lead(self):
+        # Send whatever is pending until nothing is; grants arriving
+        # meanwhile go out in the next round
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._sending = False
+                    return
+                pending, self._pending = self._pending, []
+                self._batches += 1
+                self._grants += len(pending)
+            try:
+                results = self.send([grant for grant, _ in pending])
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            for (form_id, _, _), future in pending:
+                future.set_result(results[form_id])
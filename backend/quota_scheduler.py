@@ -0,0 +1,212 @@
+"""
+Quota Scheduler
+Token-bucket rate limiting for Google Forms and Drive API calls
+
+Google enforces per-minute read and write quotas on the Forms and Drive
+APIs. Instead of firing requests until they fail with 429, every call
+goes through a QuotaScheduler that waits for a token from the matching
+bucket. When Google does answer 429 (or sends Retry-After), the bucket
+pauses and halves its rate, then creeps back up on success (AIMD), so
+sustained load settles just under the real quota.
+"""
+
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+import os
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+
+# Requests per minute, per user (override with the matching env variable)
+DEFAULT_LIMITS = {
+    ("forms", "read"): ("FORMS_READ_QPM", 390),
+    ("forms", "write"): ("FORMS_WRITE_QPM", 150),
+    ("drive", "read"): ("DRIVE_READ_QPM", 12000),
+    ("drive", "write"): ("DRIVE_WRITE_QPM", 180),
+}
+
+# Reasons Google uses for quota errors returned as 403 instead of 429
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded")
+
+
+class TokenBucket:
+    """Thread-safe token bucket with adaptive rate"""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None, min_rate_per_minute: float = 1.0):
+        """
+        Initialize the bucket (it starts full)
+
+        Args:
+            rate_per_minute: Configured (maximum) refill rate
+            burst: Bucket capacity; defaults to 10 seconds of traffic
+            min_rate_per_minute: Floor for the adaptive rate after throttling
+        """
+        self.max_rate = rate_per_minute / 60.0
+        self.rate = self.max_rate
+        self.min_rate = min(min_rate_per_minute / 60.0, self.max_rate)
+        self.capacity = burst if burst is not None else max(1.0, self.max_rate * 10)
+        self.tokens = self.capacity
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.granted = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens if available
+
+        Returns:
+            0.0 if the tokens were taken, otherwise seconds to wait before retrying
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.paused_until:
+                return self.paused_until - now
+            # A request larger than the bucket only needs a full bucket
+            needed = min(tokens, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= needed
+                self.granted += 1
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until tokens are available"""
+        while True:
+            wait = self.reserve(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """React to a 429: pause, drop queued burst and halve the rate"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self.paused_until = max(self.paused_until, now + pause)
+
+    def succeed(self):
+        """Additive increase back towards the configured rate"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "rate_per_minute": round(self.rate * 60, 2),
+                "max_rate_per_minute": round(self.max_rate * 60, 2),
+                "tokens": round(self.tokens, 2),
+                "capacity": round(self.capacity, 2),
+                "paused_for_seconds": round(max(0.0, self.paused_until - now), 3),
+                "granted": self.granted,
+                "throttled": self.throttled,
+            }
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class QuotaScheduler:
+    """Routes Google API calls through per-API read/write token buckets"""
+
+    def __init__(self, limits: Optional[Dict[Tuple[str, str], float]] = None, max_throttle_retries: int = 5):
+        """
+        Initialize the scheduler
+
+        Args:
+            limits: Requests per minute for each (api, kind) pair, e.g.
+                    {("forms", "write"): 150}. Missing pairs use DEFAULT_LIMITS.
+            max_throttle_retries: Times a call is re-queued after a 429
+                                  before the error is raised
+        """
+        limits = limits or {}
+        self.max_throttle_retries = max_throttle_retries
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {
+            key: TokenBucket(limits.get(key, float(os.getenv(env, default))))
+            for key, (env, default) in DEFAULT_LIMITS.items()
+        }
+        for key, rate in limits.items():
+            if key not in self.buckets:
+                self.buckets[key] = TokenBucket(rate)
+
+    def execute(self, request, api: str, kind: str, tokens: int = 1):
+        """
+        Execute a googleapiclient request (or batch) within quota
+
+        Args:
+            request: Object with an execute() method
+            api: "forms" or "drive"
+            kind: "read" or "write"
+            tokens: Quota units the call uses (number of calls in a batch)
+
+        Returns:
+            The request's result
+
+        Raises:
+            HttpError: If the call fails for a non-quota reason, or is still
+                       rate limited after max_throttle_retries
+        """
+        bucket = self.buckets[(api, kind)]
+        attempt = 0
+        while True:
+            bucket.acquire(tokens)
+            try:
+                result = request.execute()
+            except HttpError as error:
+                if not is_rate_limit_error(error) or attempt >= self.max_throttle_retries:
+                    raise
+                attempt += 1
+                retry_after = retry_after_seconds(error)
+                bucket.throttle(retry_after)
+                print(f"⏳ {api} {kind} quota hit (429), backing off to "
+                      f"{bucket.rate * 60:.0f}/min (attempt {attempt}/{self.max_throttle_retries})")
+                continue
+            bucket.succeed()
+            return result
+
+    def throttle(self, api: str, kind: str, retry_after: Optional[float] = None):
+        """Report a rate-limit response seen outside execute() (e.g. inside a batch)"""
+        self.buckets[(api, kind)].throttle(retry_after)
+
+    def budget(self) -> Dict[str, Dict[str, float]]:
+        """Current state of every bucket, keyed by "api.kind\""""
+        return {f"{api}.{kind}": bucket.snapshot() for (api, kind), bucket in self.buckets.items()}
+
+
+def is_rate_limit_error(error: HttpError) -> bool:
+    """True for 429s and 403s whose reason is a rate/quota limit"""
+    status = getattr(error.resp, "status", None)
+    if status == 429:
+        return True
+    if status == 403:
+        content = error.content.decode("utf-8", "ignore") if isinstance(error.content, bytes) else str(error.content)
+        return any(reason in content for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def retry_after_seconds(error: HttpError) -> Optional[float]:
+    """Parse the Retry-After header (seconds or HTTP date), if present"""
+    resp = error.resp
+    value = resp.get("retry-after") if hasattr(resp, "get") else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
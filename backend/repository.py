@@ -0,0 +1,486 @@
+"""
+Repository
+Persistence layer for surveys and user sessions
+
+Endpoints talk to a Repository instead of module-level globals, so the
+storage backend can be swapped without touching the API code:
+
+- InMemoryRepository: indexed in-process store (default, lost on restart)
+- SqliteRepository: SQLite via SQLAlchemy Core (WAL mode, pooled connections)
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import threading
+
+from sqlalchemy import (
+    Column,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    bindparam,
+    create_engine,
+    event,
+    func,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import QueuePool
+
+from survey_store import SurveyStore
+from ttl_cache import TTLCache
+
+
+class Repository(ABC):
+    """Storage interface used by the API endpoints"""
+
+    @abstractmethod
+    def next_sequence(self) -> int:
+        """Return the next unique survey sequence number"""
+
+    @abstractmethod
+    def add(self, survey: dict) -> dict:
+        """Add a survey (raises KeyError if the ID already exists)"""
+
+    @abstractmethod
+    def add_many(self, surveys: Iterable[dict]) -> int:
+        """Add several surveys in one operation, returning how many were added"""
+
+    @abstractmethod
+    def get(self, survey_id: str) -> Optional[dict]:
+        """Get a survey by ID, or None if it does not exist"""
+
+    @abstractmethod
+    def update(self, survey_id: str, changes: dict) -> Optional[dict]:
+        """Apply a partial update, returning the updated survey or None"""
+
+    @abstractmethod
+    def delete(self, survey_id: str) -> Optional[dict]:
+        """Delete a survey, returning it or None if it does not exist"""
+
+    @abstractmethod
+    def get_many(self, survey_ids: Iterable[str]) -> Dict[str, dict]:
+        """Get several surveys by ID ({id: survey}, missing IDs left out)"""
+
+    @abstractmethod
+    def update_many(self, changes: Dict[str, dict]) -> List[dict]:
+        """
+        Apply partial updates ({id: changes}) in one operation, all or nothing
+
+        Raises KeyError, leaving every survey unchanged, if an ID does not exist.
+        """
+
+    @abstractmethod
+    def delete_many(self, survey_ids: Iterable[str]) -> List[str]:
+        """Delete several surveys in one operation, returning the IDs that existed"""
+
+    @abstractmethod
+    def list(
+        self,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        status: Optional[str] = None,
+        creator: Optional[str] = None
+    ) -> List[dict]:
+        """List surveys in creation order, optionally filtered"""
+
+    @abstractmethod
+    def list_after(
+        self,
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 10,
+        status: Optional[str] = None,
+        creator: Optional[str] = None
+    ) -> List[dict]:
+        """List surveys ordered by (createdAt, id) that come after the given key"""
+
+    @abstractmethod
+    def count(self, status: Optional[str] = None, creator: Optional[str] = None) -> int:
+        """Count surveys matching the given filters"""
+
+    @abstractmethod
+    def save_user(self, email: str, user: dict):
+        """Store a logged-in user's profile"""
+
+    @abstractmethod
+    def get_user(self, email: str) -> Optional[dict]:
+        """Get a stored user profile by email"""
+
+    def close(self):
+        """Release any resources held by the repository"""
+
+
+class InMemoryRepository(SurveyStore, Repository):
+    """Repository backed by the indexed in-process SurveyStore"""
+
+    def __init__(self, max_users: int = 100000, user_ttl: Optional[float] = None):
+        """
+        Initialize the repository
+
+        Args:
+            max_users: Maximum number of user profiles kept (least recently
+                       used are dropped first)
+            user_ttl: Seconds a profile is kept after its last login
+                      (None = until dropped for space)
+        """
+        super().__init__()
+        self._users = TTLCache(max_entries=max_users, ttl=user_ttl)
+
+    def add_many(self, surveys: Iterable[dict]) -> int:
+        surveys = list(surveys)
+        with self._lock:
+            # Validate first so a duplicate leaves the store unchanged
+            seen = set()
+            for survey in surveys:
+                if survey["id"] in self._surveys or survey["id"] in seen:
+                    raise KeyError(f"Survey already exists: {survey['id']}")
+                seen.add(survey["id"])
+            for survey in surveys:
+                self.add(survey)
+        return len(surveys)
+
+    def get_many(self, survey_ids: Iterable[str]) -> Dict[str, dict]:
+        surveys = {}
+        for survey_id in survey_ids:
+            survey = self._surveys.get(survey_id)
+            if survey is not None:
+                surveys[survey_id] = survey
+        return surveys
+
+    def update_many(self, changes: Dict[str, dict]) -> List[dict]:
+        with self._lock:
+            for survey_id in changes:
+                if survey_id not in self._surveys:
+                    raise KeyError(f"Survey not found: {survey_id}")
+            return [self.update(survey_id, survey_changes) for survey_id, survey_changes in changes.items()]
+
+    def delete_many(self, survey_ids: Iterable[str]) -> List[str]:
+        with self._lock:
+            return [survey_id for survey_id in survey_ids if self.delete(survey_id) is not None]
+
+    def save_user(self, email: str, user: dict):
+        self._users.set(email, user)
+
+    def get_user(self, email: str) -> Optional[dict]:
+        return self._users.get(email)
+
+
+class SqliteRepository(Repository):
+    """
+    Repository backed by SQLite through SQLAlchemy Core
+
+    Surveys are stored as JSON documents, with the filter and ordering
+    fields (status, creator, createdAt) copied into indexed columns.
+    """
+
+    def __init__(self, database_url: str = "sqlite:///./surveys.db", pool_size: int = 5):
+        """
+        Initialize the SQLite repository and create tables if needed
+
+        Args:
+            database_url: SQLAlchemy SQLite URL
+            pool_size: Number of pooled connections kept open
+        """
+        self.database_url = database_url
+        self.engine = create_engine(
+            database_url,
+            poolclass=QueuePool,
+            pool_size=pool_size,
+            max_overflow=pool_size,
+            pool_pre_ping=True,
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        event.listen(self.engine, "connect", configure_sqlite_connection)
+
+        self.metadata = MetaData()
+        self.surveys = Table(
+            "surveys",
+            self.metadata,
+            Column("id", String, primary_key=True),
+            Column("status", String),
+            Column("creator", String),
+            Column("created_at", String, nullable=False, default=""),
+            Column("data", Text, nullable=False),
+            Index("ix_surveys_status", "status", "created_at", "id"),
+            Index("ix_surveys_creator", "creator", "created_at", "id"),
+            Index("ix_surveys_created_at", "created_at", "id"),
+        )
+        self.users = Table(
+            "users",
+            self.metadata,
+            Column("email", String, primary_key=True),
+            Column("data", Text, nullable=False),
+        )
+        self.sequences = Table(
+            "sequences",
+            self.metadata,
+            Column("name", String, primary_key=True),
+            Column("value", Integer, nullable=False),
+        )
+        self.metadata.create_all(self.engine)
+
+        # Statements are built once and reused (SQLAlchemy caches their
+        # compiled form), bulk inserts go through executemany
+        surveys = self.surveys
+        self._insert_survey = surveys.insert().values(
+            id=bindparam("p_id"),
+            status=bindparam("p_status"),
+            creator=bindparam("p_creator"),
+            created_at=bindparam("p_created_at"),
+            data=bindparam("p_data"),
+        )
+        self._select_survey = select(surveys.c.data).where(surveys.c.id == bindparam("p_id"))
+        self._update_survey = surveys.update().where(surveys.c.id == bindparam("p_id")).values(
+            status=bindparam("p_status"),
+            creator=bindparam("p_creator"),
+            created_at=bindparam("p_created_at"),
+            data=bindparam("p_data"),
+        )
+        self._delete_survey = surveys.delete().where(surveys.c.id == bindparam("p_id"))
+        self._partial_updates: Dict[frozenset, Any] = {}
+        self._next_sequence = (
+            self.sequences.update()
+            .where(self.sequences.c.name == "surveys")
+            .values(value=self.sequences.c.value + 1)
+            .returning(self.sequences.c.value)
+        )
+
+        with self.engine.begin() as conn:
+            exists = conn.execute(
+                select(self.sequences.c.value).where(self.sequences.c.name == "surveys")
+            ).first()
+            if exists is None:
+                conn.execute(self.sequences.insert().values(name="surveys", value=0))
+
+        # Serializes read-modify-write updates within this process
+        self._write_lock = threading.Lock()
+
+    def next_sequence(self) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(self._next_sequence).scalar_one()
+
+    def add(self, survey: dict) -> dict:
+        self.add_many([survey])
+        return survey
+
+    def add_many(self, surveys: Iterable[dict]) -> int:
+        rows = [_survey_params(survey) for survey in surveys]
+        if not rows:
+            return 0
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self._insert_survey, rows)
+        except IntegrityError as e:
+            raise KeyError(f"Survey already exists: {e.orig}")
+        return len(rows)
+
+    def get(self, survey_id: str) -> Optional[dict]:
+        with self.engine.connect() as conn:
+            data = conn.execute(self._select_survey, {"p_id": survey_id}).scalar()
+        return json.loads(data) if data is not None else None
+
+    def update(self, survey_id: str, changes: dict) -> Optional[dict]:
+        with self._write_lock, self.engine.begin() as conn:
+            data = conn.execute(self._select_survey, {"p_id": survey_id}).scalar()
+            if data is None:
+                return None
+            survey = json.loads(data)
+            for key, value in changes.items():
+                if key != "id":  # Don't allow ID changes
+                    survey[key] = value
+            conn.execute(self._update_survey, _survey_params(survey))
+        return survey
+
+    def delete(self, survey_id: str) -> Optional[dict]:
+        with self._write_lock, self.engine.begin() as conn:
+            data = conn.execute(self._select_survey, {"p_id": survey_id}).scalar()
+            if data is None:
+                return None
+            conn.execute(self._delete_survey, {"p_id": survey_id})
+        return json.loads(data)
+
+    def get_many(self, survey_ids: Iterable[str]) -> Dict[str, dict]:
+        surveys = {}
+        with self.engine.connect() as conn:
+            for chunk in _chunks(survey_ids):
+                rows = conn.execute(select(self.surveys.c.id, self.surveys.c.data).where(self.surveys.c.id.in_(chunk)))
+                surveys.update((survey_id, json.loads(data)) for survey_id, data in rows)
+        return surveys
+
+    def update_many(self, changes: Dict[str, dict]) -> List[dict]:
+        with self._write_lock, self.engine.begin() as conn:
+            surveys = {}
+            for chunk in _chunks(changes):
+                rows = conn.execute(select(self.surveys.c.id, self.surveys.c.data).where(self.surveys.c.id.in_(chunk)))
+                surveys.update((survey_id, json.loads(data)) for survey_id, data in rows)
+            updated = []
+            for survey_id, survey_changes in changes.items():
+                survey = surveys.get(survey_id)
+                if survey is None:
+                    raise KeyError(f"Survey not found: {survey_id}")  # Rolls the transaction back
+                for key, value in survey_changes.items():
+                    if key != "id":  # Don't allow ID changes
+                        survey[key] = value
+                updated.append(survey)
+            if updated:
+                fields = frozenset(
+                    field for survey_changes in changes.values() for field in survey_changes if field in _KEY_COLUMNS
+                )
+                conn.execute(self._partial_update(fields), [_survey_params(survey) for survey in updated])
+        return updated
+
+    def _partial_update(self, fields: frozenset):
+        """
+        UPDATE statement setting data plus only the given fields' columns
+
+        Columns left out of the SET clause keep their index entries, so a
+        bulk status change doesn't rewrite the creator and created_at indexes.
+        """
+        statement = self._partial_updates.get(fields)
+        if statement is None:
+            statement = self.surveys.update().where(self.surveys.c.id == bindparam("p_id")).values(
+                data=bindparam("p_data"),
+                **{column: bindparam(param) for field, (column, param) in _KEY_COLUMNS.items() if field in fields}
+            )
+            self._partial_updates[fields] = statement
+        return statement
+
+    def delete_many(self, survey_ids: Iterable[str]) -> List[str]:
+        deleted = []
+        with self._write_lock, self.engine.begin() as conn:
+            for chunk in _chunks(survey_ids):
+                existing = set(conn.execute(select(self.surveys.c.id).where(self.surveys.c.id.in_(chunk))).scalars())
+                conn.execute(self.surveys.delete().where(self.surveys.c.id.in_(chunk)))
+                deleted.extend(survey_id for survey_id in chunk if survey_id in existing)
+        return deleted
+
+    def list(
+        self,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        status: Optional[str] = None,
+        creator: Optional[str] = None
+    ) -> List[dict]:
+        query = self._filtered(select(self.surveys.c.data), status, creator)
+        query = query.order_by(self.surveys.c.created_at, self.surveys.c.id).offset(skip)
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            return [json.loads(data) for data in conn.execute(query).scalars()]
+
+    def list_after(
+        self,
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 10,
+        status: Optional[str] = None,
+        creator: Optional[str] = None
+    ) -> List[dict]:
+        query = self._filtered(select(self.surveys.c.data), status, creator)
+        if after is not None:
+            # Row-value comparison seeks directly into the (created_at, id) index
+            query = query.where(tuple_(self.surveys.c.created_at, self.surveys.c.id) > tuple_(*after))
+        query = query.order_by(self.surveys.c.created_at, self.surveys.c.id).limit(limit)
+        with self.engine.connect() as conn:
+            return [json.loads(data) for data in conn.execute(query).scalars()]
+
+    def count(self, status: Optional[str] = None, creator: Optional[str] = None) -> int:
+        query = self._filtered(select(func.count()).select_from(self.surveys), status, creator)
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar_one()
+
+    def save_user(self, email: str, user: dict):
+        statement = sqlite_insert(self.users).values(email=email, data=json.dumps(user))
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.users.c.email],
+            set_={"data": statement.excluded.data},
+        )
+        with self.engine.begin() as conn:
+            conn.execute(statement)
+
+    def get_user(self, email: str) -> Optional[dict]:
+        with self.engine.connect() as conn:
+            data = conn.execute(
+                select(self.users.c.data).where(self.users.c.email == email)
+            ).scalar()
+        return json.loads(data) if data is not None else None
+
+    def close(self):
+        self.engine.dispose()
+
+    def _filtered(self, query, status: Optional[str], creator: Optional[str]):
+        if status is not None:
+            query = query.where(self.surveys.c.status == status)
+        if creator is not None:
+            query = query.where(self.surveys.c.creator == creator)
+        return query
+
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Enable WAL mode on every new pooled connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _chunks(survey_ids: Iterable[str], size: int = 500) -> Iterable[List[str]]:
+    """Split IDs into lists small enough for an IN (...) clause"""
+    chunk = []
+    for survey_id in survey_ids:
+        chunk.append(survey_id)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Survey fields copied into indexed columns: field -> (column, bind parameter)
+_KEY_COLUMNS = {
+    "status": ("status", "p_status"),
+    "creator": ("creator", "p_creator"),
+    "createdAt": ("created_at", "p_created_at"),
+}
+
+
+def _survey_params(survey: dict) -> dict:
+    """Bind parameters for the survey insert/update statements"""
+    return {
+        "p_id": survey["id"],
+        "p_status": survey.get("status"),
+        "p_creator": survey.get("creator"),
+        "p_created_at": survey.get("createdAt") or "",
+        "p_data": json.dumps(survey),
+    }
+
+
+def create_repository(
+    backend: str = "memory",
+    database_url: Optional[str] = None,
+    max_users: int = 100000,
+    user_ttl: Optional[float] = None,
+) -> Repository:
+    """
+    Create a repository for the configured storage backend
+
+    Args:
+        backend: "memory" or "sqlite"
+        database_url: SQLAlchemy URL for the sqlite backend
+        max_users: Memory backend: maximum number of user profiles kept
+        user_ttl: Memory backend: seconds a profile is kept after login
+
+    Returns:
+        Repository instance
+    """
+    backend = backend.lower()
+    if backend == "memory":
+        return InMemoryRepository(max_users=max_users, user_ttl=user_ttl)
+    if backend == "sqlite":
+        return SqliteRepository(database_url or "sqlite:///./surveys.db")
+    raise ValueError(f"Unknown storage backend: {backend}")
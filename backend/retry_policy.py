@@ -0,0 +1,103 @@
+"""
+Retry Policy
+Exponential backoff with full jitter for transient Google API failures
+
+The quota scheduler already paces calls and re-queues 429s; this policy
+covers everything else that is worth another try: 5xx responses, 408s,
+rate limits that outlasted the scheduler, and dropped connections.
+Delays grow exponentially and are randomized ("full jitter") so that
+many workers failing at once don't retry in lockstep.
+"""
+
+from typing import Callable, Optional
+import os
+import random
+import socket
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from quota_scheduler import is_rate_limit_error, retry_after_seconds
+
+
+# HTTP statuses that are safe to retry
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+# Network-level failures raised by httplib2 / the socket layer
+RETRYABLE_EXCEPTIONS = (ConnectionError, TimeoutError, socket.timeout, httplib2.HttpLib2Error)
+
+
+class RetryPolicy:
+    """Retries a callable on transient errors with exponential backoff and jitter"""
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the policy
+
+        Args:
+            max_attempts: Total attempts per call, including the first
+                          (default FORM_RETRY_ATTEMPTS or 5)
+            base_delay: Backoff before the second attempt, doubled after each
+                        failure (default FORM_RETRY_BASE_DELAY or 0.5 seconds)
+            max_delay: Upper bound for a single backoff
+            sleep: Function used to wait (replaceable in tests)
+        """
+        self.max_attempts = max(1, max_attempts if max_attempts is not None else int(os.getenv("FORM_RETRY_ATTEMPTS", "5")))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv("FORM_RETRY_BASE_DELAY", "0.5"))
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+    def backoff(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """
+        Seconds to wait after the given failed attempt (1-based)
+
+        Uses full jitter, uniform(0, base * 2^(attempt-1)) capped at
+        max_delay, but never less than the server's Retry-After.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if isinstance(error, HttpError):
+            retry_after = retry_after_seconds(error)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def call(self, func: Callable, *args, description: str = "call", **kwargs):
+        """
+        Call func, retrying transient failures
+
+        Args:
+            func: Callable to run
+            description: What is being attempted (for logging)
+
+        Returns:
+            func's result
+
+        Raises:
+            The last error if it is not retryable or attempts run out
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                if not is_retryable_error(error) or attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt, error)
+                print(f"🔁 {description} failed ({error.__class__.__name__}), "
+                      f"retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_attempts})")
+                self.sleep(delay)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """True for errors a later attempt can plausibly fix"""
+    if isinstance(error, HttpError):
+        return getattr(error.resp, "status", None) in RETRYABLE_STATUSES or is_rate_limit_error(error)
+    return isinstance(error, RETRYABLE_EXCEPTIONS)
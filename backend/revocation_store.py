@@ -0,0 +1,75 @@
+"""
+Revocation Store
+Revoked session IDs, kept only until their tokens expire
+
+A revoked token only needs to be remembered while it could still pass
+verification, i.e. until its `exp`. RevocationStore files each session ID
+(the token's `jti`) into a bucket covering `bucket_seconds` of expiry
+times. Since a token's exp is known when it is checked, a lookup touches a
+single set (O(1)), and whole buckets are dropped once every token in them
+has expired, so memory is bounded by the logouts within one token
+lifetime rather than by every logout ever.
+"""
+
+from typing import Callable, Dict, Set
+import threading
+import time
+
+
+class RevocationStore:
+    """Time-bucketed set of revoked session IDs"""
+
+    def __init__(self, bucket_seconds: float = 300.0, clock: Callable[[], float] = time.time):
+        """
+        Initialize the store
+
+        Args:
+            bucket_seconds: Width of an expiry bucket; expired IDs linger at
+                            most this long after their token's exp
+            clock: Returns the current Unix time (tests can substitute one)
+        """
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self._buckets: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._pruned_bucket = self._bucket(clock())
+
+    def revoke(self, session_id: str, expires_at: float):
+        """Revoke a session until its token's expiry (already expired tokens are ignored)"""
+        now = self.clock()
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._buckets.setdefault(self._bucket(expires_at), set()).add(session_id)
+            self._prune(now)
+
+    def is_revoked(self, session_id: str, expires_at: float) -> bool:
+        """True if the session with this ID and expiry was revoked"""
+        revoked = self._buckets.get(self._bucket(expires_at))
+        return revoked is not None and session_id in revoked
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(bucket) for bucket in self._buckets.values())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._prune(self.clock())
+            return {
+                "revoked": sum(len(bucket) for bucket in self._buckets.values()),
+                "buckets": len(self._buckets),
+            }
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def _prune(self, now: float):
+        # Runs at most once per bucket width; a bucket is dead once its end has passed
+        current = self._bucket(now)
+        if current == self._pruned_bucket:
+            return
+        for bucket in [bucket for bucket in self._buckets if bucket < current]:
+            del self._buckets[bucket]
+        self._pruned_bucket = current
@@ -0,0 +1,63 @@
+"""
+Session Cache
+Bounded LRU cache of verified session tokens
+
+get_current_user runs on every authenticated request, and verifying the
+session cookie means a base64/JSON parse plus an HMAC check each time.
+SessionCache remembers the claims of tokens it has already verified,
+keyed by a SHA-256 of the token (the token itself is never kept), until
+the token's `exp`. The least recently used entries are dropped once
+max_entries is reached. Revocation lives in RevocationStore; discard()
+drops a logged-out token from the cache.
+"""
+
+from typing import Callable, Dict, Optional
+import hashlib
+import time
+
+from ttl_cache import TTLCache
+
+
+class SessionCache:
+    """Thread-safe LRU map of token hash -> verified claims"""
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.time):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached sessions
+            clock: Returns the current Unix time (tests can substitute one)
+        """
+        self._sessions = TTLCache(max_entries=max_entries, clock=clock)
+
+    def get(self, token: str) -> Optional[dict]:
+        """Cached claims for a token, or None if unknown or expired"""
+        return self._sessions.get(token_key(token))
+
+    def put(self, token: str, claims: dict):
+        """Cache a verified token's claims until its `exp` (tokens without one aren't cached)"""
+        expires_at = claims.get("exp")
+        if isinstance(expires_at, (int, float)):
+            self._sessions.set(token_key(token), claims, expires_at=expires_at)
+
+    def discard(self, token: str):
+        """Drop a token from the cache (e.g. on logout)"""
+        self._sessions.pop(token_key(token))
+
+    @property
+    def hits(self) -> int:
+        return self._sessions.hits
+
+    def stats(self) -> Dict[str, int]:
+        stats = self._sessions.stats()
+        stats["sessions"] = stats.pop("entries")
+        return stats
+
+    def clear(self):
+        self._sessions.clear()
+
+
+def token_key(token: str) -> bytes:
+    """Cache key for a token: its SHA-256 digest"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
@@ -0,0 +1,201 @@
+"""
+SMTP Pool
+Long-lived, authenticated SMTP connections shared between sends
+
+aiosmtplib.send() opens a TCP connection, runs EHLO, STARTTLS, EHLO again
+and AUTH, sends one message and quits. SmtpConnectionPool keeps up to
+`size` connections open and logged in, and hands them out one send at a
+time. A connection that has been idle for a while is checked with NOOP
+before use, connections idle past max_idle or used for max_messages
+messages are replaced, and a send that fails because the server dropped
+the connection is retried once on a fresh one.
+
+Connections belong to the event loop that opened them; if the pool is
+used from a different loop, the old connections are dropped.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+
+import aiosmtplib
+
+
+class _PooledConnection:
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages = 0
+
+
+class SmtpConnectionPool:
+    """Bounded pool of connected, logged-in aiosmtplib.SMTP clients"""
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 4,
+        start_tls: Optional[bool] = True,
+        noop_after: float = 10.0,
+        max_idle: float = 120.0,
+        max_messages: int = 100,
+        timeout: float = 30.0,
+        **smtp_options,
+    ):
+        """
+        Initialize the pool (connections are opened on first use)
+
+        Args:
+            hostname: SMTP server hostname
+            port: SMTP server port
+            username: SMTP username (no AUTH if empty)
+            password: SMTP password
+            size: Maximum number of open connections (= concurrent sends)
+            start_tls: Upgrade connections with STARTTLS
+            noop_after: Health-check connections idle longer than this with NOOP
+            max_idle: Close connections idle longer than this (servers drop them)
+            max_messages: Replace a connection after this many messages
+            timeout: Connect and command timeout in seconds
+            **smtp_options: Passed to aiosmtplib.SMTP (e.g. validate_certs)
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.hostname = hostname
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.size = size
+        self.start_tls = start_tls
+        self.noop_after = noop_after
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self.smtp_options = smtp_options
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: List[_PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._stats = {"connects": 0, "reconnects": 0, "health_checks": 0, "messages": 0}
+
+    async def send_message(self, message, recipients: Optional[List[str]] = None):
+        """
+        Send a message over a pooled connection
+
+        Args:
+            message: email.message.Message to send
+            recipients: Envelope recipients (defaults to the To/Cc/Bcc headers)
+
+        Returns:
+            aiosmtplib's ({recipient: response}, message) result
+        """
+        return await self._send(lambda smtp: smtp.send_message(message, recipients=recipients))
+
+    async def sendmail(self, sender: str, recipients: List[str], data: bytes):
+        """
+        Send an already serialized message over a pooled connection
+
+        Args:
+            sender: Envelope sender (MAIL FROM)
+            recipients: Envelope recipients (RCPT TO)
+            data: The message as CRLF-separated bytes
+
+        Returns:
+            aiosmtplib's ({recipient: response}, message) result
+        """
+        return await self._send(lambda smtp: smtp.sendmail(sender, recipients, data))
+
+    async def _send(self, send: Callable[[aiosmtplib.SMTP], Awaitable]):
+        for attempt in range(2):
+            try:
+                async with self.connection() as smtp:
+                    return await send(smtp)
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+                # The server closed a pooled connection under us; one retry on a fresh one
+                if attempt:
+                    raise
+                self._stats["reconnects"] += 1
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """Borrow a healthy connection for the current task"""
+        self._bind_to_running_loop()
+        async with self._slots:
+            pooled = await self._acquire()
+            healthy = False
+            try:
+                yield pooled.smtp
+                pooled.messages += 1
+                self._stats["messages"] += 1
+                healthy = True
+            finally:
+                pooled.last_used = time.monotonic()
+                if healthy and pooled.smtp.is_connected and pooled.messages < self.max_messages:
+                    self._idle.append(pooled)
+                else:
+                    await self._discard(pooled)
+
+    async def close(self):
+        """QUIT every idle connection"""
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._discard(pooled)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self.size, "idle": len(self._idle), **self._stats}
+
+    async def _acquire(self) -> _PooledConnection:
+        while self._idle:
+            pooled = self._idle.pop()  # Most recently used first
+            idle_for = time.monotonic() - pooled.last_used
+            if not pooled.smtp.is_connected or idle_for > self.max_idle:
+                await self._discard(pooled)
+                continue
+            if idle_for > self.noop_after:
+                self._stats["health_checks"] += 1
+                try:
+                    await pooled.smtp.noop()
+                except (aiosmtplib.SMTPException, ConnectionError, asyncio.TimeoutError):
+                    await self._discard(pooled)
+                    continue
+            return pooled
+        return await self._connect()
+
+    async def _connect(self) -> _PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+            **self.smtp_options,
+        )
+        await smtp.connect()  # Also runs STARTTLS and AUTH
+        self._stats["connects"] += 1
+        return _PooledConnection(smtp)
+
+    async def _discard(self, pooled: _PooledConnection):
+        if not pooled.smtp.is_connected:
+            return
+        try:
+            await pooled.smtp.quit()
+        except Exception:
+            pooled.smtp.close()
+
+    def _bind_to_running_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        # Connections and the semaphore can't cross event loops; start over
+        for pooled in self._idle:
+            try:
+                pooled.smtp.close()
+            except RuntimeError:
+                pass  # Their loop is already closed
+        self._idle = []
+        self._slots = asyncio.Semaphore(self.size)
+        self._loop = loop
@@ -0,0 +1,269 @@
+"""
+Survey Import
+Incremental NDJSON/CSV parsing for streamed survey uploads
+
+POST /surveys/import feeds the request body (or the file field of a
+multipart upload) to an ImportParser chunk by chunk as it arrives. The
+parser only holds on to the line or CSV record that is still incomplete
+at the end of a chunk, so memory use does not grow with the upload.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+import codecs
+import csv
+import json
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# (line number, survey fields or an error message) - line numbers are 1-based
+# and point at the first line of a row
+ImportRow = Tuple[int, Union[dict, str]]
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> Optional[str]:
+    """
+    Guess an import's format from a Content-Type and/or file name
+
+    Returns:
+        "ndjson", "csv" or None if neither says
+    """
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    content_type = (content_type or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    if "csv" in content_type:
+        return "csv"
+    return None
+
+
+class ImportParser:
+    """Turns chunks of an NDJSON or CSV upload into survey rows as they arrive"""
+
+    def __init__(self, format: str, max_row_length: int = 1_000_000):
+        """
+        Initialize the parser
+
+        Args:
+            format: "ndjson" (one JSON object per line) or "csv" (header row first)
+            max_row_length: Longest accepted row in characters; longer rows are
+                reported as errors and skipped without being kept in memory
+        """
+        if format not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {format}")
+        self.format = format
+        self.max_row_length = max_row_length
+        self.lines = 0  # Complete lines seen so far
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._partial = ""  # Text after the last newline
+        self._skipping = False  # Discarding the rest of an overlong line
+        # CSV state
+        self.header: Optional[List[str]] = None
+        self._record: List[str] = []  # Lines of a record with an open quoted field
+        self._record_quotes = 0
+        self._record_size = 0
+        self._record_line = 0
+        self._dropping = False  # Discarding an overlong record until its quoted field closes
+
+    def feed(self, chunk: bytes) -> List[ImportRow]:
+        """Parse the next chunk, returning the rows it completes"""
+        rows: List[ImportRow] = []
+        lines = (self._partial + self._decoder.decode(chunk)).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self.lines += 1
+            if self._skipping:
+                # The end of a line that was already reported as too long
+                self._skipping = False
+                self._drop(line)
+                continue
+            self._line(line[:-1] if line.endswith("\r") else line, rows)
+
+        if self._skipping or self._dropping:
+            # More of a row that was already reported: only its quotes matter
+            self._drop_partial()
+        elif len(self._partial) + (self._record_size if self._record else 0) > self.max_row_length:
+            if self._record:
+                rows.append((self._record_line, self._too_long()))
+                self._record = []
+            else:
+                rows.append((self.lines + 1, self._too_long()))
+                self._record_quotes = 0
+            self._dropping = self.format == "csv"
+            self._drop_partial()
+        return rows
+
+    def close(self) -> List[ImportRow]:
+        """Parse whatever is left once the upload has ended"""
+        rows: List[ImportRow] = []
+        tail = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if self._skipping:
+            self._skipping = False
+            self._drop(tail)
+        elif tail:
+            self.lines += 1
+            self._line(tail[:-1] if tail.endswith("\r") else tail, rows)
+        if self._record:
+            rows.append((self._record_line, "Unterminated quoted field"))
+            self._record = []
+        return rows
+
+    def _line(self, line: str, rows: List[ImportRow]):
+        if self.format == "ndjson":
+            if len(line) > self.max_row_length:
+                rows.append((self.lines, self._too_long()))
+            elif line.strip():
+                rows.append((self.lines, self._json_row(line)))
+            return
+
+        if self._dropping:
+            self._drop(line)
+            return
+
+        # CSV: a record continues onto the next line while a quoted field is
+        # open, which is whenever it has seen an odd number of quotes
+        if not self._record:
+            if not line.strip():
+                return
+            self._record_line = self.lines
+            self._record_quotes = 0
+            self._record_size = 0
+        self._record.append(line)
+        self._record_quotes += line.count('"')
+        self._record_size += len(line) + 1
+        if self._record_size > self.max_row_length:
+            rows.append((self._record_line, self._too_long()))
+            self._record = []
+            self._dropping = self._record_quotes % 2 == 1
+        elif self._record_quotes % 2 == 0:
+            record = "\n".join(self._record)
+            self._record = []
+            row = self._csv_row(record)
+            if row is not None:
+                rows.append((self._record_line, row))
+
+    def _drop(self, line: str):
+        """Discard a line of an overlong row; a CSV record ends once its quotes balance"""
+        if self.format == "csv":
+            self._record_quotes += line.count('"')
+            self._dropping = self._record_quotes % 2 == 1
+
+    def _drop_partial(self):
+        """Discard the incomplete line of an overlong row, keeping count of its quotes"""
+        self._record_quotes += self._partial.count('"')
+        self._partial = ""
+        self._skipping = True
+
+    def _too_long(self) -> str:
+        return f"Row longer than {self.max_row_length} characters"
+
+    def _json_row(self, line: str) -> Union[dict, str]:
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            return f"Invalid JSON: {e.msg} (column {e.colno})"
+        if not isinstance(row, dict):
+            return "Expected a JSON object"
+        return row
+
+    def _csv_row(self, record: str) -> Optional[Union[dict, str]]:
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as e:
+            return f"Invalid CSV: {e}"
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            return None
+        if len(values) > len(self.header):
+            return f"Expected at most {len(self.header)} columns, got {len(values)}"
+        # Empty cells are left out so the field's default applies
+        return {name: value for name, value in zip(self.header, values) if value != ""}
+
+
+class MultipartFileReader:
+    """Pulls one file field out of a multipart/form-data body as it streams in"""
+
+    def __init__(self, content_type: str, field_name: str = "file"):
+        """
+        Initialize the reader
+
+        Args:
+            content_type: The request's Content-Type header, with the boundary
+            field_name: Form field holding the file
+
+        Raises:
+            ValueError: If the Content-Type has no boundary
+        """
+        _, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise ValueError("Missing multipart boundary")
+        self.field_name = field_name.encode()
+        self.found = False  # Whether the file field's headers have been seen
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._data: List[bytes] = []
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Parse the next chunk of the body, returning the file bytes it holds"""
+        self._parser.write(chunk)
+        data = b"".join(self._data)
+        self._data.clear()
+        return data
+
+    def close(self):
+        """Check the body ended properly"""
+        self._parser.finalize()
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._in_file = not self.found and options.get(b"name") == self.field_name
+        if self._in_file:
+            self.found = True
+            filename = options.get(b"filename")
+            self.filename = filename.decode("utf-8", "replace") if filename else None
+            content_type = self._headers.get(b"content-type")
+            self.content_type = content_type.decode("latin-1") if content_type else None
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._data.append(data[start:end])
+
+    def _on_part_end(self):
+        self._in_file = False
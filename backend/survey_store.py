@@ -0,0 +1,306 @@
+"""
+Survey Store
+In-process survey storage with a primary hash index by id and secondary
+indexes by status and creator. Lookups by id are O(1). The ordered indexes
+are SortedLists (a list of sorted sublists), so adding or removing an
+entry is O(log n) and does not shift the whole index.
+"""
+
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+import threading
+
+from sortedcontainers import SortedList
+
+
+# Surveys are listed in (createdAt, id) order
+OrderKey = Tuple[str, str]
+
+_NO_KEYS = SortedList()
+
+
+class SurveyStore:
+    """In-memory survey store indexed by id, status and creator"""
+
+    # Fields with a secondary index (value -> sorted list of order keys)
+    INDEXED_FIELDS = ("status", "creator")
+    # Fields that go into index keys, so must be strings (or None)
+    KEY_FIELDS = INDEXED_FIELDS + ("createdAt",)
+
+    def __init__(self):
+        """Initialize an empty store"""
+        self._surveys: Dict[str, dict] = {}
+        self._keys: Dict[str, OrderKey] = {}
+        self._ordered = SortedList()
+        self._indexes: Dict[str, Dict[Optional[str], SortedList]] = {
+            field: {} for field in self.INDEXED_FIELDS
+        }
+        self._sequence = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._surveys)
+
+    def __contains__(self, survey_id: str) -> bool:
+        return survey_id in self._surveys
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.list())
+
+    def next_sequence(self) -> int:
+        """
+        Return the next survey sequence number
+
+        Unlike ``len(store) + 1`` this never repeats after a delete, so it is
+        safe to use when generating survey IDs.
+        """
+        with self._lock:
+            self._sequence += 1
+            return self._sequence
+
+    def add(self, survey: dict) -> dict:
+        """
+        Add a survey to the store
+
+        Args:
+            survey: Survey dict, must contain a unique "id"
+
+        Returns:
+            The stored survey
+
+        Raises:
+            KeyError: If a survey with the same ID already exists
+            ValueError: If status, creator or createdAt is not a string or None
+        """
+        survey_id = survey["id"]
+        self._check_key_fields(survey)
+        with self._lock:
+            if survey_id in self._surveys:
+                raise KeyError(f"Survey already exists: {survey_id}")
+            self._surveys[survey_id] = survey
+            self._index(survey)
+        return survey
+
+    def get(self, survey_id: str) -> Optional[dict]:
+        """Get a survey by ID, or None if it does not exist"""
+        return self._surveys.get(survey_id)
+
+    def update(self, survey_id: str, changes: dict) -> Optional[dict]:
+        """
+        Apply a partial update to a survey, keeping the indexes in sync
+
+        The update is all or nothing: if it fails, the survey and its index
+        entries are left as they were.
+
+        Args:
+            survey_id: ID of the survey to update
+            changes: Fields to set (the "id" field is ignored)
+
+        Returns:
+            The updated survey, or None if it does not exist
+
+        Raises:
+            ValueError: If status, creator or createdAt is not a string or None
+        """
+        self._check_key_fields(changes)
+        with self._lock:
+            survey = self._surveys.get(survey_id)
+            if survey is None:
+                return None
+
+            missing = object()
+            previous = {key: survey.get(key, missing) for key in changes if key != "id"}
+            try:
+                self._reindex(survey, changes)
+            except Exception:
+                # Put back the old values, then rebuild the survey's index entries
+                for key, value in previous.items():
+                    if value is missing:
+                        survey.pop(key, None)
+                    else:
+                        survey[key] = value
+                self._discard_entries(survey, changes)
+                self._index(survey)
+                raise
+            return survey
+
+    def delete(self, survey_id: str) -> Optional[dict]:
+        """
+        Remove a survey from the store
+
+        Returns:
+            The removed survey, or None if it does not exist
+        """
+        with self._lock:
+            survey = self._surveys.pop(survey_id, None)
+            if survey is None:
+                return None
+            self._unindex(survey)
+            return survey
+
+    def list(
+        self,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        status: Optional[str] = None,
+        creator: Optional[str] = None
+    ) -> List[dict]:
+        """
+        List surveys in creation order, optionally filtered
+
+        Args:
+            skip: Number of matching surveys to skip
+            limit: Maximum number of surveys to return (None for all)
+            status: Only return surveys with this status
+            creator: Only return surveys created by this user
+
+        Returns:
+            List of matching surveys
+        """
+        with self._lock:
+            stop = None if limit is None else skip + limit
+            if status is not None and creator is not None:
+                keys = list(self._intersect(status, creator))[skip:stop]
+            else:
+                keys = self._keys_for(status, creator)[skip:stop]
+            return [self._surveys[survey_id] for _, survey_id in keys]
+
+    def list_after(
+        self,
+        after: Optional[OrderKey] = None,
+        limit: int = 10,
+        status: Optional[str] = None,
+        creator: Optional[str] = None
+    ) -> List[dict]:
+        """
+        List surveys that come after an order key (keyset pagination)
+
+        Seeks into the sorted index with a binary search, so the cost
+        depends on the page size rather than how deep the page is.
+
+        Args:
+            after: (createdAt, id) of the last survey on the previous page,
+                   or None to start from the beginning
+            limit: Maximum number of surveys to return
+            status: Only return surveys with this status
+            creator: Only return surveys created by this user
+
+        Returns:
+            List of matching surveys
+        """
+        with self._lock:
+            if status is not None and creator is not None:
+                keys = self._intersect(status, creator, after)
+                page = [key for key, _ in zip(keys, range(limit))]
+            else:
+                keys = self._keys_for(status, creator)
+                start = keys.bisect_right(tuple(after)) if after is not None else 0
+                page = keys[start:start + limit]
+            return [self._surveys[survey_id] for _, survey_id in page]
+
+    def count(self, status: Optional[str] = None, creator: Optional[str] = None) -> int:
+        """Count surveys matching the given filters"""
+        with self._lock:
+            if status is not None and creator is not None:
+                return sum(1 for _ in self._intersect(status, creator))
+            return len(self._keys_for(status, creator))
+
+    def clear(self):
+        """Remove all surveys"""
+        with self._lock:
+            self._surveys.clear()
+            self._keys.clear()
+            self._ordered.clear()
+            for index in self._indexes.values():
+                index.clear()
+
+    def _keys_for(self, status: Optional[str], creator: Optional[str]) -> SortedList:
+        """Sorted order keys for a single filter (or all surveys)"""
+        if status is not None:
+            return self._indexes["status"].get(status, _NO_KEYS)
+        if creator is not None:
+            return self._indexes["creator"].get(creator, _NO_KEYS)
+        return self._ordered
+
+    def _intersect(self, status: str, creator: str, after: Optional[OrderKey] = None) -> Iterator[OrderKey]:
+        """Iterate order keys matching both filters, scanning the smaller index"""
+        by_status = self._indexes["status"].get(status, _NO_KEYS)
+        by_creator = self._indexes["creator"].get(creator, _NO_KEYS)
+        if len(by_status) <= len(by_creator):
+            keys, field, value = by_status, "creator", creator
+        else:
+            keys, field, value = by_creator, "status", status
+        start = keys.bisect_right(tuple(after)) if after is not None else 0
+        return (key for key in islice(keys, start, None) if self._surveys[key[1]].get(field) == value)
+
+    @classmethod
+    def _check_key_fields(cls, values: dict):
+        for field in cls.KEY_FIELDS:
+            if values.get(field) is not None and not isinstance(values[field], str):
+                raise ValueError(f"{field} must be a string or null")
+
+    @staticmethod
+    def _apply(survey: dict, changes: dict):
+        for key, value in changes.items():
+            if key != "id":  # Don't allow ID changes
+                survey[key] = value
+
+    def _reindex(self, survey: dict, changes: dict):
+        """Apply changes, moving the survey's index entries that they affect"""
+        if "createdAt" in changes and changes["createdAt"] != survey.get("createdAt"):
+            # The order key changes, so every index entry moves
+            self._unindex(survey)
+            self._apply(survey, changes)
+            self._index(survey)
+            return
+
+        key = self._keys[survey["id"]]
+        moved = [
+            (field, survey.get(field))
+            for field in self.INDEXED_FIELDS
+            if field in changes and changes[field] != survey.get(field)
+        ]
+        for field, old_value in moved:
+            self._index_remove(field, old_value, key)
+        self._apply(survey, changes)
+        for field, _ in moved:
+            self._index_add(field, survey.get(field), key)
+
+    def _index(self, survey: dict):
+        key = (survey.get("createdAt") or "", survey["id"])
+        self._keys[survey["id"]] = key
+        self._ordered.add(key)
+        for field in self.INDEXED_FIELDS:
+            self._index_add(field, survey.get(field), key)
+
+    def _unindex(self, survey: dict):
+        key = self._keys.pop(survey["id"])
+        self._ordered.discard(key)
+        for field in self.INDEXED_FIELDS:
+            self._index_remove(field, survey.get(field), key)
+
+    def _discard_entries(self, survey: dict, changes: dict):
+        """Remove every index entry a failed update may have left for a survey"""
+        survey_id = survey["id"]
+        keys = {self._keys.pop(survey_id, None), (survey.get("createdAt") or "", survey_id)}
+        if changes.get("createdAt") is not None:
+            keys.add((changes["createdAt"], survey_id))
+        for key in keys - {None}:
+            self._ordered.discard(key)
+            for field in self.INDEXED_FIELDS:
+                for value in {survey.get(field), changes.get(field, survey.get(field))}:
+                    self._index_remove(field, value, key)
+
+    def _index_add(self, field: str, value: Optional[str], key: OrderKey):
+        bucket = self._indexes[field].get(value)
+        if bucket is None:
+            bucket = self._indexes[field][value] = SortedList()
+        bucket.add(key)
+
+    def _index_remove(self, field: str, value: Optional[str], key: OrderKey):
+        bucket = self._indexes[field].get(value)
+        if bucket is None:
+            return
+        bucket.discard(key)
+        if not bucket:
+            del self._indexes[field][value]
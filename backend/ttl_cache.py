@@ -0,0 +1,101 @@
+"""
+TTL Cache
+Bounded, thread-safe LRU map whose entries expire
+
+Used wherever per-login state is kept in memory (verified sessions, user
+profiles), so it stays capped no matter how many logins the process sees:
+entries disappear when they expire, and the least recently used ones are
+dropped once max_entries is reached.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+import time
+
+
+class TTLCache:
+    """LRU map with a per-entry expiry time"""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of entries
+            ttl: Default lifetime of an entry in seconds (None = until evicted)
+            clock: Returns the current Unix time (tests can substitute one)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Value for a key, or None if missing or expired"""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if now >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """
+        Store a value
+
+        Args:
+            key: Entry key
+            value: Entry value
+            expires_at: Unix time the entry expires (defaults to now + ttl)
+        """
+        if expires_at is None:
+            expires_at = self.clock() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (value, float(expires_at))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove an entry, returning its value (None if missing)"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
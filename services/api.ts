@@ -148,6 +148,29 @@ export const surveysAPI = {
       return DEMO_SURVEYS.slice(skip, skip + limit)
     }
   },
+  // Keyset pagination: pass "" for the first page, then the returned next_cursor
+  // until it is null. The total is only counted when includeTotal is set.
+  getPage: async (cursor = "", limit = 10, status?: string, includeTotal = false) => {
+    try {
+      const response = await apiClient.get("/surveys", {
+        params: { cursor, limit, status, include_total: includeTotal },
+      })
+      isDemoMode = false
+      return response.data
+    } catch (error) {
+      console.debug("[v0] Backend unavailable, using demo surveys")
+      isDemoMode = true
+      const filtered = status && status !== "all" ? DEMO_SURVEYS.filter((s) => s.status === status) : DEMO_SURVEYS
+      const start = cursor ? Number(cursor) : 0
+      const end = start + limit
+      return {
+        surveys: filtered.slice(start, end),
+        next_cursor: end < filtered.length ? String(end) : null,
+        limit,
+        ...(includeTotal ? { total: filtered.length } : {}),
+      }
+    }
+  },
   getById: async (id: string) => {
     try {
       const response = await apiClient.get(`/surveys/${id}`)